@@ -0,0 +1,589 @@
+"""Python source module for parsing and indexing the BibTeX in EML `literatureCited`
+
+`set_lit_cited()` stores each citation as an opaque BibTeX string under `literatureCited/bibtex`.
+`bibtex.py` parses those strings into flat records (one dict per entry, with lower-case field names and
+LaTeX markup removed), keys each record by its DOI or, lacking one, by its normalized title and year, and
+builds a corpus-wide `ReferenceIndex` from those keys. The index merges duplicate references across
+packages and answers "which packages cite X" with a dict lookup instead of a grep through the XML.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import re
+import unicodedata
+import lxml.etree as etree
+from src.pyEML.parallel import map_files, xml_filepaths
+from src.pyEML.constants import LOOKUPS
+
+#: xpath, relative to the EML root, of each BibTeX string that `set_lit_cited()` writes
+_BIBTEX_XPATH = LOOKUPS['lit_cited']['node_xpath'] + '/bibtex'
+#: BibTeX's predefined month macros
+_MONTHS = {month: month.capitalize() for month in ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')}
+
+_ENTRY = re.compile(r'@\s*([A-Za-z]+)\s*([{(])')
+_NEXT_ENTRY = re.compile(r'\n[ \t]*@\s*[A-Za-z]+\s*[{(]') # an entry starts a line; a malformed entry can't run past the next one
+_KEY = re.compile(r'\s*([^\s,{}()"#=]*)\s*,')
+_FIELD_NAME = re.compile(r'\s*([A-Za-z][\w\-:.+/]*)\s*=\s*')
+_NUMBER_OR_MACRO = re.compile(r'([\w\-:.+/]+)\s*')
+_BRACES = re.compile(r'[{}]')
+_BRACES_OR_QUOTE = re.compile(r'[{}"]')
+_SEPARATOR = re.compile(r'\s*(#|,|[})])\s*')
+_CLOSERS = {'}': re.compile(r'\s*\}'), ')': re.compile(r'\s*\)')}
+
+#: LaTeX accent commands and the unicode combining characters they stand for
+_ACCENTS = {'`': '\u0300', "'": '\u0301', '^': '\u0302', '"': '\u0308', '~': '\u0303', '=': '\u0304', '.': '\u0307', 'u': '\u0306', 'v': '\u030c', 'H': '\u030b', 'c': '\u0327', 'k': '\u0328'}
+_ACCENT = re.compile(r'\\([`\'^"~=.]|[uvHck](?![A-Za-z]))\s*\{?\s*(\\?[A-Za-z])\s*\}?')
+_LATEX_SYMBOLS = {r'\&': '&', r'\%': '%', r'\$': '$', r'\_': '_', r'\#': '#', r'\ss': 'ß', r'\o': 'ø', r'\O': 'Ø', r'\ae': 'æ', r'\AE': 'Æ', r'\l': 'ł', r'\L': 'Ł', '~': ' ', '---': '—', '--': '–'}
+_LATEX_SYMBOL = re.compile('|'.join(re.escape(symbol) for symbol in sorted(_LATEX_SYMBOLS, key=len, reverse=True)))
+_LATEX_COMMAND = re.compile(r'\\[A-Za-z]+\*?\s*')
+_DOI = re.compile(r'10\.\d{4,9}/\S+')
+_NON_WORD = re.compile(r'[\W_]+')
+
+def parse_bibtex(text:str, strict:bool=False):
+    """Parse BibTeX text into flat records
+
+    Handles braced and quoted values, numbers, `@string` macros (including the predefined month macros), `#` concatenation,
+    and entries delimited by parentheses. `@comment` and `@preamble` blocks are skipped.
+
+    Args:
+        text (str): BibTeX text holding any number of entries.
+        strict (bool, optional): True raises on malformed entries. Defaults to False, which skips them.
+
+    Returns:
+        list: One dict per entry: 'entry_type' (lower case), 'key' (the citation key), and one item per field, with lower-case field names and LaTeX markup removed.
+            If the entry has an `author` field, 'authors' holds a list of dicts with 'first', 'middle', and 'last' keys (the name parts that `src.pyEML.citations` uses).
+
+    Raises:
+        ValueError: `strict` is True and an entry is malformed.
+
+    Examples:
+        records = parse_bibtex('@article{Person2021, title={A {B}ig title}, author="Person, Ann and Bob Smith", year=2021}')
+    """
+    macros = dict(_MONTHS)
+    records = []
+    position = 0
+    while True:
+        match = _ENTRY.search(text, position)
+        if match is None:
+            return records
+        entry_type = match.group(1).lower()
+        closer = '}' if match.group(2) == '{' else ')'
+        following = _NEXT_ENTRY.search(text, match.end())
+        end = following.start() + 1 if following is not None else len(text)
+        try:
+            if entry_type in ('comment', 'preamble'):
+                position = _skip_block(text, match.end(), closer, end)
+                continue
+            if entry_type == 'string':
+                fields, position = _read_fields(text, match.end(), closer, macros, end)
+                macros.update(fields)
+                continue
+            key = _KEY.match(text, match.end(), end)
+            if key is None:
+                raise ValueError(f'No citation key after "{match.group(0)}".')
+            fields, position = _read_fields(text, key.end(), closer, macros, end)
+        except ValueError as e:
+            if strict:
+                raise ValueError(f'Malformed BibTeX entry at character {match.start()}: {e}')
+            position = match.end() # skip to the next entry
+            continue
+        record = {'entry_type': entry_type, 'key': key.group(1)}
+        for name, value in fields.items():
+            record[name] = clean_latex(value)
+        if 'author' in fields:
+            record['authors'] = split_authors(fields['author'])
+        records.append(record)
+
+def _read_fields(text:str, position:int, closer:str, macros:dict, end:int):
+    """Read `name = value` pairs up to the entry's closing delimiter, which must come before `end`; returns the raw (un-cleaned) values and the position after the entry"""
+    fields = {}
+    while True:
+        close = _CLOSERS[closer].match(text, position, end)
+        if close is not None:
+            return fields, close.end()
+        name = _FIELD_NAME.match(text, position, end)
+        if name is None:
+            raise ValueError(f'Expected a field name at character {position}.')
+        pieces = []
+        position = name.end()
+        while True:
+            value, position = _read_value(text, position, macros, end)
+            pieces.append(value)
+            separator = _SEPARATOR.match(text, position, end)
+            if separator is None:
+                raise ValueError(f'Expected ",", "#", or "{closer}" at character {position}.')
+            if separator.group(1) == '#':
+                position = separator.end()
+                continue
+            if separator.group(1) == ',':
+                position = separator.end()
+            elif separator.group(1) != closer:
+                raise ValueError(f'Unexpected "{separator.group(1)}" at character {position}.')
+            break
+        fields[name.group(1).lower()] = ''.join(pieces)
+
+def _read_value(text:str, position:int, macros:dict, end:int):
+    """Read one braced, quoted, numeric, or macro value; returns its raw text and the position after it"""
+    if position >= end:
+        raise ValueError('Unexpected end of entry.')
+    if text[position] == '{':
+        close = _matching_brace(text, position, end)
+        return text[position + 1:close], close + 1
+    if text[position] == '"':
+        depth = 0
+        for token in _BRACES_OR_QUOTE.finditer(text, position + 1, end):
+            char = token.group(0)
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+            elif depth == 0:
+                return text[position + 1:token.start()], token.end()
+        raise ValueError(f'Unterminated quoted value at character {position}.')
+    word = _NUMBER_OR_MACRO.match(text, position, end)
+    if word is None:
+        raise ValueError(f'Expected a value at character {position}.')
+    value = word.group(1)
+    if not value.isdigit():
+        value = macros.get(value.lower(), value)
+    return value, word.end()
+
+def _matching_brace(text:str, position:int, end:int):
+    """The index of the brace that closes the one at `position`"""
+    depth = 0
+    for token in _BRACES.finditer(text, position, end):
+        depth += 1 if token.group(0) == '{' else -1
+        if depth == 0:
+            return token.start()
+    raise ValueError(f'Unbalanced braces from character {position}.')
+
+def _skip_block(text:str, position:int, closer:str, end:int):
+    """The position after an `@comment` or `@preamble` block"""
+    if closer == '}':
+        return _matching_brace(text, position - 1, end) + 1
+    close = text.find(')', position, end)
+    if close == -1:
+        raise ValueError('Unterminated block.')
+    return close + 1
+
+def clean_latex(value:str):
+    """Remove LaTeX markup from a BibTeX value: accents become unicode, escaped symbols become plain text, commands and braces are dropped, whitespace is collapsed
+
+    Args:
+        value (str): A raw BibTeX value. E.g., "{\\'E}cologie des {F}or\\^ets".
+
+    Returns:
+        str: Plain text. E.g., "Écologie des Forêts".
+    """
+    if '\\' in value:
+        value = _ACCENT.sub(lambda m: unicodedata.normalize('NFC', m.group(2).lstrip('\\') + _ACCENTS[m.group(1)]), value)
+    value = _LATEX_SYMBOL.sub(lambda m: _LATEX_SYMBOLS[m.group(0)], value)
+    if '\\' in value:
+        value = _LATEX_COMMAND.sub('', value)
+    return ' '.join(value.replace('{', '').replace('}', '').split())
+
+def split_authors(value:str):
+    """Split a BibTeX `author` (or `editor`) value into names
+
+    Names are separated by "and" outside braces. "Last, First Middle", "Last, Jr, First", and "First Middle Last" forms are understood;
+    a braced name (e.g., "{National Park Service}") is one last name.
+
+    Args:
+        value (str): The raw field value.
+
+    Returns:
+        list: One dict per name with 'first', 'middle', and 'last' keys; missing parts are left out.
+    """
+    names = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(value): # split on " and " at brace depth 0
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        elif depth == 0 and value[i:i + 5].lower() == ' and ' and (i == 0 or value[i - 1] != '\\'):
+            names.append(value[start:i])
+            start = i + 5
+    names.append(value[start:])
+
+    authors = []
+    for name in names:
+        parts = [clean_latex(part) for part in name.split(',')] if ',' in _strip_braced(name) else None
+        if parts is not None: # Last, First or Last, Jr, First
+            given = parts[-1].split() if len(parts) > 1 else []
+            author = {'last': parts[0]}
+        else:
+            words = _split_words(name)
+            if len(words) == 0:
+                continue
+            author = {'last': words[-1]}
+            given = words[:-1]
+        if len(given) > 0:
+            author['first'] = given[0]
+        if len(given) > 1:
+            author['middle'] = ' '.join(given[1:])
+        if author['last'] != '':
+            authors.append(author)
+    return authors
+
+def _strip_braced(text:str):
+    """`text` with braced groups removed, so that commas inside braces aren't read as name separators"""
+    while '{' in text:
+        stripped = re.sub(r'\{[^{}]*\}', '', text)
+        if stripped == text:
+            break
+        text = stripped
+    return text
+
+def _split_words(name:str):
+    """Whitespace-separated words of a name, keeping braced groups whole"""
+    words = []
+    depth = 0
+    word = ''
+    for char in name.strip():
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        if char.isspace() and depth == 0:
+            if word:
+                words.append(clean_latex(word))
+            word = ''
+        else:
+            word += char
+    if word:
+        words.append(clean_latex(word))
+    return [word for word in words if word != '']
+
+def normalize_doi(value:str):
+    """Normalize a DOI, DOI url, or "doi:" string to its bare, lower-case form
+
+    Args:
+        value (str): E.g., "https://doi.org/10.57830/2295086" or "DOI: 10.57830/2295086".
+
+    Returns:
+        str: E.g., "10.57830/2295086". None if `value` holds no DOI.
+    """
+    if not value:
+        return None
+    match = _DOI.search(value)
+    if match is None:
+        return None
+    return match.group(0).rstrip('.,;').lower()
+
+def normalize_title(value:str):
+    """Normalize a title for matching: accents removed, case folded, punctuation and whitespace collapsed
+
+    Args:
+        value (str): A title. E.g., "The {Forest} Pathogens: A Review".
+
+    Returns:
+        str: E.g., "the forest pathogens a review".
+    """
+    value = clean_latex(value or '')
+    if not value.isascii():
+        value = ''.join(char for char in unicodedata.normalize('NFKD', value) if not unicodedata.combining(char))
+    return _NON_WORD.sub(' ', value.casefold()).strip()
+
+def reference_key(record:dict):
+    """The key that identifies a reference across packages: its DOI, or its normalized title and year
+
+    Args:
+        record (dict): A record from `parse_bibtex()`.
+
+    Returns:
+        str: "doi:<doi>" or "title:<normalized title>|<year>". None if the record has neither a DOI nor a title.
+    """
+    doi = normalize_doi(record.get('doi')) or normalize_doi(record.get('url'))
+    if doi is not None:
+        return 'doi:' + doi
+    return _title_key(record)
+
+def _title_key(record:dict):
+    title = normalize_title(record.get('title'))
+    if title == '':
+        return None
+    return f'title:{title}|{record.get("year", "").strip()}'
+
+def deduplicate(records:list):
+    """Merge records that describe the same reference
+
+    Args:
+        records (list): Records from `parse_bibtex()`.
+
+    Returns:
+        list: One record per reference, in order of first appearance. A merged record keeps the first record's values and takes fields it lacks from its duplicates.
+            Records with neither a DOI nor a title follow, as they are.
+
+    Examples:
+        unique = deduplicate(parse_bibtex(bibtex_text))
+    """
+    index = ReferenceIndex()
+    index.add('', records)
+    return index.references('') + [record for record in records if reference_key(record) is None]
+
+class ReferenceIndex():
+    """A corpus-wide index of cited references, deduplicated by DOI or normalized title and year"""
+
+    def __init__(self):
+        """Constructor for class ReferenceIndex"""
+        self._records = {} # reference key: merged record
+        self._citing = {} # reference key: set of packageIds that cite it
+        self._cited = {} # packageId: list of reference keys it cites, in order
+        self._aliases = {} # title key of a reference that has a DOI: its DOI key
+        self._alias_keys = {} # DOI key: set of title keys that point to it
+        self._titles = {} # normalized title: set of reference keys
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, package_id:str, records:list):
+        """Index one package's references, replacing any it had before
+
+        Args:
+            package_id (str): The citing package's packageId.
+            records (list): Records from `parse_bibtex()`.
+
+        Returns:
+            list: The reference keys of `records` that could be indexed.
+        """
+        self.remove(package_id)
+        keys = []
+        self._cited[package_id] = keys # registered first: merging a DOI record can move one of this package's title-keyed references under it (see `_absorb()`)
+        for record in records:
+            key = self._merge(record)
+            if key is not None and key not in keys:
+                keys.append(key)
+                self._citing.setdefault(key, set()).add(package_id)
+        return list(keys)
+
+    def add_emld(self, emld, package_id:str=None):
+        """Index the BibTeX in an `Emld`'s `literatureCited`
+
+        Args:
+            emld (Emld): The citing document.
+            package_id (str, optional): Defaults to the document's `packageId` attribute.
+
+        Returns:
+            list: The reference keys that were indexed.
+        """
+        if package_id is None:
+            package_id = emld.root.get('packageId')
+        return self.add(package_id, lit_cited_records(emld.root))
+
+    def remove(self, package_id:str):
+        """Forget one package's references; references no other package cites are dropped
+
+        Args:
+            package_id (str): The package's packageId.
+        """
+        for key in self._cited.pop(package_id, []):
+            citing = self._citing.get(key)
+            if citing is None:
+                continue
+            citing.discard(package_id)
+            if len(citing) == 0:
+                self._drop(key)
+
+    def cited_by(self, doi:str=None, title:str=None, year:str=None):
+        """Find the packages that cite a reference
+
+        Args:
+            doi (str, optional): The reference's DOI, in any form `normalize_doi()` understands.
+            title (str, optional): The reference's title; matched after `normalize_title()`. Used when `doi` isn't given.
+            year (str, optional): Narrows a `title` match to one year. Defaults to None (any year).
+
+        Returns:
+            list: Sorted packageIds.
+
+        Examples:
+            myindex.cited_by(doi='https://doi.org/10.1000/xyz123')
+            myindex.cited_by(title='Forest pathogens of the Blue Ridge', year='2019')
+        """
+        packages = set()
+        for key in self._find(doi=doi, title=title, year=year):
+            packages.update(self._citing.get(key, ()))
+        return sorted(packages)
+
+    def lookup(self, doi:str=None, title:str=None, year:str=None):
+        """Find the merged records of a reference
+
+        Args:
+            doi, title, year: As in `cited_by()`.
+
+        Returns:
+            list: Matching records (one, for a DOI).
+        """
+        return [self._records[key] for key in self._find(doi=doi, title=title, year=year)]
+
+    def references(self, package_id:str=None):
+        """Get deduplicated references
+
+        Args:
+            package_id (str, optional): Only the references that this package cites. Defaults to None (every reference in the index).
+
+        Returns:
+            list: Merged records.
+        """
+        keys = self._records.keys() if package_id is None else self._cited.get(package_id, [])
+        return [self._records[key] for key in keys]
+
+    def most_cited(self, n:int=10):
+        """Get the references cited by the most packages
+
+        Args:
+            n (int, optional): How many to return. Defaults to 10.
+
+        Returns:
+            list: (record, count of citing packages) tuples, most cited first.
+        """
+        ranked = sorted(self._citing.items(), key=lambda item: (-len(item[1]), item[0]))[:n]
+        return [(self._records[key], len(citing)) for key, citing in ranked]
+
+    def _find(self, doi:str=None, title:str=None, year:str=None):
+        if doi is not None:
+            key = normalize_doi(doi)
+            return ['doi:' + key] if key is not None and 'doi:' + key in self._records else []
+        keys = self._titles.get(normalize_title(title), set())
+        if year is not None:
+            keys = [key for key in keys if str(self._records[key].get('year', '')).strip() == str(year).strip()]
+        return sorted(keys)
+
+    def _merge(self, record:dict):
+        """Add a record to the index, merging it with any record of the same reference; returns its reference key"""
+        key = reference_key(record)
+        if key is None:
+            return None
+        title_key = _title_key(record)
+        if not key.startswith('doi:'):
+            key = self._aliases.get(key, key) # the same title and year was indexed with a DOI
+        elif title_key is not None:
+            self._aliases[title_key] = key
+            self._alias_keys.setdefault(key, set()).add(title_key)
+            if title_key in self._records: # it was indexed by title before its DOI was seen; move it under the DOI
+                self._absorb(title_key, key)
+        merged = self._records.get(key)
+        if merged is None:
+            self._records[key] = dict(record)
+            title = normalize_title(record.get('title'))
+            if title != '':
+                self._titles.setdefault(title, set()).add(key)
+        else:
+            for field, value in record.items():
+                merged.setdefault(field, value)
+        return key
+
+    def _absorb(self, old_key:str, new_key:str):
+        """Move a title-keyed reference under its DOI key"""
+        record = self._records.get(new_key)
+        old = self._drop(old_key)
+        if record is None:
+            self._records[new_key] = old['record']
+            title = normalize_title(old['record'].get('title'))
+            if title != '':
+                self._titles.setdefault(title, set()).add(new_key)
+        else:
+            for field, value in old['record'].items():
+                record.setdefault(field, value)
+        citing = old['citing']
+        self._citing.setdefault(new_key, set()).update(citing)
+        for package_id in citing:
+            keys = self._cited[package_id]
+            if new_key in keys:
+                keys.remove(old_key)
+            else:
+                keys[keys.index(old_key)] = new_key
+
+    def _drop(self, key:str):
+        record = self._records.pop(key)
+        citing = self._citing.pop(key, set())
+        title = normalize_title(record.get('title'))
+        if title in self._titles:
+            self._titles[title].discard(key)
+            if len(self._titles[title]) == 0:
+                del self._titles[title]
+        for title_key in self._alias_keys.pop(key, ()):
+            if self._aliases.get(title_key) == key:
+                del self._aliases[title_key]
+        return {'record': record, 'citing': citing}
+
+def lit_cited_records(root:etree._Element):
+    """Parse every `literatureCited/bibtex` string of an EML document
+
+    Args:
+        root (lxml.etree._Element): The EML root element (e.g., `myemld.root`).
+
+    Returns:
+        list: Records from `parse_bibtex()`, in document order.
+    """
+    records = []
+    for node in root.findall(_BIBTEX_XPATH):
+        if node.text:
+            records += parse_bibtex(node.text)
+    return records
+
+def read_lit_cited(filepath:str):
+    """Read one EML-formatted xml file's packageId and cited references
+
+    Only the root element and the `literatureCited` nodes matter, so the file is parsed without building an `Emld`.
+
+    Args:
+        filepath (str): Filepath and name of an EML-formatted xml file.
+
+    Returns:
+        tuple: (packageId, list of records). The packageId falls back to `filepath` if the root has none.
+    """
+    root = etree.parse(filepath).getroot()
+    return root.get('packageId') or filepath, lit_cited_records(root)
+
+def index_corpus(filepaths, max_workers:int=None, index:ReferenceIndex=None):
+    """Build a `ReferenceIndex` from the `literatureCited` of many EML-formatted xml files
+
+    Files are parsed in a pool of worker processes, as in `src.pyEML.summary.summarize_corpus()`.
+
+    Args:
+        filepaths (str or list): A directory (every .xml file under it, at any depth), or a list of .xml filepaths. See `src.pyEML.parallel.xml_filepaths()`.
+        max_workers (int, optional): The number of worker processes. 1 runs in the current process. Defaults to `os.cpu_count()`.
+        index (ReferenceIndex, optional): An index to update; each file's package replaces its earlier references. Defaults to None, which builds a new index.
+
+    Returns:
+        ReferenceIndex: The index.
+
+    Examples:
+        myindex = index_corpus('data/')
+        myindex.cited_by(doi='10.1000/xyz123')
+    """
+    try:
+        results = map_files(xml_filepaths(filepaths), read_lit_cited, max_workers)
+        if index is None:
+            index = ReferenceIndex()
+        for package_id, records in results:
+            index.add(package_id, records)
+        return index
+
+    except AssertionError as a:
+        print(a)
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
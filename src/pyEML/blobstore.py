@@ -0,0 +1,217 @@
+"""Python source module for spilling oversized xml text to disk
+
+`blobstore.py` lets an `Emld` keep very large text nodes (e.g., a multi-MB `abstract/para`, `methods`,
+or `literatureCited/bibtex`) on disk instead of in memory. At load time, each text node longer than a
+threshold is written to a content-addressed `BlobStore` and replaced in the element tree by a short
+placeholder. The text is read back from disk the first time its element's `.text` is accessed, and
+`write_blobs_to_file()` streams blobs straight from disk into the output xml.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import uuid
+import weakref
+import lxml.etree as etree
+
+#: `PLACEHOLDER_PREFIX` starts the text that replaces a spilled text node: f'{PLACEHOLDER_PREFIX}{store token}/{sha256 of text}'
+PLACEHOLDER_PREFIX = 'pyEML-blob:'
+_PLACEHOLDER_PATTERN = re.compile(re.escape(PLACEHOLDER_PREFIX).encode('ascii') + rb'([0-9a-f]{32})/([0-9a-f]{64})')
+#: every live `BlobStore`, keyed by its token, so that a `SpillElement` can find the store that holds its text
+_STORES = weakref.WeakValueDictionary()
+#: characters per read when streaming a blob into an output file
+_CHUNK_SIZE = 1 << 20
+
+class BlobStore():
+    """A directory of content-addressed text blobs"""
+
+    def __init__(self, directory:str=None):
+        """Constructor for class BlobStore
+
+        Args:
+            directory (str, optional): Where blobs are saved. Defaults to None, which creates a temporary directory that is removed when the `BlobStore` is garbage-collected.
+
+        Attributes:
+            directory (str): Where blobs are saved.
+            token (str): A unique id for this store; embedded in each placeholder.
+            spilled (int): The number of text nodes this store has spilled.
+        """
+        self._tempdir = None
+        if directory is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix='pyEML_blobs_')
+            directory = self._tempdir.name
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.token = uuid.uuid4().hex
+        self.spilled = 0
+        _STORES[self.token] = self
+
+    def put(self, text:str):
+        """Save `text` as a blob and return its placeholder
+
+        Args:
+            text (str): The text to save.
+
+        Returns:
+            str: The placeholder that stands in for `text` in the element tree.
+        """
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        filename = self._filename(digest)
+        if not os.path.exists(filename): # identical text is only saved once
+            tmp_filename = filename + '.tmp'
+            with open(tmp_filename, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+            os.replace(tmp_filename, filename)
+        self.spilled += 1
+        return f'{PLACEHOLDER_PREFIX}{self.token}/{digest}'
+
+    def get(self, digest:str):
+        """Read a whole blob back into memory
+
+        Args:
+            digest (str): The sha256 hex digest of the blob.
+
+        Returns:
+            str: The blob's text.
+        """
+        with open(self._filename(digest), 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+
+    def iter_chunks(self, digest:str, chunk_size:int=_CHUNK_SIZE):
+        """Read a blob in pieces without holding all of it in memory
+
+        Args:
+            digest (str): The sha256 hex digest of the blob.
+            chunk_size (int, optional): Characters per piece. Defaults to 1 MiB.
+
+        Yields:
+            str: The next piece of the blob's text.
+        """
+        with open(self._filename(digest), 'r', encoding='utf-8', newline='') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def _filename(self, digest:str):
+        return os.path.join(self.directory, digest + '.txt')
+
+class SpillElement(etree.ElementBase):
+    """An lxml element whose `.text` transparently loads spilled text back from its `BlobStore` on first access"""
+
+    @property
+    def text(self):
+        value = etree.ElementBase.text.__get__(self)
+        if value is not None and value.startswith(PLACEHOLDER_PREFIX):
+            store, digest = _resolve(value)
+            if store is not None:
+                value = store.get(digest)
+                etree.ElementBase.text.__set__(self, value) # keep the text resident from now on
+        return value
+
+    @text.setter
+    def text(self, value):
+        etree.ElementBase.text.__set__(self, value)
+
+def make_root(tag:str, attrib:dict, nsmap:dict):
+    """Create the root element of a new document whose elements are `SpillElement`s
+
+    Use this, rather than `etree.Element()`, to build a new tree that may hold placeholders (e.g., in `Emld.subset()`).
+
+    Args:
+        tag (str): The root's tag.
+        attrib (dict): The root's attributes.
+        nsmap (dict): The root's namespace map.
+
+    Returns:
+        SpillElement: The new root element.
+    """
+    parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+    parser.set_element_class_lookup(etree.ElementDefaultClassLookup(element=SpillElement))
+    return parser.makeelement(tag, attrib, nsmap=nsmap)
+
+def parse_and_spill(filepath:str, store:BlobStore, threshold:int):
+    """Parse an xml file and move every text node longer than `threshold` characters into `store`
+
+    Parsing is incremental, so each oversized text node is spilled as soon as its element closes
+    rather than after the whole document is in memory.
+
+    Args:
+        filepath (str): Filepath and name for the source-xml.
+        store (BlobStore): Where oversized text is saved.
+        threshold (int): Text nodes longer than `threshold` characters are spilled.
+
+    Returns:
+        lxml.etree._ElementTree: The parsed element tree, built from `SpillElement`s.
+    """
+    context = etree.iterparse(filepath, events=('end',), remove_blank_text=True, huge_tree=True)
+    context.set_element_class_lookup(etree.ElementDefaultClassLookup(element=SpillElement))
+    for event, elm in context:
+        text = etree.ElementBase.text.__get__(elm)
+        if text is not None and len(text) > threshold:
+            etree.ElementBase.text.__set__(elm, store.put(text))
+    return context.root.getroottree()
+
+def write_blobs_to_file(xml:bytes, filename:str):
+    """Write serialized xml to `filename`, streaming each spilled blob from disk in place of its placeholder
+
+    Args:
+        xml (bytes): UTF-8 serialized xml that may contain placeholders.
+        filename (str): The output filename and filepath.
+    """
+    with open(filename, 'wb') as f:
+        write_blobs(xml=xml, f=f)
+
+def write_blobs(xml:bytes, f):
+    """Write serialized xml to a binary file object, streaming each spilled blob from disk in place of its placeholder
+
+    Args:
+        xml (bytes): UTF-8 serialized xml that may contain placeholders.
+        f (file object): A file object opened for writing bytes (e.g., `open(filename, 'wb')` or `io.BytesIO()`).
+    """
+    position = 0
+    for match in _PLACEHOLDER_PATTERN.finditer(xml):
+        store = _STORES.get(match.group(1).decode('ascii'))
+        if store is None: # the store is gone; leave the placeholder as-is
+            continue
+        f.write(xml[position:match.start()])
+        for chunk in store.iter_chunks(match.group(2).decode('ascii')):
+            f.write(_escape(chunk).encode('utf-8'))
+        position = match.end()
+    f.write(xml[position:])
+
+def _resolve(placeholder:str):
+    """Split a placeholder into its `BlobStore` (None if that store no longer exists) and blob digest"""
+    token, _, digest = placeholder[len(PLACEHOLDER_PREFIX):].partition('/')
+    return _STORES.get(token), digest
+
+def _escape(text:str):
+    """Escape text for an xml text node the same way libxml2 does"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('\r', '&#13;')
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
@@ -0,0 +1,454 @@
+"""Python source module for a queryable SQLite catalog of many EML documents
+
+`catalog.py` holds `EmlCatalog`, a local SQLite file with one row per document (packageId, title, publication date,
+temporal extent, CUI, license, DOI) and child tables of its creators, keywords, and bounding boxes. Documents are
+parsed in a pool of worker processes and written by the parent in `executemany` batches of
+`src.pyEML.constants.CATALOG_BATCH_SIZE` rows, inside one transaction, through the connection's cache of
+prepared statements. The database runs in write-ahead-log mode, so queries keep reading the previous catalog
+while a rebuild is being written. Once built, `EmlCatalog.find()` and `EmlCatalog.get()` answer questions about
+the corpus from the catalog's indexes without re-parsing any xml.
+
+    python -m src.pyEML.catalog catalog.sqlite rebuild data/
+    python -m src.pyEML.catalog catalog.sqlite info
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+from datetime import date
+import numbers
+import os
+import sqlite3
+import lxml.etree as etree
+from src.pyEML.corpus import hash_bytes
+from src.pyEML.emld import Emld
+from src.pyEML.parallel import map_files, xml_filepaths
+from src.pyEML.summary import summarize_emld
+from src.pyEML.temporal import date_bounds, temporal_ranges
+from src.pyEML.utils import split_antimeridian
+from src.pyEML.error_classes import bcolors
+from src.pyEML.constants import CATALOG_BATCH_SIZE, CATALOG_VERSION, LICENSE_TEXT, LOOKUPS, SUMMARY_DATE_FORMATS
+
+#: the license key of each `LICENSE_TEXT` paragraph, compared with inner whitespace collapsed
+_LICENSES = {' '.join(text.split()): license for license, text in LICENSE_TEXT.items()}
+
+#: table definitions; child rows go with their package (`PRAGMA foreign_keys` is on for every connection)
+_TABLES = (
+    'CREATE TABLE IF NOT EXISTS packages (id INTEGER PRIMARY KEY, filepath TEXT UNIQUE NOT NULL, hash TEXT, package_id TEXT, title TEXT, pub_date TEXT, begin_date TEXT, end_date TEXT, cui TEXT, license TEXT, rights TEXT, doi TEXT)',
+    'CREATE TABLE IF NOT EXISTS creators (package INTEGER NOT NULL REFERENCES packages (id) ON DELETE CASCADE, position INTEGER, given_name TEXT, sur_name TEXT, organization TEXT, email TEXT)',
+    'CREATE TABLE IF NOT EXISTS keywords (package INTEGER NOT NULL REFERENCES packages (id) ON DELETE CASCADE, keyword TEXT, thesaurus TEXT)',
+    'CREATE TABLE IF NOT EXISTS boxes (package INTEGER NOT NULL REFERENCES packages (id) ON DELETE CASCADE, box INTEGER, west REAL, east REAL, north REAL, south REAL)'
+)
+#: secondary indexes; `rebuild()` creates them after the bulk insert, which is faster than maintaining them row by row
+_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS packages_package_id ON packages (package_id)',
+    'CREATE INDEX IF NOT EXISTS packages_dates ON packages (begin_date, end_date)',
+    'CREATE INDEX IF NOT EXISTS packages_cui ON packages (cui)',
+    'CREATE INDEX IF NOT EXISTS packages_license ON packages (license)',
+    'CREATE INDEX IF NOT EXISTS creators_package ON creators (package)',
+    'CREATE INDEX IF NOT EXISTS creators_sur_name ON creators (sur_name COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS creators_organization ON creators (organization COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS keywords_keyword ON keywords (keyword COLLATE NOCASE, package)',
+    'CREATE INDEX IF NOT EXISTS keywords_package ON keywords (package)',
+    'CREATE INDEX IF NOT EXISTS boxes_package ON boxes (package)',
+    'CREATE INDEX IF NOT EXISTS boxes_west_east ON boxes (west, east)'
+)
+_INSERT_PACKAGE = 'INSERT INTO packages (id, filepath, hash, package_id, title, pub_date, begin_date, end_date, cui, license, rights, doi) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+_INSERT_CREATOR = 'INSERT INTO creators (package, position, given_name, sur_name, organization, email) VALUES (?, ?, ?, ?, ?, ?)'
+_INSERT_KEYWORD = 'INSERT INTO keywords (package, keyword, thesaurus) VALUES (?, ?, ?)'
+_INSERT_BOX = 'INSERT INTO boxes (package, box, west, east, north, south) VALUES (?, ?, ?, ?, ?, ?)'
+_PACKAGE_COLUMNS = ('filepath', 'hash', 'package_id', 'title', 'pub_date', 'begin_date', 'end_date', 'cui', 'license', 'rights', 'doi')
+
+def catalog_file(filepath:str):
+    """Parse one EML-formatted xml file and extract its catalog record
+
+    Args:
+        filepath (str): Filepath and name of an EML-formatted xml file.
+
+    Returns:
+        tuple: (filepath, record, error). `record` is a dict with the `packages` columns and lists of 'creators' ((given name, surname, organization, email) tuples),
+            'keywords' ((keyword, thesaurus title or None) tuples), and 'boxes' ((west, east, north, south) tuples). Dates are ISO text.
+            If the file can't be read or isn't well-formed xml, `record` is None and `error` says why.
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            data = f.read()
+        parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+        tree = etree.fromstring(data, parser).getroottree()
+    except (OSError, etree.XMLSyntaxError) as e:
+        return filepath, None, str(e)
+    root = tree.getroot()
+    row = summarize_emld(Emld._from_tree(tree=tree, xml_src=filepath, interactive=False), filepath=filepath)
+    record = {column: row.get(column) for column in _PACKAGE_COLUMNS}
+    record['hash'] = hash_bytes(data)
+    if row['pub_date'] is not None:
+        record['pub_date'] = row['pub_date'].date().isoformat()
+    ranges = temporal_ranges(root) # year- and month-precision dates cover the whole period, as in `src.pyEML.temporal.TemporalIndex`
+    if ranges:
+        record['begin_date'] = date.fromordinal(min(first for first, _ in ranges)).isoformat()
+        record['end_date'] = date.fromordinal(max(last for _, last in ranges)).isoformat()
+    rights = root.find(LOOKUPS['int_rights']['node_xpath'])
+    if rights is not None:
+        record['rights'] = ' '.join(''.join(rights.itertext()).split()) or None
+        record['license'] = _LICENSES.get(record['rights'])
+    record['creators'] = [
+        tuple(_text(creator, xpath) for xpath in ('individualName/givenName', 'individualName/surName', 'organizationName', 'electronicMailAddress'))
+        for creator in root.iterfind(LOOKUPS['creator']['node_xpath'])
+        ]
+    record['keywords'] = []
+    for keyword_set in root.iterfind(LOOKUPS['keywords']['node_xpath']):
+        thesaurus = _text(keyword_set, 'keywordThesaurus')
+        for elm in keyword_set.iterfind('keyword'):
+            keyword = ' '.join((elm.text or '').split())
+            if keyword != '':
+                record['keywords'].append((keyword, thesaurus))
+    record['boxes'] = [tuple(box) for box in row['bounding_boxes']]
+    return filepath, record, None
+
+def _text(node, xpath:str):
+    """Return the whitespace-collapsed text at `xpath` under `node`, or None"""
+    text = ' '.join((node.findtext(xpath) or '').split())
+    return text if text != '' else None
+
+class EmlCatalog():
+    """A SQLite catalog of the metadata fields of many EML documents"""
+
+    def __init__(self, path:str):
+        """Constructor for class EmlCatalog
+
+        Args:
+            path (str): The SQLite file. Created on first write; a catalog with another `src.pyEML.constants.CATALOG_VERSION` is emptied on first write.
+                A file that isn't SQLite is never overwritten: writes refuse it, and reads find it empty.
+
+        Examples:
+            mycatalog = EmlCatalog('catalog.sqlite')
+            mycatalog.rebuild('data/')
+        """
+        self.path = path
+        self._connection = None
+
+    def __len__(self):
+        if not self._ready():
+            return 0
+        return self._connect().execute('SELECT count(*) FROM packages').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the database connection; the next call reopens it"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def rebuild(self, filepaths, max_workers:int=None):
+        """Replace the catalog with the records of `filepaths`
+
+        Files are parsed in a pool of worker processes; the parent writes their records in batches, in one transaction, so readers
+        see the old catalog until the new one is complete, and an interrupted rebuild leaves the old catalog in place.
+
+        Args:
+            filepaths (str or list): A directory (every .xml file under it, at any depth; directories whose names start with "." are skipped), or a list of .xml filepaths.
+            max_workers (int, optional): The number of worker processes. 1 runs in the current process. Defaults to `os.cpu_count()`.
+
+        Returns:
+            dict: 'packages' (the number of records written) and 'errors' (filepath: message, for files that couldn't be read or parsed).
+
+        Examples:
+            mycatalog.rebuild('data/')
+        """
+        return self._ingest(filepaths, max_workers, replace=True)
+
+    def ingest(self, filepaths, max_workers:int=None):
+        """Add records to the catalog, replacing any records already held for the same filepaths
+
+        Args:
+            filepaths (str or list): A directory or a list of .xml filepaths, as in `rebuild()`.
+            max_workers (int, optional): The number of worker processes. 1 runs in the current process. Defaults to `os.cpu_count()`.
+
+        Returns:
+            dict: 'packages' (the number of records written) and 'errors' (filepath: message, for files that couldn't be read or parsed).
+
+        Examples:
+            mycatalog.ingest(['data/new_package.xml'])
+        """
+        return self._ingest(filepaths, max_workers, replace=False)
+
+    def remove(self, filepaths):
+        """Remove records from the catalog
+
+        Args:
+            filepaths (list): The filepaths of the records, as they were ingested.
+
+        Returns:
+            int: The number of records removed.
+        """
+        if not self._ready():
+            return 0
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            removed = connection.executemany('DELETE FROM packages WHERE filepath = ?', [(os.path.abspath(filepath),) for filepath in filepaths]).rowcount # child rows go by cascade, and aren't counted
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return removed
+
+    def get(self, package_id:str):
+        """Get one package's record
+
+        Args:
+            package_id (str): The packageId.
+
+        Returns:
+            dict: The record's fields (see `catalog_file()`), with 'creators' as dicts and 'boxes' as (west, east, north, south) tuples.
+                If the catalog holds copies of a package, the first by filepath. None if the catalog doesn't hold the package.
+
+        Examples:
+            mycatalog.get('doi:10.57830/2295086')['creators']
+        """
+        if not self._ready():
+            return None
+        connection = self._connect()
+        row = connection.execute(f'SELECT id, {", ".join(_PACKAGE_COLUMNS)} FROM packages WHERE package_id = ? ORDER BY filepath LIMIT 1', (package_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(zip(_PACKAGE_COLUMNS, row[1:]))
+        record['creators'] = [
+            {'given_name': given_name, 'sur_name': sur_name, 'organization': organization, 'email': email}
+            for given_name, sur_name, organization, email in connection.execute('SELECT given_name, sur_name, organization, email FROM creators WHERE package = ? ORDER BY position', (row[0],))
+            ]
+        record['keywords'] = list(connection.execute('SELECT keyword, thesaurus FROM keywords WHERE package = ? ORDER BY rowid', (row[0],)))
+        boxes = {}
+        for box, west, east, north, south in connection.execute('SELECT box, west, east, north, south FROM boxes WHERE package = ? ORDER BY box, west DESC', (row[0],)):
+            if box in boxes: # the western half of a box split at the antimeridian; see `src.pyEML.utils.split_antimeridian()`
+                boxes[box] = (boxes[box][0], east, north, south)
+            else:
+                boxes[box] = (west, east, north, south)
+        record['boxes'] = list(boxes.values())
+        return record
+
+    def find(self, keyword:str=None, creator:str=None, title:str=None, cui:str=None, license:str=None, begin=None, end=None, bbox:tuple=None, limit:int=None):
+        """Find packages whose records match every filter given
+
+        Args:
+            keyword (str, optional): A keyword the package has, compared without regard to case. Defaults to None.
+            creator (str, optional): A creator's surname or organization name, compared without regard to case. Defaults to None.
+            title (str, optional): Text the title contains, compared without regard to case. Defaults to None.
+            cui (str, optional): The package's CUI code. One of `src.pyEML.constants.CUI_CHOICES`. Defaults to None.
+            license (str, optional): The package's license. One of `src.pyEML.constants.LICENSE_TEXT`. Defaults to None.
+            begin, end (str, int, datetime.date, or datetime.datetime, optional): A period the package's temporal extent overlaps. A year or month stands for all of it;
+                either end may be left open. See `src.pyEML.temporal.date_bounds()`. Defaults to None.
+            bbox (tuple, optional): (west, east, north, south), in decimal degrees, an area one of the package's bounding boxes intersects. West may be east of east,
+                for areas that cross the antimeridian. Defaults to None.
+            limit (int, optional): The most results to return. Defaults to None (all).
+
+        Returns:
+            list: (packageId, filepath) tuples, sorted by filepath.
+
+        Examples:
+            mycatalog.find(keyword='vegetation', begin=2010, end=2012)
+            mycatalog.find(creator='Wainright', license='CCzero', bbox=(-77.5, -76.9, 39.1, 38.7))
+        """
+        try:
+            for value in (begin, end):
+                assert value is None or date_bounds(value) is not None, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{value}".\nDates must be a datetime.date, a year, or text in one of these formats: {SUMMARY_DATE_FORMATS}.'
+            assert bbox is None or (len(bbox) == 4 and all(isinstance(x, numbers.Real) for x in bbox)), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {bbox}.\n`bbox` must be a (west, east, north, south) tuple of numbers.'
+            assert license is None or license in LICENSE_TEXT, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{license}".\n`license` must be one of {tuple(LICENSE_TEXT)}.'
+            assert limit is None or (isinstance(limit, int) and limit >= 1), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {limit}.\n`limit` must be an int of at least 1.'
+            if not self._ready():
+                return []
+
+            where = []
+            params = []
+            if keyword is not None:
+                where.append('EXISTS (SELECT 1 FROM keywords k WHERE k.package = p.id AND k.keyword = ? COLLATE NOCASE)')
+                params.append(' '.join(str(keyword).split()))
+            if creator is not None:
+                where.append('EXISTS (SELECT 1 FROM creators c WHERE c.package = p.id AND (c.sur_name = ? COLLATE NOCASE OR c.organization = ? COLLATE NOCASE))')
+                params += [creator.strip(), creator.strip()]
+            if title is not None:
+                where.append("p.title LIKE ? ESCAPE '\\'")
+                params.append('%' + title.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+            if cui is not None:
+                where.append('p.cui = ?')
+                params.append(cui)
+            if license is not None:
+                where.append('p.license = ?')
+                params.append(license)
+            if begin is not None:
+                where.append('p.end_date >= ?')
+                params.append(date.fromordinal(date_bounds(begin)[0]).isoformat())
+            if end is not None:
+                where.append('p.begin_date <= ?')
+                params.append(date.fromordinal(date_bounds(end)[1]).isoformat())
+            if bbox is not None:
+                west, east, north, south = (float(x) for x in bbox) # sqlite3 can only bind python numbers, not e.g. numpy scalars
+                parts = []
+                for min_x, min_y, max_x, max_y in split_antimeridian(west, east, north, south):
+                    parts.append('(b.west <= ? AND b.east >= ? AND b.south <= ? AND b.north >= ?)')
+                    params += [max_x, min_x, max_y, min_y]
+                where.append(f'EXISTS (SELECT 1 FROM boxes b WHERE b.package = p.id AND ({" OR ".join(parts)}))')
+
+            sql = 'SELECT p.package_id, p.filepath FROM packages p'
+            if where:
+                sql += ' WHERE ' + ' AND '.join(where)
+            sql += ' ORDER BY p.filepath'
+            if limit is not None:
+                sql += ' LIMIT ?'
+                params.append(limit)
+            return list(self._connect().execute(sql, params))
+
+        except AssertionError as a:
+            print(a)
+
+    def info(self):
+        """Describe the catalog
+
+        Returns:
+            dict: 'path', 'version' (None if the file doesn't exist or has another schema version), and counts of 'packages', 'creators', 'keywords', and 'boxes'.
+        """
+        info = {'path': self.path, 'version': None, 'packages': 0, 'creators': 0, 'keywords': 0, 'boxes': 0}
+        if self._ready():
+            connection = self._connect()
+            info['version'] = CATALOG_VERSION
+            for table in ('packages', 'creators', 'keywords', 'boxes'):
+                info[table] = connection.execute(f'SELECT count(*) FROM {table}').fetchone()[0]
+        return info
+
+    def _ingest(self, filepaths, max_workers:int, replace:bool):
+        try:
+            filepaths = list(dict.fromkeys(os.path.abspath(filepath) for filepath in xml_filepaths(filepaths))) # a file listed twice (or by relative and absolute path) is cataloged once
+            assert _is_sqlite(self.path), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}"{self.path}" is not a SQLite file.\nChoose a new path for the catalog, or remove the file.'
+            return self._write(map_files(filepaths, catalog_file, max_workers), replace) # records are written as they arrive, a batch at a time
+
+        except AssertionError as a:
+            print(a)
+
+    def _write(self, results, replace:bool):
+        """Write `catalog_file()` results in `CATALOG_BATCH_SIZE` batches, in one transaction"""
+        directory = os.path.dirname(self.path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        counts = {'packages': 0, 'errors': {}}
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._create(connection, drop=replace) # a rebuild bulk-loads into bare tables, then indexes them
+            next_id = connection.execute('SELECT coalesce(max(id), 0) + 1 FROM packages').fetchone()[0] # ids are assigned here, so child rows can go in with `executemany` too
+            batch = []
+            for filepath, record, error in results:
+                if record is None:
+                    counts['errors'][filepath] = error
+                    continue
+                batch.append((next_id, record))
+                next_id += 1
+                if len(batch) == CATALOG_BATCH_SIZE:
+                    self._insert(connection, batch, replace)
+                    counts['packages'] += len(batch)
+                    batch = []
+            if batch:
+                self._insert(connection, batch, replace)
+                counts['packages'] += len(batch)
+            for sql in _INDEXES:
+                connection.execute(sql)
+            if replace:
+                connection.execute('ANALYZE')
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return counts
+
+    def _insert(self, connection, batch:list, replace:bool):
+        if not replace:
+            connection.executemany('DELETE FROM packages WHERE filepath = ?', [(record['filepath'],) for _, record in batch])
+        connection.executemany(_INSERT_PACKAGE, [(package,) + tuple(record[column] for column in _PACKAGE_COLUMNS) for package, record in batch])
+        connection.executemany(_INSERT_CREATOR, [(package, position) + creator for package, record in batch for position, creator in enumerate(record['creators'])])
+        connection.executemany(_INSERT_KEYWORD, [(package,) + keyword for package, record in batch for keyword in record['keywords']])
+        connection.executemany(_INSERT_BOX, [
+            (package, i, min_x, max_x, max_y, min_y)
+            for package, record in batch for i, box in enumerate(record['boxes']) for min_x, min_y, max_x, max_y in split_antimeridian(*box)
+            ])
+
+    def _connect(self):
+        """Open the connection once: autocommit (transactions are explicit), write-ahead log, and cascading deletes"""
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None, cached_statements=256)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL') # with WAL, a crash can lose the last commits but can't corrupt the file
+            connection.execute('PRAGMA foreign_keys = ON')
+            self._connection = connection
+        return self._connection
+
+    def _ready(self):
+        """True if the file exists and was written with this `CATALOG_VERSION`"""
+        if not os.path.exists(self.path) or not _is_sqlite(self.path):
+            return False
+        try:
+            version = self._connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.DatabaseError: # not a catalog, or a catalog without a meta table
+            return False
+        return version is not None and version[0] == str(CATALOG_VERSION)
+
+    def _create(self, connection, drop:bool):
+        """Create the tables, discarding any rows written under another schema version, or all rows if `drop`"""
+        connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        version = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if drop or (version is not None and version[0] != str(CATALOG_VERSION)):
+            for table in ('boxes', 'keywords', 'creators', 'packages'):
+                connection.execute(f'DROP TABLE IF EXISTS {table}')
+        for sql in _TABLES:
+            connection.execute(sql)
+        connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(CATALOG_VERSION),))
+
+def _is_sqlite(path:str):
+    """True if `path` doesn't exist, is empty, or starts with the SQLite file header"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(16)
+    except FileNotFoundError:
+        return True
+    return header == b'' or header == b'SQLite format 3\x00'
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m src.pyEML.catalog', description='Build or inspect a SQLite catalog of EML documents.')
+    parser.add_argument('path', help='the SQLite catalog file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = subparsers.add_parser('rebuild', help='replace the catalog with the records of a directory of .xml files')
+    rebuild_parser.add_argument('directory', help='every .xml file under it is cataloged')
+    rebuild_parser.add_argument('--max-workers', type=int, default=None, help='worker processes; defaults to the number of CPUs')
+    subparsers.add_parser('info', help='describe the catalog')
+    args = parser.parse_args()
+    mycatalog = EmlCatalog(args.path)
+    if args.command == 'rebuild':
+        print(mycatalog.rebuild(args.directory, max_workers=args.max_workers))
+    else:
+        print(mycatalog.info())
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
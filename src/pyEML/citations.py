@@ -0,0 +1,285 @@
+"""Python source module for formatting citations in several styles
+
+`citations.py` turns citation parts (authors, date, title, version, document type, publisher, url) into
+citation text. Each style in `src.pyEML.constants.CITATION_STYLES` has a template in
+`src.pyEML.constants.CITATION_TEMPLATES` that is compiled once, on first use, into a list of clusters;
+formatting a citation is then a few dict lookups and string joins per cluster. `format_many()` formats a
+list of records or a pandas DataFrame in one call without touching any element tree, e.g., to build
+protocol and usage citations for thousands of packages.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+from datetime import date, datetime
+import re
+import string
+import threading
+from src.pyEML.constants import CITATION_STYLES, CITATION_TEMPLATES
+
+#: an optional `<...>` group inside a template cluster
+_OPTIONAL = re.compile(r'<([^<>]*)>')
+#: text that means "no value" in citation parts, as in `Emld`'s setters
+_BLANKS = ('', 'None', 'NA', 'na', 'NaN')
+#: the citation parts, other than authors and date, that are copied into a template as text
+_TEXT_FIELDS = ('title', 'version', 'doc_type', 'publisher', 'url', 'etc')
+#: the text parts whose own terminal punctuation is dropped, because the template punctuates them (e.g., "My protocol." is written as "My protocol")
+_PUNCTUATED_FIELDS = ('title', 'version', 'doc_type', 'publisher')
+
+class CitationTemplate():
+    """A citation style's template, compiled into clusters of fields and literal text"""
+
+    def __init__(self, style:str, template:str, name_format):
+        """Constructor for class CitationTemplate
+
+        Each cluster is a list of (fields, segments) parts; segments are (literal text, field name or '') pairs.
+
+        Args:
+            style (str): The style's name. E.g., 'apa'.
+            template (str): The template text. See `src.pyEML.constants.CITATION_TEMPLATES`.
+            name_format (function): Formats a list of author dicts ('first', 'middle', 'last') as one str.
+        """
+        self.style = style
+        self.template = template
+        self.name_format = name_format
+        self.clusters = [_compile_cluster(cluster) for cluster in template.split('|')]
+
+    def format(self, citation_parts:dict):
+        """Format one citation
+
+        Args:
+            citation_parts (dict): Any of 'authors' (list of dicts with 'first', 'middle', and 'last' keys, or an already-formatted str),
+                'date' (datetime.date, datetime.datetime, pandas.Timestamp, int year, or str starting with a year), 'title', 'version', 'doc_type', 'publisher', 'url', and 'etc'.
+                Missing, None, NaN, and blank parts are left out.
+
+        Returns:
+            str: The citation.
+        """
+        values = _prepare(citation_parts, self.name_format)
+        pieces = []
+        ends_sentence = False # the last piece is a value that ends in ".", "?", or "!"
+        for required, parts in self.clusters:
+            if not all(field in values for field in required):
+                continue
+            if len(required) == 0 and not any(fields and all(field in values for field in fields) for fields, _ in parts):
+                continue # a cluster of optional groups only, none of which has values
+            for fields, segments in parts:
+                if not all(field in values for field in fields):
+                    continue
+                for literal, field in segments:
+                    if literal != '':
+                        if ends_sentence and literal.startswith('.'): # e.g., a middle initial or a title ending in "?" followed by the template's "."
+                            literal = literal[1:]
+                        pieces.append(literal)
+                        ends_sentence = False
+                    if field != '':
+                        pieces.append(values[field])
+                        ends_sentence = values[field].endswith(('.', '?', '!'))
+        citation = ''.join(pieces).rstrip()
+        if citation.endswith((',', ';', ':')): # the cluster that would have followed has no value
+            citation = citation[:-1].rstrip() + '.'
+        return citation
+
+def _compile_cluster(cluster:str):
+    """Split one template cluster into its required fields and (fields, format text) parts; optional groups are parts with their own fields"""
+    parts = []
+    required = []
+    position = 0
+    for match in _OPTIONAL.finditer(cluster):
+        literal = cluster[position:match.start()]
+        if literal != '':
+            fields = _fields(literal)
+            required += fields
+            parts.append(((), _segments(literal))) # required fields were already checked for the whole cluster
+        parts.append((tuple(_fields(match.group(1))), _segments(match.group(1))))
+        position = match.end()
+    if cluster[position:] != '':
+        required += _fields(cluster[position:])
+        parts.append(((), _segments(cluster[position:])))
+    return tuple(required), parts
+
+def _fields(text:str):
+    """The `{field}` names in a piece of template text"""
+    return [field for _, field, _, _ in string.Formatter().parse(text) if field]
+
+def _segments(text:str):
+    """Split a piece of template text into (literal text, field name or '') pairs"""
+    return [(literal, field or '') for literal, field, _, _ in string.Formatter().parse(text)]
+
+def _present(value):
+    """True if a citation part has a value; None, NaN, empty lists, and blank text don't"""
+    if value is None:
+        return False
+    if isinstance(value, float) and value != value: # NaN, e.g., a missing DataFrame cell
+        return False
+    if isinstance(value, str):
+        return value.strip() not in _BLANKS
+    if isinstance(value, (list, tuple)):
+        return len(value) > 0
+    return True
+
+def _prepare(citation_parts:dict, name_format):
+    """Turn citation parts into the text values a template's fields hold"""
+    values = {}
+    authors = citation_parts.get('authors')
+    if _present(authors):
+        values['authors'] = authors.strip() if isinstance(authors, str) else name_format([author for author in authors if isinstance(author, dict)])
+        if values['authors'] == '':
+            del values['authors']
+    year = _year(citation_parts.get('date'))
+    if year is not None:
+        values['year'] = year
+    for field in _TEXT_FIELDS:
+        value = citation_parts.get(field)
+        if _present(value):
+            values[field] = str(value).strip()
+            if field in _PUNCTUATED_FIELDS:
+                values[field] = _strip_terminal(values[field])
+    return values
+
+def _strip_terminal(text:str):
+    """Drop a value's trailing ",", ";", ":", or "." (but not an ellipsis, "?", or "!"); the template supplies the punctuation"""
+    text = text.rstrip(',;: ')
+    if text.endswith('.') and not text.endswith('..'):
+        text = text[:-1].rstrip()
+    return text
+
+def _year(value):
+    """The publication year of a citation's date, as text; None if there isn't one"""
+    if not _present(value):
+        return None
+    if isinstance(value, (date, datetime)) or hasattr(value, 'year'): # includes pandas.Timestamp
+        return str(value.year)
+    match = re.match(r'\s*(\d{4})', str(value))
+    return match.group(1) if match else None
+
+def _names(author:dict):
+    """An author dict's first, middle, and last names, with the first letter of each capitalized"""
+    return tuple(_capitalize(author.get(key, '')) for key in ('first', 'middle', 'last'))
+
+def _capitalize(name:str):
+    # `str.capitalize()` would turn "McDonald" into "Mcdonald"
+    name = (name or '').strip()
+    return name[:1].upper() + name[1:]
+
+def _initials(*names:str):
+    return ' '.join(f'{name[0]}.' for name in names if name)
+
+def _chicago_names(authors:list):
+    # First M. Last, First Last
+    names = []
+    for author in authors:
+        first, middle, last = _names(author)
+        names.append(' '.join(name for name in (first, _initials(middle), last) if name))
+    return ', '.join(names)
+
+def _inverted(author:dict, initials_only:bool):
+    """Last, First M. (or Last, F. M.)"""
+    first, middle, last = _names(author)
+    given = _initials(first, middle) if initials_only else ' '.join(name for name in (first, _initials(middle)) if name)
+    return ', '.join(name for name in (last, given) if name)
+
+def _apa_names(authors:list):
+    # Last, F. M., Last, F., & Last, F.; 21 or more authors list the first 19, an ellipsis, and the last
+    names = [_inverted(author, initials_only=True) for author in authors]
+    if len(names) == 1:
+        return names[0]
+    if len(names) > 20:
+        return ', '.join(names[:19]) + ', . . . ' + names[-1]
+    return ', '.join(names[:-1]) + ', & ' + names[-1]
+
+def _mla_names(authors:list):
+    # Last, First M.; Last, First, and First Last; Last, First, et al.
+    if len(authors) == 1:
+        return _inverted(authors[0], initials_only=False)
+    if len(authors) == 2:
+        return _inverted(authors[0], initials_only=False) + ', and ' + _chicago_names(authors[1:])
+    return _inverted(authors[0], initials_only=False) + ', et al'
+
+def _datacite_names(authors:list):
+    # Last, First M.; Last, First
+    return '; '.join(_inverted(author, initials_only=False) for author in authors)
+
+#: how each style writes author names
+_NAME_FORMATS = {
+    'chicago': _chicago_names,
+    'apa': _apa_names,
+    'mla': _mla_names,
+    'datacite': _datacite_names
+}
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+def compile_style(style:str):
+    """Get the compiled template for a citation style; each style is compiled once per process
+
+    Args:
+        style (str): A key of `src.pyEML.constants.CITATION_STYLES`. E.g., 'chicago'.
+
+    Returns:
+        CitationTemplate: The compiled template.
+
+    Raises:
+        AssertionError: `style` isn't in `src.pyEML.constants.CITATION_STYLES`.
+    """
+    template = _compiled.get(style)
+    if template is None:
+        assert style in CITATION_STYLES.keys(), f'You provided {style} for `style`. Choose one of {list(CITATION_STYLES.keys())}.'
+        with _compiled_lock:
+            template = _compiled.setdefault(style, CitationTemplate(style=style, template=CITATION_TEMPLATES[style], name_format=_NAME_FORMATS[style]))
+    return template
+
+def format_citation(citation_parts:dict, style:str='chicago'):
+    """Format one citation
+
+    Args:
+        citation_parts (dict): Citation parts. See `CitationTemplate.format()`.
+        style (str, optional): A key of `src.pyEML.constants.CITATION_STYLES`. Defaults to 'chicago'.
+
+    Returns:
+        str: The citation.
+
+    Examples:
+        format_citation({'authors': [{'first': 'albus', 'last': 'fumblesnore'}], 'title': 'My protocol', 'date': '2021-01-01', 'version': '1.0'}, style='apa')
+    """
+    return compile_style(style).format(citation_parts)
+
+def format_many(records, style:str='chicago'):
+    """Format many citations in one call
+
+    Args:
+        records (list or pandas.DataFrame): Citation parts, one dict (or DataFrame row) per citation. See `CitationTemplate.format()`.
+        style (str, optional): A key of `src.pyEML.constants.CITATION_STYLES`. Defaults to 'chicago'.
+
+    Returns:
+        list: The citations, in the order of `records`.
+
+    Examples:
+        citations = format_many(protocols_df, style='datacite')
+    """
+    template = compile_style(style)
+    if hasattr(records, 'to_dict'): # a pandas DataFrame
+        records = records.to_dict('records')
+    return [template.format(record) for record in records]
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
@@ -1,5 +1,7 @@
 """Holds constants for Emld objects"""
 
+import os
+
 #: The current release version of {APP_NAME}
 CURRENT_RELEASE = '0.0.1'
 #: The name of this EML pipeline application
@@ -263,9 +265,141 @@ LICENSE_TEXT = {
 NPS_DOI_ADDRESS = 'https://doi.org/10.57830/'
 #: `CITATION_STYLES` is pick list of citation styles into which `Emld` nodes can be deparsed; used in `make_citation()`.
 CITATION_STYLES = {
-    "chicago": "https://www.chicagomanualofstyle.org/tools_citationguide.html"
+    "chicago": "https://www.chicagomanualofstyle.org/tools_citationguide.html",
+    "apa": "https://apastyle.apa.org/style-grammar-guidelines/references/examples/data-set-references",
+    "mla": "https://style.mla.org/citing-a-data-set/",
+    "datacite": "https://support.datacite.org/docs/datacite-citation-display"
+}
+#: `CITATION_TEMPLATES` holds the template that `src.pyEML.citations` compiles for each style in `CITATION_STYLES`.
+#: Clusters are separated by '|'; a cluster is written only if every `{field}` outside angle brackets has a value. `<...>` is written only if its own fields have values.
+#: Fields: authors, year, title, version, doc_type, publisher, url, etc
+CITATION_TEMPLATES = {
+    "chicago": "{authors}. |{year}. |{title}. |{doc_type}. |Version {version}. |{url}. |{etc}",
+    "apa": "{authors} |({year}). |{title}< (Version {version})>< [{doc_type}]>. |{publisher}. |{url}",
+    "mla": "{authors}. |{title}. |{doc_type}, |version {version}, |{publisher}, |{year}, |{url}.",
+    "datacite": "{authors} |({year}): |{title}. |Version {version}. |{publisher}. |({doc_type}). |{url}"
+}
+
+#: `SUMMARY_COLUMNS` is the fixed column schema of the corpus summary table built by `src.pyEML.summary.summarize_corpus()`.
+#: Keys are column names and values are the pandas dtype each column is cast to; 'object' columns hold python lists.
+SUMMARY_COLUMNS = {
+    'filepath': 'string',
+    'package_id': 'string',
+    'title': 'string',
+    'pub_date': 'datetime64[ns]',
+    'begin_date': 'datetime64[ns]',
+    'end_date': 'datetime64[ns]',
+    'west': 'float64',
+    'east': 'float64',
+    'north': 'float64',
+    'south': 'float64',
+    'bounding_boxes': 'object', # list of [west, east, north, south] for each `boundingCoordinates` node
+    'keywords': 'object', # list of str
+    'cui': 'string',
+    'doi': 'string'
 }
+#: `SUMMARY_DATE_FORMATS` are the date formats, tried in order, that `src.pyEML.summary` uses to type-cast EML date text.
+SUMMARY_DATE_FORMATS = ('%Y-%m-%d', '%Y-%m', '%Y', '%b %Y', '%Y-%m-%dT%H:%M:%S')
 
+#: Approximate per-object allocation sizes (bytes, 64-bit builds, including malloc overhead) of libxml2, which holds an `Emld`'s element tree outside the python heap.
+#: Used by `Emld.get_size_report()` to estimate native memory; the estimate is only as good as these figures.
+#: `LIBXML2_DOC_BYTES` is the fixed cost of one parsed document (xmlDoc, dictionary, and namespace tables)
+LIBXML2_DOC_BYTES = 4096
+#: `LIBXML2_NODE_BYTES` is the cost of one xmlNode; every element and every text node is one xmlNode
+LIBXML2_NODE_BYTES = 128
+#: `LIBXML2_ATTR_BYTES` is the cost of one xmlAttr; each attribute value is also stored in its own text xmlNode
+LIBXML2_ATTR_BYTES = 104
 
+#: `NPS_IRMA_UNIT_API` is the NPS IRMA REST service url for a unit's geography; `{unit}` is replaced with a four-character NPS unit code. See https://irmaservices.nps.gov/
+NPS_IRMA_UNIT_API = 'https://irmaservices.nps.gov/v2/rest/unit/{unit}/geography'
+#: `IRMA_UNIT_API` is the unit geography url that pyEML requests: `NPS_IRMA_UNIT_API` unless environment variable `PYEML_IRMA_UNIT_API` points pyEML at another server (e.g., `src.pyEML.irma_standin`).
+#: Call `src.pyEML.unit_api.set_unit_api_url()` to change it at runtime. Only answers from `NPS_IRMA_UNIT_API` are saved to the default geometry pack.
+IRMA_UNIT_API = os.environ.get('PYEML_IRMA_UNIT_API', NPS_IRMA_UNIT_API)
+#: `UNIT_CACHE_DIR` is where `src.pyEML.unit_api` caches unit geography responses on disk
+UNIT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', APP_NAME, 'unit_geography')
+#: `UNIT_CACHE_TTL` is how long, in seconds, a cached unit geography is used without asking the server whether it changed (30 days)
+UNIT_CACHE_TTL = 30 * 24 * 60 * 60
+#: `UNIT_API_TIMEOUT` is the read timeout: how long, in seconds, a unit geography request may wait for data before it fails
+UNIT_API_TIMEOUT = 30
+#: `UNIT_API_CONNECT_TIMEOUT` is how long, in seconds, a new connection to the unit geography service may take to connect before it fails
+UNIT_API_CONNECT_TIMEOUT = 5
+#: `UNIT_API_MAX_CONNECTIONS` is the most concurrent keep-alive connections `src.pyEML.unit_api` opens to one host
+UNIT_API_MAX_CONNECTIONS = 6
+#: `HTTP_RETRY_ATTEMPTS` is how many times `src.pyEML.resilience` tries a request, including the first try, before giving up
+HTTP_RETRY_ATTEMPTS = 4
+#: `HTTP_RETRY_BASE_DELAY` is the cap, in seconds, on the first retry's backoff; the cap doubles with each retry
+HTTP_RETRY_BASE_DELAY = 0.5
+#: `HTTP_RETRY_MAX_DELAY` is the most, in seconds, any one retry backoff can be
+HTTP_RETRY_MAX_DELAY = 8.0
+#: `HTTP_BREAKER_FAILURE_THRESHOLD` is how many consecutive failures open an endpoint's circuit breaker
+HTTP_BREAKER_FAILURE_THRESHOLD = 5
+#: `HTTP_BREAKER_RESET_TIMEOUT` is how long, in seconds, an open circuit breaker refuses requests before it lets a trial request through
+HTTP_BREAKER_RESET_TIMEOUT = 30
+#: `GEOMETRY_PACK_PATH` is the default location of the offline NPS unit geometry pack built by `src.pyEML.geometry_pack`
+GEOMETRY_PACK_PATH = os.path.join(os.path.expanduser('~'), '.cache', APP_NAME, 'nps_unit_geometry.sqlite')
+#: `GEOMETRY_PACK_VERSION` is the geometry pack schema version; a pack with a different version is ignored until it is refreshed
+GEOMETRY_PACK_VERSION = 1
+#: `GEOMETRY_PACK_TOLERANCE` is the Douglas-Peucker tolerance, in decimal degrees, used to simplify unit polygons stored in the geometry pack (~100 m)
+GEOMETRY_PACK_TOLERANCE = 0.001
+#: `GPOLYGON_MAX_VERTICES` is the default vertex budget, per unit, for `datasetGPolygon` rings written by `Emld.set_nps_geographic_coverage(polygons=True)`
+GPOLYGON_MAX_VERTICES = 500
 
+#: `LANGUAGE_ALIASES` maps common language names that ISO 639-3 doesn't list (or lists under a longer name) to ISO 639-3 codes; used by `src.pyEML.languages`
+#: ISO 639 codes take precedence, so an alias that is also a code (e.g., "asl", which is Asilulu, not American Sign Language) never takes effect
+LANGUAGE_ALIASES = {
+    'greek': 'ell',
+    'farsi': 'fas',
+    'mandarin': 'cmn',
+    'cantonese': 'yue',
+    'swahili': 'swa',
+    'malay': 'msa',
+    'bokmal': 'nob',
+    'nynorsk': 'nno',
+    'navaho': 'nav'
+}
+#: `LANGUAGE_SUGGESTIONS` is how many close matches `src.pyEML.languages.suggest_languages()` returns by default
+LANGUAGE_SUGGESTIONS = 5
+
+#: `THESAURUS_DIR` is where `src.pyEML.vocab` looks for thesaurus files (.txt, .csv, .rdf, .xml) to build its default vocabulary.
+#: Set environment variable `PYEML_THESAURUS_DIR` to use another directory.
+THESAURUS_DIR = os.environ.get('PYEML_THESAURUS_DIR', os.path.join(os.path.expanduser('~'), '.cache', APP_NAME, 'thesauri'))
+#: `THESAURUS_TITLES` maps thesaurus file names (without extension, lower case) to the title written in EML `keywordThesaurus`; other files use their file name.
+#: Listed files load first, in this order, so their terms win keywords that several thesauri share.
+THESAURUS_TITLES = {
+    'nps': 'NPS Data Store Keywords',
+    'gcmd': 'GCMD Science Keywords',
+    'lter': 'LTER Controlled Vocabulary'
+}
 
+#: `CORPUS_INDEX_DIR` is the directory, inside an `src.pyEML.corpus.EmlCorpus` root directory, that holds its manifest and indexes. Scans skip it.
+CORPUS_INDEX_DIR = '.pyeml'
+#: `CORPUS_MANIFEST_VERSION` is the manifest format version; a manifest saved with another version is discarded and the corpus is re-read
+CORPUS_MANIFEST_VERSION = 1
+#: `BM25_K1` is the BM25 term-frequency saturation that `src.pyEML.search.TextIndex` ranks with
+BM25_K1 = 1.2
+#: `BM25_B` is the BM25 document-length normalization that `src.pyEML.search.TextIndex` ranks with, from 0 (none) to 1 (full)
+BM25_B = 0.75
+#: `TEXT_FIELD_WEIGHTS` is how many times `src.pyEML.search.TextIndex` counts each term of each field; titles and keywords describe a package more densely than its abstract
+TEXT_FIELD_WEIGHTS = {
+    'title': 2,
+    'abstract': 1,
+    'keywords': 2
+}
+#: `RTREE_NODE_SIZE` is the most children per node of the packed R-tree in `src.pyEML.spatial.SpatialIndex`
+RTREE_NODE_SIZE = 16
+#: `SPATIAL_PREDICATES` are the ways `src.pyEML.spatial.SpatialIndex.query()` can relate documents' boxes to an area
+SPATIAL_PREDICATES = ('intersects', 'contains', 'within')
+#: `TEMPORAL_PREDICATES` are the ways `src.pyEML.temporal.TemporalIndex.query()` can relate documents' temporal coverage to a period
+TEMPORAL_PREDICATES = ('overlaps', 'contains', 'within')
+#: `CATALOG_VERSION` is the schema version of `src.pyEML.catalog.EmlCatalog` files; a catalog with a different version is emptied on its next write
+CATALOG_VERSION = 1
+#: `CATALOG_BATCH_SIZE` is how many documents `src.pyEML.catalog.EmlCatalog` writes per `executemany` batch
+CATALOG_BATCH_SIZE = 500
+#: `MINHASH_PERMUTATIONS` is the MinHash signature length in `src.pyEML.duplicates.DuplicateIndex`; the estimate's standard error is about 1/sqrt of it
+MINHASH_PERMUTATIONS = 128
+#: `MINHASH_SEED` seeds the MinHash permutations; signatures made with another seed can't be compared, so changing it rebuilds saved indexes
+MINHASH_SEED = 1
+#: `MINHASH_SHINGLE_SIZE` is the number of words per title and abstract shingle in `src.pyEML.duplicates`
+MINHASH_SHINGLE_SIZE = 3
+#: `DUPLICATE_THRESHOLD` is the default least estimated similarity, from 0 to 1, of the pairs that `src.pyEML.duplicates.DuplicateIndex` reports as near duplicates
+DUPLICATE_THRESHOLD = 0.8
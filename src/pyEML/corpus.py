@@ -0,0 +1,393 @@
+"""Python source module for working with a directory tree of EML documents as one corpus
+
+`corpus.py` holds `EmlCorpus`, which keeps a manifest of every .xml file under a root directory: its size,
+modification time, content hash, packageId, and summary row (see `src.pyEML.summary`). `EmlCorpus.scan()`
+walks the tree with `os.scandir` and compares each file's size and modification time with the manifest;
+only files that are new or whose stats changed are read, and of those only files whose content hash changed
+are parsed, in a pool of worker processes. A nightly sweep over a large corpus where few files change costs
+one `stat` per file plus the work on the changed files. Each parsed file is handed to the corpus' indexes
+(full-text search, see `src.pyEML.search`; bounding boxes, see `src.pyEML.spatial`; temporal coverage,
+see `src.pyEML.temporal`; near-duplicate metadata, see `src.pyEML.duplicates`), which are saved with the manifest under
+`src.pyEML.constants.CORPUS_INDEX_DIR` inside the root directory.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+from datetime import datetime
+import hashlib
+import json
+import os
+import lxml.etree as etree
+from src.pyEML.emld import Emld
+from src.pyEML.parallel import map_files, walk_xml
+from src.pyEML.summary import rows_to_summary, summarize_emld
+from src.pyEML.search import TextIndex, document_text
+from src.pyEML.spatial import SpatialIndex
+from src.pyEML.temporal import TemporalIndex, date_bounds, temporal_ranges
+from src.pyEML.duplicates import DuplicateIndex, minhash
+from src.pyEML.utils import write_json
+from src.pyEML.error_classes import bcolors
+from src.pyEML.constants import CORPUS_INDEX_DIR, CORPUS_MANIFEST_VERSION, DUPLICATE_THRESHOLD, SPATIAL_PREDICATES, TEMPORAL_PREDICATES, SUMMARY_DATE_FORMATS
+
+#: the manifest's filename, inside the corpus' index directory
+_MANIFEST = 'manifest.json'
+
+def hash_bytes(data:bytes):
+    """Hash a file's content for the manifest
+
+    Args:
+        data (bytes): The content.
+
+    Returns:
+        str: A 32-character hex digest.
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def read_corpus_file(job:tuple):
+    """Read one file for `EmlCorpus.scan()`: hash it and, if its content changed, parse it and extract what the manifest and indexes hold
+
+    Args:
+        job (tuple): (manifest key, filepath, size, mtime_ns, content hash in the manifest or None, True to parse even if the hash matches).
+
+    Returns:
+        tuple: (manifest key, manifest entry, document). `document` holds the fields that the corpus' indexes read (see `src.pyEML.search.document_text()`),
+            and is None when the file wasn't parsed; then the entry holds only the new stats and hash, to be merged into the old entry.
+            A file that can't be read or isn't well-formed xml gets an entry with its 'error' and an empty document, rather than stopping the scan.
+    """
+    key, filepath, size, mtime_ns, old_hash, parse = job
+    try:
+        with open(filepath, 'rb') as f:
+            data = f.read()
+    except OSError as e: # deleted or made unreadable since the walk; the stats are left blank, so the next scan tries again
+        return key, {'size': None, 'mtime_ns': None, 'hash': None, 'package_id': None, 'summary': None, 'error': str(e)}, {}
+    entry = {'size': size, 'mtime_ns': mtime_ns, 'hash': hash_bytes(data)}
+    if entry['hash'] == old_hash and not parse: # touched, copied, or restored, but not edited
+        return key, entry, None
+    try:
+        parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+        tree = etree.fromstring(data, parser).getroottree()
+        row = summarize_emld(Emld._from_tree(tree=tree, xml_src=filepath, interactive=False), filepath=filepath)
+        entry['package_id'] = row['package_id']
+        entry['summary'] = {column: _to_json(value) for column, value in row.items() if column != 'filepath'}
+        entry['error'] = None
+        document = document_text(tree.getroot())
+        document['bounding_boxes'] = row['bounding_boxes']
+        document['temporal_ranges'] = temporal_ranges(tree.getroot())
+        document['signature'] = minhash(document)
+    except etree.XMLSyntaxError as e: # kept in the manifest so that the file isn't re-read until it changes
+        entry['package_id'] = None
+        entry['summary'] = None
+        entry['error'] = str(e)
+        document = {} # indexed as empty, so indexes don't ask for the file again
+    return key, entry, document
+
+def _to_json(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+class EmlCorpus():
+    """A directory tree of EML-formatted xml files, with a manifest that makes re-scans incremental"""
+
+    def __init__(self, root_dir:str, index_dir:str=None, max_workers:int=None):
+        """Constructor for class EmlCorpus
+
+        Loads the saved manifest, if any. Call `scan()` to bring it up to date with the files.
+
+        Args:
+            root_dir (str): The directory that holds the corpus. Every .xml file under it, at any depth, is part of the corpus; directories whose names start with "." are skipped.
+            index_dir (str, optional): Where the manifest is saved. Defaults to `src.pyEML.constants.CORPUS_INDEX_DIR` inside `root_dir`.
+            max_workers (int, optional): The default number of worker processes for `scan()`. Defaults to None (`os.cpu_count()`).
+
+        Attributes:
+            manifest (dict): Keyed by each file's path relative to `root_dir`, with "/" separators. Each value holds 'size', 'mtime_ns', 'hash',
+                'package_id', 'summary' (the file's `src.pyEML.summary.summarize_emld()` row, dates as ISO text), and 'error' (the read or parse error, for files that couldn't be read or aren't well-formed xml; an unreadable file's 'size' and 'mtime_ns' are None, so the next scan reads it again).
+            text_index (src.pyEML.search.TextIndex): Full-text index over each file's title, abstract, and keywords. See `search()`.
+            spatial_index (src.pyEML.spatial.SpatialIndex): R-tree over each file's bounding boxes. See `spatial_search()`.
+            temporal_index (src.pyEML.temporal.TemporalIndex): Interval tree over each file's temporal coverage. See `temporal_search()`.
+            duplicate_index (src.pyEML.duplicates.DuplicateIndex): MinHash signatures of each file's title, abstract, and keywords. See `duplicates()`.
+
+        Examples:
+            mycorpus = EmlCorpus('data/')
+            changes = mycorpus.scan()
+        """
+        try:
+            assert os.path.isdir(root_dir), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{root_dir}".\n`root_dir` must be a directory.'
+            self.root_dir = os.path.abspath(root_dir)
+            self.index_dir = index_dir if index_dir is not None else os.path.join(self.root_dir, CORPUS_INDEX_DIR)
+            self.max_workers = max_workers
+            self.manifest = {}
+            self._load()
+            self.text_index = TextIndex.load(self.index_dir)
+            self.spatial_index = SpatialIndex.load(self.index_dir)
+            self.temporal_index = TemporalIndex.load(self.index_dir)
+            self.duplicate_index = DuplicateIndex.load(self.index_dir)
+
+        except AssertionError as a:
+            print(a)
+
+    def __len__(self):
+        return len(self.manifest)
+
+    def __iter__(self):
+        return iter(list(self.manifest))
+
+    def __contains__(self, key:str):
+        return key in self.manifest
+
+    def filepath(self, key:str):
+        """Get the full filepath of a manifest key
+
+        Args:
+            key (str): A manifest key (a path relative to `root_dir`).
+
+        Returns:
+            str: The filepath.
+        """
+        return os.path.join(self.root_dir, *key.split('/'))
+
+    def scan(self, max_workers:int=None):
+        """Bring the manifest up to date with the files under `root_dir`, and save it
+
+        Files whose size and modification time match the manifest are not opened. Other files are hashed, and only those whose
+        hash changed are parsed and summarized, in a pool of worker processes, and re-indexed. Files that an index is missing
+        (e.g., one that was deleted or is new in this release) are parsed too, without being reported as changed.
+
+        Args:
+            max_workers (int, optional): The number of worker processes. 1 runs in the current process. Defaults to `self.max_workers`.
+
+        Returns:
+            dict: Manifest keys, sorted, under 'added', 'changed', 'removed', and 'touched' (stats changed but content didn't), and the count of 'unchanged' files.
+
+        Examples:
+            changes = mycorpus.scan()
+            changes['changed'] # files to re-publish
+        """
+        try:
+            if max_workers is None:
+                max_workers = self.max_workers
+
+            indexes = self._indexes()
+            jobs = []
+            seen = set()
+            for key, filepath, stat in walk_xml(self.root_dir, skip=(self.index_dir,)):
+                seen.add(key)
+                entry = self.manifest.get(key)
+                stale = entry is None or any(index.hash(key) != entry['hash'] for index in indexes)
+                if not stale and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                    continue
+                jobs.append((key, filepath, stat.st_size, stat.st_mtime_ns, entry['hash'] if entry is not None else None, stale))
+
+            changes = {'added': [], 'changed': [], 'removed': sorted(key for key in self.manifest if key not in seen), 'touched': [], 'unchanged': 0}
+            for key, entry, document in map_files(jobs, read_corpus_file, max_workers):
+                old = self.manifest.get(key)
+                if old is None:
+                    changes['added'].append(key)
+                elif old['hash'] != entry['hash']:
+                    changes['changed'].append(key)
+                elif old['size'] != entry['size'] or old['mtime_ns'] != entry['mtime_ns']:
+                    changes['touched'].append(key)
+                if document is None:
+                    old.update(entry)
+                else:
+                    self.manifest[key] = entry
+                    for index in indexes:
+                        index.update(key, document, package_id=entry['package_id'], content_hash=entry['hash'])
+            for key in changes['removed']:
+                del self.manifest[key]
+            for index in indexes:
+                for key in index.keys():
+                    if key not in self.manifest: # removed files, and files an out-of-date manifest forgot
+                        index.remove(key)
+            for name in ('added', 'changed', 'touched'):
+                changes[name].sort()
+            changes['unchanged'] = len(seen) - len(changes['added']) - len(changes['changed']) - len(changes['touched'])
+
+            if len(jobs) > 0 or len(changes['removed']) > 0:
+                self.save()
+            return changes
+
+        except AssertionError as a:
+            print(a)
+
+    def summary(self):
+        """Build the corpus summary table from the manifest, without parsing any files
+
+        Returns:
+            pandas.DataFrame: One row per well-formed file, in manifest-key order, with the columns and dtypes of `src.pyEML.constants.SUMMARY_COLUMNS`. See `src.pyEML.summary.summarize_corpus()`.
+
+        Examples:
+            mycorpus.scan()
+            mysummary = mycorpus.summary()
+        """
+        rows = []
+        for key in sorted(self.manifest):
+            entry = self.manifest[key]
+            if entry['summary'] is not None:
+                rows.append(dict(entry['summary'], filepath=self.filepath(key)))
+        return rows_to_summary(rows)
+
+    def search(self, query:str, limit:int=10):
+        """Find packages by topic with the full-text index
+
+        Args:
+            query (str): Free text, matched against each file's title, abstract, and keywords. E.g., "forest pathogens".
+            limit (int, optional): The most results to return. Defaults to 10.
+
+        Returns:
+            list: (packageId, score, manifest key) tuples, best match first. See `src.pyEML.search.TextIndex.search()`.
+
+        Examples:
+            mycorpus.scan()
+            mycorpus.search('forest pathogens')
+        """
+        return self.text_index.search(query, limit=limit)
+
+    def spatial_search(self, west:float, east:float, north:float, south:float, predicate:str='intersects'):
+        """Find packages by area with the spatial index
+
+        Args:
+            west, east, north, south (float): The area's edges, in decimal degrees, as in EML `boundingCoordinates`. West may be east of east, for areas that cross the antimeridian.
+            predicate (str, optional): One of `src.pyEML.constants.SPATIAL_PREDICATES`: 'intersects' (a file's box overlaps the area),
+                'contains' (a file's box holds the whole area), or 'within' (all of a file's boxes lie inside the area). Defaults to 'intersects'.
+
+        Returns:
+            list: (packageId, manifest key) tuples, sorted by key.
+
+        Examples:
+            mycorpus.spatial_search(-77.5, -76.9, 39.1, 38.7)
+            mycorpus.spatial_search(-77.2, -77.2, 38.9, 38.9, predicate='contains') # a point
+        """
+        try:
+            assert predicate in SPATIAL_PREDICATES, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{predicate}".\n`predicate` must be one of {SPATIAL_PREDICATES}.'
+            return self.spatial_index.query(west, east, north, south, predicate=predicate)
+
+        except AssertionError as a:
+            print(a)
+
+    def temporal_search(self, begin, end=None, predicate:str='overlaps', text:str=None):
+        """Find packages by time period with the temporal index
+
+        Args:
+            begin (str, int, datetime.date, or datetime.datetime): The period's first date. A year or month stands for all of it. See `src.pyEML.temporal.date_bounds()`.
+            end (optional): The period's last date. Defaults to None (the period `begin` stands for; with a full date, a point in time).
+            predicate (str, optional): One of `src.pyEML.constants.TEMPORAL_PREDICATES`: 'overlaps' (a file's coverage shares a day with the period),
+                'contains' (one of a file's coverage intervals spans the whole period), or 'within' (all of a file's coverage falls inside the period). Defaults to 'overlaps'.
+            text (str, optional): Also require a full-text match, as in `search()`. Defaults to None.
+
+        Returns:
+            list: (packageId, manifest key) tuples, sorted by key.
+
+        Examples:
+            mycorpus.temporal_search(2010, 2012, text='vegetation')
+            mycorpus.temporal_search('2015-07-04', predicate='contains')
+        """
+        try:
+            assert predicate in TEMPORAL_PREDICATES, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{predicate}".\n`predicate` must be one of {TEMPORAL_PREDICATES}.'
+            for value in (begin, end):
+                assert value is None or date_bounds(value) is not None, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{value}".\nDates must be a datetime.date, a year, or text in one of these formats: {SUMMARY_DATE_FORMATS}.'
+            assert begin is not None, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}`begin` cannot be None.'
+            results = self.temporal_index.query(begin, end, predicate=predicate)
+            if text is not None:
+                matches = {key for _, _, key in self.text_index.search(text, limit=None)}
+                results = [result for result in results if result[1] in matches]
+            return results
+
+        except AssertionError as a:
+            print(a)
+
+    def duplicates(self, threshold:float=DUPLICATE_THRESHOLD):
+        """Find pairs of packages with near-duplicate titles, abstracts, and keywords, e.g., metadata copied between yearly packages
+
+        Args:
+            threshold (float, optional): The least estimated similarity of a pair's text, from 0 (nothing shared) to 1 (the same words). Defaults to `src.pyEML.constants.DUPLICATE_THRESHOLD`.
+
+        Returns:
+            list: (manifest key, manifest key, similarity) tuples, most similar pair first. See `src.pyEML.duplicates.DuplicateIndex.duplicates()`.
+
+        Examples:
+            mycorpus.scan()
+            for first, second, similarity in mycorpus.duplicates(0.9):
+                print(mycorpus.manifest[first]['package_id'], mycorpus.manifest[second]['package_id'], similarity)
+        """
+        try:
+            assert isinstance(threshold, (int, float)) and 0 <= threshold <= 1, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {threshold}.\n`threshold` must be a number from 0 to 1.'
+            return self.duplicate_index.duplicates(threshold)
+
+        except AssertionError as a:
+            print(a)
+
+    def similar(self, emld:Emld, threshold:float=DUPLICATE_THRESHOLD):
+        """Find the packages that an `Emld`, e.g., one about to be published, nearly duplicates
+
+        Args:
+            emld (Emld): The `Emld` to check. It doesn't need to be in the corpus.
+            threshold (float, optional): The least estimated similarity, as in `duplicates()`. Defaults to `src.pyEML.constants.DUPLICATE_THRESHOLD`.
+
+        Returns:
+            list: (packageId, similarity, manifest key) tuples, most similar first.
+
+        Examples:
+            mycorpus.similar(myemld)
+        """
+        try:
+            assert isinstance(threshold, (int, float)) and 0 <= threshold <= 1, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {threshold}.\n`threshold` must be a number from 0 to 1.'
+            return self.duplicate_index.similar(document_text(emld.root), threshold)
+
+        except AssertionError as a:
+            print(a)
+
+    def find(self, package_id:str):
+        """Get the manifest keys of the files with a packageId
+
+        Args:
+            package_id (str): The packageId.
+
+        Returns:
+            list: Manifest keys, sorted. Usually one; more if the corpus holds copies.
+        """
+        return sorted(key for key, entry in self.manifest.items() if entry['package_id'] == package_id)
+
+    def save(self):
+        """Save the manifest and indexes to `index_dir`"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        for index in self._indexes():
+            index.save(self.index_dir)
+        write_json(os.path.join(self.index_dir, _MANIFEST), {'version': CORPUS_MANIFEST_VERSION, 'files': self.manifest}) # written last, so a manifest never lists files its indexes haven't seen
+
+    def _load(self):
+        """Load the saved manifest; a missing, unreadable, or outdated one leaves the manifest empty, so the next scan re-reads every file"""
+        try:
+            with open(os.path.join(self.index_dir, _MANIFEST), encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('version') == CORPUS_MANIFEST_VERSION:
+                self.manifest = saved['files']
+        except (OSError, ValueError):
+            pass
+
+    def _indexes(self):
+        """The indexes that `scan()` keeps up to date; each has `hash()`, `keys()`, `update()`, `remove()`, and `save()`"""
+        return [self.text_index, self.spatial_index, self.temporal_index, self.duplicate_index]
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
@@ -0,0 +1,143 @@
+"""Python source module for structural diffs between EML element trees
+
+`diff.py` compares two lxml element trees and returns an edit script: the inserts, deletes,
+text and tail updates, and attribute updates that turn the old tree into the new tree. Every subtree is
+hashed bottom-up first, so subtrees that did not change are matched by hash and skipped without
+being walked; the comparison only descends into the parts of the trees that changed. Whitespace
+around text is ignored, so re-indenting (e.g., `pretty_print`) does not show up as an edit.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+from copy import deepcopy
+from difflib import SequenceMatcher
+import lxml.etree as etree
+
+#: `EDIT_OPS` are the kinds of edits that `diff_trees()` can return
+EDIT_OPS = ('insert', 'delete', 'update_text', 'update_tail', 'update_attribute')
+
+def diff_trees(old:etree._Element, new:etree._Element):
+    """Build a minimal edit script that turns element tree `old` into element tree `new`
+
+    Args:
+        old (lxml.etree._Element): The root of the original tree.
+        new (lxml.etree._Element): The root of the revised tree.
+
+    Returns:
+        list: A list of dicts, one per edit, in document order. Each dict has an 'op' (one of `EDIT_OPS`) and a 'path'.
+            'delete' paths point into `old`; 'insert' paths point into `new` and carry the inserted subtree as 'xml'.
+            'update_text' edits carry 'old' and 'new' text; 'update_tail' edits carry the 'old' and 'new' text that follows the element, inside its parent (mixed content).
+            'update_attribute' edits carry 'attribute', 'old', and 'new' values; None means the attribute was added or removed.
+
+    Examples:
+        edits = diff_trees(myemld.root, otheremld.root)
+    """
+    old_hashes = {}
+    new_hashes = {}
+    _hash_subtree(old, old_hashes)
+    _hash_subtree(new, new_hashes)
+    old_tree = old.getroottree()
+    new_tree = new.getroottree()
+    edits = []
+    if old.tag != new.tag:
+        edits.append({'op': 'delete', 'path': old_tree.getpath(old)})
+        edits.append({'op': 'insert', 'path': new_tree.getpath(new), 'xml': _to_xml(new)})
+    else:
+        _diff_nodes(old, new, old_hashes, new_hashes, old_tree, new_tree, edits)
+    return edits
+
+def _diff_nodes(old, new, old_hashes, new_hashes, old_tree, new_tree, edits):
+    """Recursively compare two elements that have the same tag and append edits to `edits`"""
+    if old_hashes[old] == new_hashes[new]: # identical subtrees; nothing below here changed
+        return
+    path = old_tree.getpath(old)
+
+    old_text = _clean_text(old.text)
+    new_text = _clean_text(new.text)
+    if old_text != new_text:
+        edits.append({'op': 'update_text', 'path': path, 'old': old_text, 'new': new_text})
+    old_tail = _clean_text(old.tail)
+    new_tail = _clean_text(new.tail)
+    if old_tail != new_tail:
+        edits.append({'op': 'update_tail', 'path': path, 'old': old_tail, 'new': new_tail})
+
+    if old.attrib != new.attrib:
+        for attribute in sorted(set(old.attrib.keys()) | set(new.attrib.keys())):
+            old_value = old.get(attribute)
+            new_value = new.get(attribute)
+            if old_value != new_value:
+                edits.append({'op': 'update_attribute', 'path': path, 'attribute': attribute, 'old': old_value, 'new': new_value})
+
+    old_children = [child for child in old if isinstance(child.tag, str)] # skip comments and processing instructions
+    new_children = [child for child in new if isinstance(child.tag, str)]
+    matcher = SequenceMatcher(
+        a=[old_hashes[child] for child in old_children],
+        b=[new_hashes[child] for child in new_children],
+        autojunk=False
+        )
+    for opcode, i1, i2, j1, j2 in matcher.get_opcodes():
+        if opcode == 'equal': # matched by hash; skip these subtrees entirely
+            continue
+        _diff_children(old_children[i1:i2], new_children[j1:j2], old_hashes, new_hashes, old_tree, new_tree, edits)
+
+def _diff_children(old_children, new_children, old_hashes, new_hashes, old_tree, new_tree, edits):
+    """Pair up unmatched siblings by tag (in order) and recurse; unpaired siblings become deletes and inserts"""
+    unpaired_new = list(new_children)
+    for old_child in old_children:
+        match = None
+        for i, new_child in enumerate(unpaired_new):
+            if new_child.tag == old_child.tag:
+                match = unpaired_new.pop(i)
+                break
+        if match is None:
+            edits.append({'op': 'delete', 'path': old_tree.getpath(old_child)})
+        else:
+            _diff_nodes(old_child, match, old_hashes, new_hashes, old_tree, new_tree, edits)
+    for new_child in unpaired_new:
+        edits.append({'op': 'insert', 'path': new_tree.getpath(new_child), 'xml': _to_xml(new_child)})
+
+def _hash_subtree(node, hashes:dict):
+    """Compute a hash for `node` from its tag, attributes, text, tail, and child hashes; store every hash in `hashes`
+
+    Python's built-in tuple hash is used because the hashes only need to be compared within one process.
+    """
+    child_hashes = tuple(_hash_subtree(child, hashes) for child in node if isinstance(child.tag, str))
+    node_hash = hash((node.tag, tuple(sorted(node.attrib.items())), _clean_text(node.text), _clean_text(node.tail), child_hashes)) # the tail is the parent's mixed content after `node`
+    hashes[node] = node_hash
+    return node_hash
+
+def _clean_text(text):
+    """Strip insignificant whitespace so that re-indented trees compare equal"""
+    if text is None:
+        return None
+    text = text.strip()
+    return text if text != '' else None
+
+def _to_xml(node):
+    """Serialize a subtree for an 'insert' edit without the unused namespace declarations it inherits from the root"""
+    node = deepcopy(node)
+    etree.cleanup_namespaces(node)
+    return etree.tostring(node, encoding='unicode', with_tail=False)
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
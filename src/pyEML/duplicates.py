@@ -0,0 +1,356 @@
+"""Python source module for finding near-duplicate metadata across a corpus of EML documents
+
+`duplicates.py` holds `DuplicateIndex`, which keeps a MinHash signature of each document's title, abstract, and
+keywords. Title and abstract are tokenized as for full-text search (see `src.pyEML.search.tokenize()`) and cut
+into overlapping word shingles; each keyword is one more shingle. The share of equal positions in two signatures
+estimates the Jaccard similarity of the two shingle sets. To find pairs without comparing every pair, signatures
+are cut into bands (locality-sensitive hashing): documents that agree on every position of some band become
+candidates, and only candidates are compared. Grouping by band is a sort, so a check of the whole corpus costs
+about n log n plus the candidates, rather than n squared. Copy-pasted abstracts in yearly packages that differ
+by a few words, e.g., a year or a park name, come out as near duplicates. `src.pyEML.corpus.EmlCorpus` keeps the
+index up to date and saves it beside its manifest; `find_duplicates()` checks a list of `Emld`s directly.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import functools
+import itertools
+import os
+import zlib
+import numpy as np
+from src.pyEML.search import document_text, tokenize
+from src.pyEML.constants import DUPLICATE_THRESHOLD, MINHASH_PERMUTATIONS, MINHASH_SEED, MINHASH_SHINGLE_SIZE
+
+#: the index format version; an index saved with another version is discarded and rebuilt
+_VERSION = 1
+#: the Mersenne prime 2**61 - 1; shingle hashes are permuted by ((a * x + b) mod `_PRIME`) mod 2**32
+_PRIME = (1 << 61) - 1
+#: every signature position of a document without shingles; such documents never match
+_EMPTY = np.uint32(0xFFFFFFFF)
+#: how much a candidate pair below the threshold counts against a band split, relative to a missed pair above it;
+#: candidates are checked against the full signature, so a false candidate only costs a comparison
+_FALSE_POSITIVE_WEIGHT = 0.2
+
+def shingles(document:dict, size:int=MINHASH_SHINGLE_SIZE):
+    """Cut a document's text into hashed shingles
+
+    Args:
+        document (dict): Holds 'title' (str), 'abstract' (str), and 'keywords' (list of str), as returned by `src.pyEML.search.document_text()`.
+        size (int, optional): Words per title and abstract shingle. Text shorter than `size` words is one shingle. Defaults to `src.pyEML.constants.MINHASH_SHINGLE_SIZE`.
+
+    Returns:
+        numpy.ndarray: The distinct 32-bit shingle hashes, as uint64.
+    """
+    found = set()
+    for field in ('title', 'abstract'):
+        terms = tokenize(document.get(field) or '')
+        if 0 < len(terms) < size:
+            found.add(field + ':' + ' '.join(terms)) # fields are prefixed so a title shingle never equals an abstract shingle
+        for i in range(len(terms) - size + 1):
+            found.add(field + ':' + ' '.join(terms[i:i + size]))
+    for keyword in document.get('keywords') or []:
+        terms = tokenize(keyword)
+        if terms:
+            found.add('keyword:' + ' '.join(terms))
+    return np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in found), dtype=np.uint64, count=len(found))
+
+def minhash(document:dict, permutations:int=MINHASH_PERMUTATIONS, seed:int=MINHASH_SEED, size:int=MINHASH_SHINGLE_SIZE):
+    """Compute a document's MinHash signature
+
+    Args:
+        document (dict): Holds 'title', 'abstract', and 'keywords'. See `shingles()`.
+        permutations (int, optional): The signature's length. Defaults to `src.pyEML.constants.MINHASH_PERMUTATIONS`.
+        seed (int, optional): Seeds the permutations; only signatures made with the same seed and length are comparable. Defaults to `src.pyEML.constants.MINHASH_SEED`.
+        size (int, optional): Words per shingle. Defaults to `src.pyEML.constants.MINHASH_SHINGLE_SIZE`.
+
+    Returns:
+        numpy.ndarray: The signature, as `permutations` uint32s: each permutation's least shingle hash. Every position is 2**32 - 1 for a document without text.
+    """
+    hashes = shingles(document, size)
+    if len(hashes) == 0:
+        return np.full(permutations, _EMPTY, dtype=np.uint32)
+    a, b = _permutations(permutations, seed)
+    permuted = ((np.outer(a, hashes) + b[:, None]) % np.uint64(_PRIME)) & np.uint64(0xFFFFFFFF) # a < 2**32 and hashes < 2**32, so the products fit in uint64
+    return permuted.min(axis=1).astype(np.uint32)
+
+def lsh_bands(threshold:float, permutations:int=MINHASH_PERMUTATIONS):
+    """Choose how to cut signatures into bands for a similarity threshold
+
+    Two documents with similarity s share at least one band with probability 1 - (1 - s**rows)**bands. The split chosen
+    minimizes a weighted sum of the chances of a candidate pair below `threshold` and of a missed pair above it, with
+    missed pairs weighted more heavily.
+
+    Args:
+        threshold (float): The least similarity of the pairs to find, from 0 to 1.
+        permutations (int, optional): The signature's length. Defaults to `src.pyEML.constants.MINHASH_PERMUTATIONS`.
+
+    Returns:
+        tuple: (bands, rows per band). `bands * rows` is at most `permutations`.
+    """
+    return _lsh_bands(round(float(threshold), 4), permutations)
+
+@functools.lru_cache(maxsize=64)
+def _lsh_bands(threshold:float, permutations:int):
+    grid = np.linspace(0.0, 1.0, 1001)
+    below = grid <= threshold
+    best = None
+    for rows in range(1, permutations + 1):
+        bands = permutations // rows
+        candidate = 1.0 - (1.0 - grid ** rows) ** bands
+        error = (_FALSE_POSITIVE_WEIGHT * candidate[below].sum() + (1.0 - _FALSE_POSITIVE_WEIGHT) * (1.0 - candidate[~below]).sum()) / len(grid)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+@functools.lru_cache(maxsize=8)
+def _permutations(permutations:int, seed:int):
+    """The (a, b) coefficients of each permutation, as uint64 arrays"""
+    generator = np.random.default_rng(seed)
+    a = generator.integers(1, 1 << 32, size=permutations, dtype=np.uint64)
+    b = generator.integers(0, 1 << 32, size=permutations, dtype=np.uint64)
+    return a, b
+
+class DuplicateIndex():
+    """MinHash signatures of documents' titles, abstracts, and keywords, with LSH banding to find near-duplicate pairs
+
+    Documents are identified by a key (in `src.pyEML.corpus.EmlCorpus`, the file's manifest key); each also carries its packageId and the content hash it was indexed from.
+    """
+
+    #: the index's filename, inside a corpus' index directory
+    filename = 'duplicate_index.npz'
+
+    def __init__(self, permutations:int=MINHASH_PERMUTATIONS, seed:int=MINHASH_SEED):
+        """Constructor for class DuplicateIndex
+
+        Args:
+            permutations (int, optional): The signature length. Defaults to `src.pyEML.constants.MINHASH_PERMUTATIONS`.
+            seed (int, optional): Seeds the permutations. Defaults to `src.pyEML.constants.MINHASH_SEED`.
+        """
+        self.permutations = permutations
+        self.seed = seed
+        self._docs = {} # key: [packageId, content hash, signature]
+        self._matrix = None # (keys, signatures stacked as rows); None until the next query after a change
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, key:str):
+        return key in self._docs
+
+    def hash(self, key:str):
+        """Get the content hash a document was indexed from
+
+        Args:
+            key (str): The document's key.
+
+        Returns:
+            str: The hash, or None if the document isn't indexed.
+        """
+        doc = self._docs.get(key)
+        return doc[1] if doc is not None else None
+
+    def keys(self):
+        """Get the key of every indexed document
+
+        Returns:
+            list: The keys.
+        """
+        return list(self._docs)
+
+    def update(self, key:str, document:dict, package_id:str=None, content_hash:str=None):
+        """Index a document's signature, replacing any earlier version with the same key
+
+        Args:
+            key (str): The document's key.
+            document (dict): Holds 'signature', as returned by `minhash()`, or the 'title', 'abstract', and 'keywords' to compute it from. Documents without text are recorded, but never match.
+            package_id (str, optional): The document's packageId, which queries return. Defaults to None.
+            content_hash (str, optional): The hash of the content the signature came from. See `hash()`. Defaults to None.
+        """
+        signature = document.get('signature')
+        if signature is None or len(signature) != self.permutations:
+            signature = minhash(document, self.permutations, self.seed)
+        self._docs[key] = [package_id, content_hash, np.asarray(signature, dtype=np.uint32)]
+        self._matrix = None
+
+    def remove(self, key:str):
+        """Remove a document from the index
+
+        Args:
+            key (str): The document's key.
+
+        Returns:
+            bool: True if the document was indexed.
+        """
+        if self._docs.pop(key, None) is None:
+            return False
+        self._matrix = None
+        return True
+
+    def duplicates(self, threshold:float=DUPLICATE_THRESHOLD):
+        """Find every pair of documents whose estimated similarity reaches a threshold
+
+        Args:
+            threshold (float, optional): The least estimated Jaccard similarity of the pairs' shingle sets, from 0 to 1. Defaults to `src.pyEML.constants.DUPLICATE_THRESHOLD`.
+
+        Returns:
+            list: (key, key, similarity) tuples, keys in order within each pair, most similar pair first. Pairs just above the threshold may be missed,
+                with a chance that shrinks as their similarity grows; see `lsh_bands()`.
+
+        Raises:
+            ValueError: `threshold` isn't between 0 and 1.
+        """
+        threshold = _check_threshold(threshold)
+        keys, signatures = self._build()
+        bands, rows = lsh_bands(threshold, self.permutations)
+        live = np.flatnonzero(~(signatures == _EMPTY).all(axis=1))
+        pairs = set()
+        for band in range(bands):
+            columns = np.ascontiguousarray(signatures[live, band * rows:(band + 1) * rows])
+            _, bucket = np.unique(columns.view(np.dtype((np.void, columns.dtype.itemsize * rows))).ravel(), return_inverse=True)
+            order = np.argsort(bucket.ravel(), kind='stable')
+            members = live[order]
+            bounds = np.concatenate(([0], np.flatnonzero(np.diff(bucket.ravel()[order])) + 1, [len(order)]))
+            for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+                if end - start > 1: # a bucket shared by several documents
+                    pairs.update(itertools.combinations(members[start:end].tolist(), 2))
+        if not pairs:
+            return []
+        first, second = np.array(sorted(pairs), dtype=np.int64).T
+        similarity = (signatures[first] == signatures[second]).mean(axis=1) # candidates are checked against the full signature
+        found = [
+            tuple(sorted((keys[i], keys[j]))) + (float(s),)
+            for i, j, s in zip(first.tolist(), second.tolist(), similarity.tolist()) if s >= threshold
+            ]
+        return sorted(found, key=lambda pair: (-pair[2], pair[0], pair[1]))
+
+    def similar(self, document:dict, threshold:float=DUPLICATE_THRESHOLD):
+        """Find the indexed documents that a document, indexed or not, nearly duplicates
+
+        Args:
+            document (dict): Holds 'signature' or the text to compute it from, as in `update()`.
+            threshold (float, optional): The least estimated similarity, from 0 to 1. Defaults to `src.pyEML.constants.DUPLICATE_THRESHOLD`.
+
+        Returns:
+            list: (packageId, similarity, key) tuples, most similar first.
+
+        Raises:
+            ValueError: `threshold` isn't between 0 and 1.
+        """
+        threshold = _check_threshold(threshold)
+        signature = document.get('signature')
+        if signature is None or len(signature) != self.permutations:
+            signature = minhash(document, self.permutations, self.seed)
+        signature = np.asarray(signature, dtype=np.uint32)
+        keys, signatures = self._build()
+        if len(keys) == 0 or (signature == _EMPTY).all():
+            return []
+        bands, rows = lsh_bands(threshold, self.permutations)
+        equal = signatures[:, :bands * rows] == signature[:bands * rows]
+        candidates = np.flatnonzero(equal.reshape(len(keys), bands, rows).all(axis=2).any(axis=1))
+        similarity = (signatures[candidates] == signature).mean(axis=1)
+        found = [(self._docs[keys[i]][0], float(s), keys[i]) for i, s in zip(candidates.tolist(), similarity.tolist()) if s >= threshold]
+        return sorted(found, key=lambda match: (-match[1], match[2]))
+
+    def _build(self):
+        """Stack the signatures into one matrix, if anything changed since the last query"""
+        if self._matrix is None:
+            keys = sorted(self._docs)
+            signatures = np.array([self._docs[key][2] for key in keys], dtype=np.uint32).reshape(len(keys), self.permutations)
+            self._matrix = (keys, signatures)
+        return self._matrix
+
+    def save(self, directory:str):
+        """Save the index to `directory`, as `DuplicateIndex.filename`
+
+        Args:
+            directory (str): The directory. It must exist.
+        """
+        keys, signatures = self._build()
+        filename = os.path.join(directory, self.filename)
+        tmp_filename = filename + '.tmp.npz' # `np.savez` adds ".npz" to names without it
+        np.savez(
+            tmp_filename,
+            version=np.array(_VERSION),
+            permutations=np.array(self.permutations),
+            seed=np.array(self.seed),
+            keys=np.array(keys, dtype=str),
+            package_ids=np.array([self._docs[key][0] or '' for key in keys], dtype=str),
+            hashes=np.array([self._docs[key][1] or '' for key in keys], dtype=str),
+            signatures=signatures
+        )
+        os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load(cls, directory:str, permutations:int=MINHASH_PERMUTATIONS, seed:int=MINHASH_SEED):
+        """Load an index saved by `save()`
+
+        Args:
+            directory (str): The directory it was saved to.
+            permutations (int, optional): The signature length the index must have. Defaults to `src.pyEML.constants.MINHASH_PERMUTATIONS`.
+            seed (int, optional): The seed the index must have. Defaults to `src.pyEML.constants.MINHASH_SEED`.
+
+        Returns:
+            DuplicateIndex: The index; an empty one if there is no saved index, or it is unreadable, from another version, or made with other permutations.
+        """
+        index = cls(permutations, seed)
+        try:
+            with np.load(os.path.join(directory, cls.filename), allow_pickle=False) as data:
+                if int(data['version']) != _VERSION or int(data['permutations']) != permutations or int(data['seed']) != seed:
+                    return index
+                keys = data['keys'].tolist()
+                signatures = data['signatures'].astype(np.uint32).reshape(len(keys), permutations)
+                for key, package_id, content_hash, signature in zip(keys, data['package_ids'].tolist(), data['hashes'].tolist(), signatures):
+                    index._docs[key] = [package_id or None, content_hash or None, signature]
+                index._matrix = (keys, signatures) # saved in key order, so the first query doesn't restack
+            return index
+        except (OSError, ValueError, KeyError):
+            return cls(permutations, seed)
+
+def find_duplicates(emlds:list, threshold:float=DUPLICATE_THRESHOLD):
+    """Find near-duplicate pairs in a list of `Emld`s, e.g., a batch about to be published
+
+    Args:
+        emlds (list): `src.pyEML.emld.Emld` objects.
+        threshold (float, optional): The least estimated similarity, from 0 to 1. Defaults to `src.pyEML.constants.DUPLICATE_THRESHOLD`.
+
+    Returns:
+        list: (position, position, similarity) tuples, positions in `emlds`, most similar pair first. See `DuplicateIndex.duplicates()`.
+
+    Raises:
+        ValueError: `threshold` isn't between 0 and 1.
+
+    Examples:
+        find_duplicates([myemld, lastyears_emld])
+    """
+    index = DuplicateIndex()
+    for position, emld in enumerate(emlds):
+        index.update(f'{position:09d}', document_text(emld.root), package_id=emld.root.get('packageId')) # zero-padded, so keys sort in list order
+    return [(int(first), int(second), similarity) for first, second, similarity in index.duplicates(threshold)]
+
+def _check_threshold(threshold):
+    if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not 0 <= threshold <= 1:
+        raise ValueError(f'`threshold` must be a number from 0 to 1. You provided {threshold}.')
+    return float(threshold)
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
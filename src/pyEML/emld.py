@@ -12,27 +12,42 @@ License: MIT, license information at end of file
 """
 
 import lxml.etree as etree
-from src.pyEML.error_classes import bcolors, MissingNodeException, InvalidDataStructure
-from src.pyEML.constants import LOOKUPS, CUI_CHOICES, LICENSE_TEXT, CURRENT_RELEASE, APP_NAME, NPS_DOI_ADDRESS, CITATION_STYLES, AVAILABLE_ATTRIBUTES
+from src.pyEML.diff import diff_trees
+from src.pyEML.blobstore import BlobStore, make_root, parse_and_spill, write_blobs, write_blobs_to_file
+from src.pyEML.profiling import MemoryProfile, start_tracing, stop_tracing, track_memory
+from src.pyEML.citations import format_citation
+from src.pyEML.keywords import KeywordIndex, normalize_keyword
+from src.pyEML.languages import lookup_language, suggest_languages
+from src.pyEML.geometry_pack import SIMPLIFY_METHODS, aget_unit_bounding_boxes, get_unit_bounding_boxes, simplify_geometry
+from src.pyEML.error_classes import bcolors, MissingNodeException, InvalidDataStructure, ExternalServiceError
+from src.pyEML.constants import LOOKUPS, CUI_CHOICES, LICENSE_TEXT, CURRENT_RELEASE, APP_NAME, NPS_DOI_ADDRESS, CITATION_STYLES, AVAILABLE_ATTRIBUTES, LIBXML2_DOC_BYTES, LIBXML2_NODE_BYTES, LIBXML2_ATTR_BYTES, GPOLYGON_MAX_VERTICES
 from datetime import datetime
-import iso639
-import urllib
-import pandas as pd
-import xmltodict
-import gc
-import sys
+from copy import deepcopy
+import asyncio
+import contextvars
+import functools
+import inspect
+import io
+import weakref
+import zlib
 import json
 
 class Emld():
     """An object that holds data parsed from an EML-formatted xml file."""
 
-    def __init__(self, filepath:str, INTERACTIVE:bool=True):
+    def __init__(self, filepath:str, INTERACTIVE:bool=True, spill_threshold:int=None, spill_dir:str=None, profile_memory:bool=False):
         """Constructor for class Emld
         
         Args:
             filepath (str): Filepath and name for the source-xml that is parsed to an element tree.
             INTERACTIVE (bool): Turns on status messages and overwrite detection. True is for interactive sessions. Shows status messages, asks user for permission before overwriting.
                 False is for automated scripting. Silences status messages and writes metadata verbatim as scripted. Default is True.
+            spill_threshold (int, optional): Turns on memory-bounded mode. Any text node longer than `spill_threshold` characters is moved to disk at load time
+                and read back the first time it is accessed. Defaults to None, which keeps all text in memory.
+            spill_dir (str, optional): Where spilled text is saved when `spill_threshold` is set. Defaults to None, which uses a temporary directory
+                that is removed when the `Emld` is garbage-collected.
+            profile_memory (bool, optional): Turns on memory profiling. Records the peak and net python allocation of each public method call; see `memory_report()`.
+                Starts `tracemalloc` if it isn't already tracing, and stops it once this `Emld` and every other profiling owner are gone. Defaults to False.
         
         Attributes:
             xml_src (str): Filepath and name for the source-xml that is parsed to an element tree.
@@ -40,15 +55,29 @@ class Emld():
                 False is for automated scripting. Silence status messages and write metadata verbatim as scripted.
             tree (lxml.etree._ElementTree): an lxml element tree containing data parsed from self.xmlstring.
             root (lxml.etree._Element): the root node of self.tree.
+            blob_store (src.pyEML.blobstore.BlobStore): where spilled text is saved; None unless `spill_threshold` is set.
+            memory_profile (src.pyEML.profiling.MemoryProfile): running allocation totals for each method; None unless `profile_memory` is True.
         """
         try:
             assert filepath.endswith('.xml'), print(f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.{bcolors.ENDC}\nYou provided "{bcolors.BOLD}{filepath}{bcolors.ENDC}".\nYou must create an`{bcolors.BOLD}Emld{bcolors.ENDC}` from an xml document.\nFilename should end in "{bcolors.BOLD}.xml{bcolors.ENDC}".')
             self.xml_src = filepath
             self.interactive = INTERACTIVE
+            self.blob_store = None
+            self.memory_profile = None
+            self._keyword_index = None
+            if profile_memory == True:
+                start_tracing()
+                weakref.finalize(self, stop_tracing)
+                self.memory_profile = MemoryProfile()
             
             # filename = 'C:/Users/cwainright/OneDrive - DOI/Documents/data_projects/2023/20230210_iss135_emleditor/sandbox/testinput.xml'
-            parser = etree.XMLParser(remove_blank_text=True)
-            tree = etree.parse(filepath, parser)
+            if spill_threshold is None:
+                parser = etree.XMLParser(remove_blank_text=True)
+                tree = etree.parse(filepath, parser)
+            else:
+                assert isinstance(spill_threshold, int) and spill_threshold > 0, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {spill_threshold}.\n`spill_threshold` must be a positive int (number of characters).'
+                self.blob_store = BlobStore(directory=spill_dir)
+                tree = parse_and_spill(filepath=filepath, store=self.blob_store, threshold=spill_threshold)
             root = tree.getroot()
             self.tree = tree
             self.root = root
@@ -280,25 +309,38 @@ class Emld():
         except:
             print('problem get_keywords()')
 
-    def set_keywords(self, *keywords):
+    def set_keywords(self, *keywords, vocabulary=None, strict:bool=False):
         """Set the dataset's keywords
 
         Args:
             *keywords (str, arbitrary argument): `set_keywords()` accepts any number of comma-separated arguments
+            vocabulary (src.pyEML.vocab.Vocabulary, optional): Controlled vocabularies to check keywords against. Matching keywords are replaced by their preferred terms and written in one `keywordSet` per thesaurus, with its `keywordThesaurus`. Defaults to None (keywords are written as given, in one `keywordSet`).
+            strict (bool, optional): With `vocabulary`, True refuses keywords that aren't in any thesaurus. Defaults to False, which writes them in a last `keywordSet` without a `keywordThesaurus`.
 
         Examples:
-            myemld.delete_keywords()
+            myemld.set_keywords('birds', 'vegetation')
+            myemld.set_keywords('birds', 'vegetation', vocabulary=default_vocabulary, strict=True)
         """
         try:
+            node_xpath = LOOKUPS['keywords']['node_xpath']
+            node_target= LOOKUPS['keywords']['node_target']
+            parent= LOOKUPS['keywords']['parent']
             for keyword in keywords:
                 assert keyword not in ('', None), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{keyword}". {node_target} cannot be blank.'
                 assert isinstance(keyword, (int, float, str)), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {type(keyword)}: {keyword}.\nKeywords must be comma-separated values of type str, int, or float.\nE.g., myemld.set_keywords("firstkeyword", "secondkeyword")'
 
-            node_xpath = LOOKUPS['keywords']['node_xpath']
-            node_target= LOOKUPS['keywords']['node_target']
-            parent= LOOKUPS['keywords']['parent']
-            values = LOOKUPS['keywords']['values_dict']
-            values['keywordSet']['keyword'] = keywords
+            if vocabulary is None:
+                values = {'keywordSet': {'keyword': [str(keyword) for keyword in keywords]}}
+            else:
+                unknown = [str(keyword) for keyword in keywords if not vocabulary.validate(str(keyword))]
+                if strict == True and len(unknown) > 0:
+                    hints = []
+                    for keyword in unknown:
+                        suggestions = vocabulary.complete(keyword[:3], limit=5)
+                        hints.append(f'"{keyword}"' + (f' (did you mean {suggestions}?)' if suggestions else ''))
+                    hints = '\n'.join(hints)
+                    assert False, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}These keywords are not in any thesaurus of `vocabulary`:\n{hints}\nUse a term from {list(vocabulary.thesauri.keys())} or call `set_keywords()` with strict=False.'
+                values = {'keywordSet': vocabulary.keyword_sets(keywords)}
 
             if self.interactive == True:
                 quiet=False
@@ -306,6 +348,7 @@ class Emld():
                 quiet=True
 
             self._set_node(values=values, node_target=node_target, node_xpath=node_xpath, parent=parent, quiet=quiet)
+            self._keyword_index = None # the keywordSets were rebuilt; `_keywords()` re-indexes them on next use
 
             if self.interactive == True:
                 print(f'\n{bcolors.OKBLUE + bcolors.BOLD + bcolors.UNDERLINE}Success!\n\n{bcolors.ENDC}`{bcolors.BOLD}{node_target}{bcolors.ENDC}` updated.')
@@ -331,10 +374,87 @@ class Emld():
             else:
                 quiet=True
             self._delete_node(node_xpath=node_xpath, node_target=node_target, quiet=quiet)  
+            self._keyword_index = None
 
         except:
             print('error delete_keywords()')
 
+    def add_keywords(self, *keywords, vocabulary=None, strict:bool=False):
+        """Add keywords to the dataset's keywords, skipping ones it already has
+
+        Unlike `set_keywords()`, existing keywords are left in place: each new keyword is one `keyword` element inserted into its `keywordSet`.
+
+        Args:
+            *keywords (str, arbitrary argument): `add_keywords()` accepts any number of comma-separated arguments
+            vocabulary (src.pyEML.vocab.Vocabulary, optional): Controlled vocabularies to check keywords against. Matching keywords are replaced by their preferred terms and added to their thesaurus' `keywordSet`. Defaults to None (keywords are added as given, to the `keywordSet` without a `keywordThesaurus`).
+            strict (bool, optional): With `vocabulary`, True refuses keywords that aren't in any thesaurus. Defaults to False.
+
+        Returns:
+            list: The keywords that were added, as written.
+
+        Examples:
+            myemld.add_keywords('birds', 'vegetation')
+        """
+        try:
+            node_target= LOOKUPS['keywords']['node_target']
+            for keyword in keywords:
+                assert keyword not in ('', None) and str(keyword).strip() != '', f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{keyword}". {node_target} cannot be blank.'
+                assert isinstance(keyword, (int, float, str)), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {type(keyword)}: {keyword}.\nKeywords must be comma-separated values of type str, int, or float.\nE.g., myemld.add_keywords("firstkeyword", "secondkeyword")'
+            assert self.root.find(LOOKUPS['keywords']['parent']) is not None, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}Your `Emld` has no `dataset` node to hold keywords.'
+
+            matches = [(keyword, None) for keyword in keywords]
+            if vocabulary is not None:
+                matches = [vocabulary.lookup(str(keyword)) or (keyword, None) for keyword in keywords]
+                unknown = [str(keyword) for keyword, match in zip(keywords, matches) if match[1] is None]
+                assert strict == False or len(unknown) == 0, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}These keywords are not in any thesaurus of `vocabulary`: {unknown}.\nUse a term from {list(vocabulary.thesauri.keys())} or call `add_keywords()` with strict=False.'
+
+            index = self._keywords()
+            added = [normalize_keyword(keyword) for keyword, thesaurus in matches if index.add(keyword, thesaurus=thesaurus)]
+
+            if self.interactive == True:
+                print(f'\n{bcolors.OKBLUE + bcolors.BOLD + bcolors.UNDERLINE}Success!\n\n{bcolors.ENDC}{len(added)} `{bcolors.BOLD}{node_target}{bcolors.ENDC}` added; {len(matches) - len(added)} already present.')
+            return added
+
+        except AssertionError as a:
+            print(a)
+
+    def remove_keywords(self, *keywords):
+        """Remove keywords from the dataset's keywords, skipping ones it doesn't have
+
+        Every `keyword` element holding a keyword (a dataset may repeat one) is unlinked from its `keywordSet`; a `keywordSet` left with no keywords is removed.
+
+        Args:
+            *keywords (str, arbitrary argument): `remove_keywords()` accepts any number of comma-separated arguments. Case and spacing must match the dataset's keywords.
+
+        Returns:
+            list: The keywords that were removed, as written.
+
+        Examples:
+            myemld.remove_keywords('birds')
+        """
+        index = self._keywords()
+        removed = [normalize_keyword(keyword) for keyword in keywords if index.remove(keyword)]
+        if self.interactive == True:
+            print(f'\n{bcolors.OKBLUE + bcolors.BOLD + bcolors.UNDERLINE}Success!\n\n{bcolors.ENDC}{len(removed)} `{bcolors.BOLD}{LOOKUPS["keywords"]["node_target"]}{bcolors.ENDC}` removed; {len(keywords) - len(removed)} not found.')
+        return removed
+
+    def has_keyword(self, keyword, vocabulary=None):
+        """Check whether the dataset has a keyword
+
+        Args:
+            keyword (str, int, or float): The keyword. Case and spacing must match the dataset's keyword.
+            vocabulary (src.pyEML.vocab.Vocabulary, optional): Check for the keyword's preferred term instead, so alternate terms match too. Defaults to None.
+
+        Returns:
+            bool: True if it does.
+
+        Examples:
+            myemld.has_keyword('birds')
+        """
+        if vocabulary is not None:
+            keyword = vocabulary.canonicalize(str(keyword)) or keyword
+        return keyword in self._keywords()
+
     def get_publisher(self):
         """Get the dataset's publisher
 
@@ -1775,11 +1895,13 @@ class Emld():
         """Set the dataset's language
         
         Args:
-            languge (str): The language that you want to assign to your dataset. Example: 'english' or 'spanish'
+            languge (str): The language that you want to assign to your dataset, as an English ISO 639 name or an ISO 639-1, 639-2, or 639-3 code.
+                Case and accents don't matter. Example: 'english', 'Norwegian Bokmal', 'es', or 'spa'
 
         Examples:
             myemld.set_language(language='english')
             myemld.set_language(language='spanish')
+            myemld.set_language(language='ES')
         """
         try:
             node_xpath = LOOKUPS['language']['node_xpath']
@@ -1788,12 +1910,16 @@ class Emld():
             values = LOOKUPS['language']['values_dict']
             assert language not in ('', None, 'NA', 'Na', 'NaN'), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{language}". `{node_target}` cannot be blank.'
             assert isinstance(language, str), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {type(language)}: "{language}". `{node_target}` must be type str.'
-            assert len(language) >= 3, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{language}". {bcolors.BOLD}`{node_target}`{bcolors.ENDC} must be at least three characters.'
+            assert len(language) >= 2, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{language}". {bcolors.BOLD}`{node_target}`{bcolors.ENDC} must be at least two characters.'
 
-             # API call to retrieve ISO 3-letter abbreviation for a language
-            language_obj = iso639.languages.get(name=language.title()) # api call
-            language_title = language_obj.part3 # parse api result
-            assert len(language_title) == 3, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}"{language}" was not found in the `{bcolors.BOLD}ISO 639-2 language database{bcolors.ENDC}`.\nExamples of valid languages: "english", "spanish".\nA full list of valid languages is at https://www.loc.gov/standards/iso639-2/php/code_list.php'
+            # ISO 639-3 code for a language name or code; the index is built on the first call
+            language_title = lookup_language(language)
+            hint = 'Examples of valid languages: "english", "spanish".'
+            if language_title is None:
+                suggestions = suggest_languages(language)
+                if len(suggestions) > 0:
+                    hint = 'Did you mean: ' + ', '.join(f'"{name}"' for name, _, _ in suggestions) + '?'
+            assert language_title is not None, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}"{language}" was not found in the `{bcolors.BOLD}ISO 639 language database{bcolors.ENDC}`.\n{hint}\nA full list of valid languages is at https://iso639-3.sil.org/code_tables/639/data'
 
             values['language'] = language_title
 
@@ -1860,44 +1986,61 @@ class Emld():
         except:
             print('problem get_geographic_coverage()')
 
-    def set_nps_geographic_coverage(self, *unit_codes:str):
+    def set_nps_geographic_coverage(self, *unit_codes:str, polygons:bool=False, max_vertices:int=GPOLYGON_MAX_VERTICES, tolerance:float=None, method:str='douglas-peucker'):
         """Retrieve bounding box coordinates for NPS parks and assign coordinates as geographic coverage
 
+        A bounding box overstates coverage for long, thin parks (e.g., parkways). `polygons=True` also writes each park's outline as `datasetGPolygon` rings,
+        simplified to at most `max_vertices` vertices so that the xml stays small.
+
         Args:
             *unit_codes (str, arbitrary argument): `set_nps_geographic_coverage()` accepts any number of comma-separated arguments. Each argument is one four-character USNPS park code. E.g., set_nps_geographic_coverage("GLAC", "ACAD")
+            polygons (bool, optional): True adds `datasetGPolygon` rings to each park's coverage. Defaults to False.
+            max_vertices (int, optional): The vertex budget for each park's rings (at least 4). Defaults to `src.pyEML.constants.GPOLYGON_MAX_VERTICES`.
+            tolerance (float, optional): Also drop detail finer than `tolerance` decimal degrees. Defaults to None, which simplifies to the budget only.
+            method (str, optional): 'douglas-peucker' or 'visvalingam'. See `src.pyEML.geometry_pack.simplify_geometry()`. Defaults to 'douglas-peucker'.
 
         Examples:
             myemld.set_nps_geographic_coverage('GLAC', 'ACAD')
+            myemld.set_nps_geographic_coverage('BLRI', polygons=True, max_vertices=200)
         """
+        node_target= LOOKUPS['geographic_coverage']['node_target']
         try:
-            for unit in unit_codes:
-                assert unit not in ('', None, 'NA', 'Na', 'NaN'), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{unit}". `{node_target}` cannot be blank.'
-                assert isinstance(unit, str), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {type(unit)}: "{unit}". `{node_target}` must be type str.'
-                assert len(unit) == 4, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{unit}". {bcolors.BOLD}`{node_target}`{bcolors.ENDC} must be four characters.\nE.g., "GLAC", "ACAD"'
+            self._check_unit_codes(unit_codes=unit_codes, node_target=node_target)
+            self._check_gpolygon_options(polygons=polygons, max_vertices=max_vertices, method=method)
 
-            # API call
-            geog_cov = self._content_units_api(unit_codes)
+            # geometry pack lookup, then API call; raises rather than returning partial or empty coverage
+            geog_cov = self._content_units_api(unit_codes, polygons=polygons, max_vertices=max_vertices, tolerance=tolerance, method=method)
+            self._apply_nps_geographic_coverage(geog_cov=geog_cov)
 
-            node_xpath = LOOKUPS['geographic_coverage']['node_xpath']
-            node_target= LOOKUPS['geographic_coverage']['node_target']
-            parent= LOOKUPS['geographic_coverage']['parent']
-            values = LOOKUPS['geographic_coverage']['values_dict']
-            values['geographicCoverage'] = geog_cov
+        except AssertionError as a:
+            print(a)
+        except ExternalServiceError as e: # existing coverage is left as it was
+            print(e.msg)
 
-            if self.interactive == True:
-                quiet=False
-            else:
-                quiet=True
+    async def aset_nps_geographic_coverage(self, *unit_codes:str, polygons:bool=False, max_vertices:int=GPOLYGON_MAX_VERTICES, tolerance:float=None, method:str='douglas-peucker'):
+        """Retrieve bounding box coordinates for NPS parks and assign coordinates as geographic coverage, without blocking the event loop
 
-            self._set_node(values=values, node_target=node_target, node_xpath=node_xpath, parent=parent, quiet=quiet)
+        The `asyncio` version of `set_nps_geographic_coverage()`. Units missing from the geometry pack are fetched with native `asyncio` requests.
+        Don't edit the same `Emld` from other tasks while this call is awaiting.
 
-            if self.interactive == True:
-                print(f'\n{bcolors.OKBLUE + bcolors.BOLD + bcolors.UNDERLINE}Success!\n\n{bcolors.ENDC}`{bcolors.BOLD}{node_target}{bcolors.ENDC}` updated.')
-                self.get_geographic_coverage()
+        Args:
+            *unit_codes (str, arbitrary argument): Any number of four-character USNPS park codes. E.g., aset_nps_geographic_coverage("GLAC", "ACAD")
+            polygons, max_vertices, tolerance, method: As in `set_nps_geographic_coverage()`.
 
+        Examples:
+            await myemld.aset_nps_geographic_coverage('GLAC', 'ACAD')
+        """
+        node_target= LOOKUPS['geographic_coverage']['node_target']
+        try:
+            self._check_unit_codes(unit_codes=unit_codes, node_target=node_target)
+            self._check_gpolygon_options(polygons=polygons, max_vertices=max_vertices, method=method)
+            geog_cov = await self._acontent_units_api(unit_codes, polygons=polygons, max_vertices=max_vertices, tolerance=tolerance, method=method)
+            self._apply_nps_geographic_coverage(geog_cov=geog_cov)
 
         except AssertionError as a:
             print(a)
+        except ExternalServiceError as e: # existing coverage is left as it was
+            print(e.msg)
 
     def set_geographic_coverage(self, coverage:list):
         """Set the dataset's geographic coverage
@@ -2131,6 +2274,7 @@ class Emld():
         Examples:
             myemld.set_nps_producing_units('GLAC', 'ACAD')
         """
+        node_target= LOOKUPS['geographic_coverage']['node_target']
         try:
             for unit in unit_codes:
                 assert unit not in ('', None, 'NA', 'Na', 'NaN'), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{unit}". `{node_target}` cannot be blank.'
@@ -2234,25 +2378,94 @@ class Emld():
     def _get_size(self):
         """Get the size of an `Emld` element tree
 
+        The size is the number of bytes `write_eml()` would write. Serialization runs in libxml2, so this is fast
+        and, unlike walking python object referents, it accounts for the data that libxml2 holds outside the python heap.
+
         Returns:
-            int: The size, in bytes, of the `Emld` element tree
+            int: The size, in bytes, of the `Emld` element tree serialized as EML-formatted xml
 
         Examples:
             myemld._get_size()
         """
-        # adapted from: https://stackoverflow.com/questions/449560/how-do-i-determine-the-size-of-an-object-in-python
-        seen_ids = set()
-        size = 0
-        objects = [self.root]
-        while objects:
-            need_referents = []
-            for obj in objects:
-                if id(obj) not in seen_ids:
-                    seen_ids.add(id(obj))
-                    size += sys.getsizeof(obj)
-                    need_referents.append(obj)
-            objects = gc.get_referents(*need_referents)
-        return size
+        return len(etree.tostring(self.tree, pretty_print=True, xml_declaration=True, encoding='UTF-8'))
+
+    def get_size_report(self):
+        """Get a size and memory report for the `Emld`
+
+        Reports the serialized size of the document, its element, attribute, and text totals,
+        the same totals for each top-level section (each child of `./dataset` and each other child of the root),
+        and an estimate of the native (libxml2) memory that the element tree occupies.
+
+        Args:
+            None
+
+        Returns:
+            dict: If self.interactive == False. Keys are 'serialized_bytes', 'elements', 'attributes', 'text_bytes',
+                'native_bytes_estimate', and 'sections'. 'sections' maps an xpath to that section's 'elements', 'attributes', and 'text_bytes'.
+
+        Examples:
+            myemld.get_size_report()
+        """
+        try:
+            sections = {}
+            for child in self.root:
+                if not isinstance(child.tag, str): # skip comments and processing instructions
+                    continue
+                if child.tag == 'dataset':
+                    for grandchild in child:
+                        if isinstance(grandchild.tag, str):
+                            self._count_section(node=grandchild, node_xpath=f'./dataset/{grandchild.tag}', sections=sections)
+                else:
+                    self._count_section(node=child, node_xpath=f'./{child.tag}', sections=sections)
+
+            # the document totals come from the whole tree, so they include the root, `./dataset` itself, and anything between sections
+            totals = {}
+            self._count_section(node=self.root, node_xpath='.', sections=totals)
+            totals = totals['.']
+            report = {
+                'serialized_bytes': self._get_size(),
+                'elements': totals['elements'],
+                'attributes': totals['attributes'],
+                'text_bytes': totals['text_bytes'],
+                'native_bytes_estimate': None,
+                'sections': sections
+            }
+            text_nodes = totals['text_nodes']
+            report['native_bytes_estimate'] = LIBXML2_DOC_BYTES \
+                + report['elements'] * LIBXML2_NODE_BYTES \
+                + report['attributes'] * (LIBXML2_ATTR_BYTES + LIBXML2_NODE_BYTES) \
+                + text_nodes * LIBXML2_NODE_BYTES \
+                + report['text_bytes']
+            for section in sections.values():
+                del section['text_nodes']
+
+            if self.interactive == True:
+                print(json.dumps(report, indent=4))
+            else:
+                return report
+
+        except:
+            print('error get_size_report()')
+
+    def _count_section(self, node:etree._Element, node_xpath:str, sections:dict):
+        """Add the element, attribute, text-node, and text-byte counts of the subtree at `node` to `sections[node_xpath]`
+
+        Args:
+            node (lxml.etree._Element): The root of the section's subtree.
+            node_xpath (str): The key under which the counts are accumulated. Repeated sections (e.g., two `creator` nodes) share one key.
+            sections (dict): The running totals for each section.
+        """
+        counts = sections.setdefault(node_xpath, {'elements': 0, 'attributes': 0, 'text_bytes': 0, 'text_nodes': 0})
+        for elm in node.iter():
+            if isinstance(elm.tag, str):
+                counts['elements'] += 1
+                counts['attributes'] += len(elm.attrib)
+                for value in elm.attrib.values():
+                    counts['text_bytes'] += len(value.encode('utf-8'))
+            for text in (elm.text, elm.tail):
+                if text:
+                    counts['text_nodes'] += 1
+                    counts['text_bytes'] += len(text.encode('utf-8'))
 
     def describe_attributes(self):
         """Print the xml attribute pick-list
@@ -2358,46 +2571,80 @@ class Emld():
         except:
             print('error_make_nps()')
         
-    def _content_units_api(self, unit_codes:tuple):
-        try:
-            # An API call to NPS Rest Services to get
-            polygon_holder = dict() # decimal degrees of all polygon points for each `unit`
-            bbox_holder = dict() # bounding box (max & min lat & lon) for each `unit`
-            geog_cov = dict() # the bounding box(es) in the format that EML requires
-            for unit in unit_codes:
-                # loop over each `unit` in `unit_codes`
-                api_url = 'https://irmaservices.nps.gov/v2/rest/unit/' + str(unit) + '/geography'
-                if self.interactive == True:
-                    print(f'API call for {str(unit)}... {api_url}')
-                contents = urllib.request.urlopen(api_url).read()
-                contents = xmltodict.parse(urllib.request.urlopen(api_url).read())
-                contents = contents["ArrayOfUnitGeography"]["UnitGeography"]["Geography"]
-                contents = contents.replace(',', '').replace('\']', '').replace('[\'', '').replace('POLYGON ((', '').replace('))', '').split()
-                park_geom = pd.DataFrame()
-                park_geom["lat"] = contents[1::2] # Elements from list1 starting from 1 iterating by 2
-                park_geom["lon"] = contents[::2]
-                polygon_holder[unit] = park_geom
-                # split into decimal degree bounding box
-                bbox_holder[unit] = {
-                'N': max(polygon_holder[unit]["lat"]),
-                'E': min(polygon_holder[unit]["lon"]),
-                'S': min(polygon_holder[unit]["lat"]),
-                'W': max(polygon_holder[unit]["lon"])
+    def _content_units_api(self, unit_codes:tuple, polygons:bool=False, **simplify):
+        # bounding boxes come from the offline geometry pack; units missing from it are fetched from NPS Rest Services
+        # lookup failures raise `ExternalServiceError` (after retries, or at once if the service's circuit breaker is open)
+        if self.interactive == True:
+            quiet=False
+        else:
+            quiet=True
+        bbox_holder = get_unit_bounding_boxes(units=[str(unit) for unit in unit_codes], quiet=quiet, polygons=polygons) # bounding box (max & min lat & lon) for each `unit`
+        return self._units_to_coverage(unit_codes=unit_codes, bbox_holder=bbox_holder, **simplify)
+
+    async def _acontent_units_api(self, unit_codes:tuple, polygons:bool=False, **simplify):
+        # `asyncio` version of `_content_units_api()`; simplification is CPU-bound, so it runs in the default executor
+        if self.interactive == True:
+            quiet=False
+        else:
+            quiet=True
+        bbox_holder = await aget_unit_bounding_boxes(units=[str(unit) for unit in unit_codes], quiet=quiet, polygons=polygons)
+        return await asyncio.to_thread(self._units_to_coverage, unit_codes=unit_codes, bbox_holder=bbox_holder, **simplify)
+
+    def _units_to_coverage(self, unit_codes:tuple, bbox_holder:dict, max_vertices:int=GPOLYGON_MAX_VERTICES, tolerance:float=None, method:str='douglas-peucker'):
+        geog_cov = dict() # the bounding box(es) in the format that EML requires
+        for unit in unit_codes:
+            # build EML geographic coverage dict for each unit
+            geog_cov[unit] = {
+                'geographicDescription': 'NPS Content Unit Link: ' + unit,
+                'boundingCoordinates': {
+                    'northBoundingCoordinate': str(bbox_holder[str(unit)]["north"]),
+                    'eastBoundingCoordinate': str(bbox_holder[str(unit)]["east"]),
+                    'southBoundingCoordinate': str(bbox_holder[str(unit)]["south"]),
+                    'westBoundingCoordinate': str(bbox_holder[str(unit)]["west"])
                 }
-                # build EML geographic coverage dict for each unit
-                geog_cov[unit] = {
-                    'geographicDescription': 'NPS Content Unit Link: ' + unit,
-                    'boundingCoordinates': {
-                        'northBoundingCoordinate': bbox_holder[unit]["N"],
-                        'eastBoundingCoordinate': bbox_holder[unit]["E"],
-                        'southBoundingCoordinate': bbox_holder[unit]["S"],
-                        'westBoundingCoordinate': bbox_holder[unit]["W"]
+            }
+            if 'polygon' in bbox_holder[str(unit)]:
+                # one `datasetGPolygon` per polygon of the park's outline, simplified to the vertex budget
+                geometry = simplify_geometry(bbox_holder[str(unit)]['polygon'], tolerance=tolerance, max_vertices=max_vertices, method=method)
+                geog_cov[unit]['datasetGPolygon'] = [
+                    {
+                        'datasetGPolygonOuterGRing': {'gRing': rings[0]},
+                        'datasetGPolygonExclusionGRing': [{'gRing': hole} for hole in rings[1:]]
                     }
-                }
-            return geog_cov
-        except:
-            print('API call failed')
-    
+                    for rings in geometry.to_grings()
+                ]
+        return geog_cov
+
+    def _check_gpolygon_options(self, polygons:bool, max_vertices:int, method:str):
+        assert isinstance(polygons, bool), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {type(polygons)}: "{polygons}". `polygons` must be type bool.'
+        if polygons:
+            assert isinstance(max_vertices, int) and max_vertices >= 4, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{max_vertices}". `max_vertices` must be an int of at least 4.'
+            assert method in SIMPLIFY_METHODS, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{method}". `method` must be one of {SIMPLIFY_METHODS}.'
+
+    def _check_unit_codes(self, unit_codes:tuple, node_target:str):
+        for unit in unit_codes:
+            assert unit not in ('', None, 'NA', 'Na', 'NaN'), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{unit}". `{node_target}` cannot be blank.'
+            assert isinstance(unit, str), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {type(unit)}: "{unit}". `{node_target}` must be type str.'
+            assert len(unit) == 4, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{unit}". {bcolors.BOLD}`{node_target}`{bcolors.ENDC} must be four characters.\nE.g., "GLAC", "ACAD"'
+
+    def _apply_nps_geographic_coverage(self, geog_cov:dict):
+        node_xpath = LOOKUPS['geographic_coverage']['node_xpath']
+        node_target= LOOKUPS['geographic_coverage']['node_target']
+        parent= LOOKUPS['geographic_coverage']['parent']
+        values = dict(LOOKUPS['geographic_coverage']['values_dict']) # a copy, so concurrent edits of different `Emld`s don't share coverage
+        values['geographicCoverage'] = geog_cov
+
+        if self.interactive == True:
+            quiet=False
+        else:
+            quiet=True
+
+        self._set_node(values=values, node_target=node_target, node_xpath=node_xpath, parent=parent, quiet=quiet)
+
+        if self.interactive == True:
+            print(f'\n{bcolors.OKBLUE + bcolors.BOLD + bcolors.UNDERLINE}Success!\n\n{bcolors.ENDC}`{bcolors.BOLD}{node_target}{bcolors.ENDC}` updated.')
+            self.get_geographic_coverage()
+
     def _set_version(self):
         # 1. create a <emlEditor> node at self.emld['additionalMetadata']["metadata"]["emlEditor"]
         # 2. assign value src.pyEML.constants.CURRENT_RELEASE to emlEditor.text
@@ -2509,59 +2756,11 @@ class Emld():
         Args:
             citation_parts (dict): A dictionary of citation pieces. E.g., author names, date, title.
             style (str, optional): The style of citation to generate. E.g., 'chicago'. `style` validated against src.pyEML.constants.CITATION_STYLES
+
+        Returns:
+            str: The citation, formatted by `src.pyEML.citations.format_citation()`.
         """
-        try:
-            if style == 'chicago':
-                citation = self._make_chicago(citation_parts=citation_parts)
-                return citation
-        except:
-            print('error _make_citation()')
-    
-    def _make_chicago(self, citation_parts:dict):
-        try:
-            new_citation_parts = {}
-            if 'authors' in citation_parts.keys():
-                author_list = []
-                for element in citation_parts['authors']:
-                    author = []
-                    if 'first' in element.keys():
-                        firstname = element['first'].capitalize()
-                        author.append(firstname)
-                    if 'middle' in element.keys():
-                        middleinitial = element['middle'][0].upper()
-                        middleinitial = middleinitial + '.'
-                        author.append(middleinitial)
-                    if 'last' in element.keys():
-                        lastname = element['last'].capitalize()
-                        author.append(lastname)
-                    author_list.append(author)
-                finalnames = []
-                for name in author_list:
-                    finalname = ' '.join(name)
-                    finalnames.append(finalname)
-                new_citation_parts['authors'] = ', '.join(finalnames)
-            if 'date' in citation_parts.keys():
-                citation_date = citation_parts.get('date').strftime("%Y")
-                new_citation_parts['date'] = citation_date
-            if 'title' in citation_parts.keys():
-                citation_title = citation_parts.get('title')
-                new_citation_parts['title'] = citation_title
-            if 'doc_type' in citation_parts.keys():
-                citation_doc_type = citation_parts.get('doc_type')
-                new_citation_parts['doc_type'] = citation_doc_type
-            if 'version' in citation_parts.keys():
-                citation_version = citation_parts.get('version')
-                new_citation_parts['version'] = f'Version {citation_version}'
-            if 'url' in citation_parts.keys():
-                citation_url = citation_parts.get('url')
-                new_citation_parts['url'] = f'version {citation_url}'
-            if 'etc' in citation_parts.keys():
-                citation_etc = citation_parts.get('etc')
-                new_citation_parts['etc'] = citation_etc
-            new_citation = '. '.join(map(str, new_citation_parts.values()))
-            return new_citation
-        except:
-            print('error _make_chicago()')
+        return format_citation(citation_parts=citation_parts, style=style)
     
     def _old_serialize(self, node:etree._Element, depth:int=0):
         """Starts at a given node, crawls all of its sub-nodes, pretty-prints tags and text to console
@@ -2596,6 +2795,15 @@ class Emld():
                     self._serialize(elm, depth+1)
             print(f'{spaces}</{node.tag}>')
 
+    def _keywords(self):
+        """Get the `KeywordIndex` of the dataset's keywords, indexing them on first use
+
+        `set_keywords()` and `delete_keywords()` rebuild the keywordSets, so they drop the index.
+        """
+        if self._keyword_index is None:
+            self._keyword_index = KeywordIndex(self.root)
+        return self._keyword_index
+
     def _delete_node(self, node_xpath:str, node_target:str, quiet:bool):
         """Deletes the value(s) at a node
 
@@ -2953,6 +3161,214 @@ class Emld():
             newvalues = self._rebuild_values(new_values=newvalues, values=values, nodes_to_build=nodes_to_build)
             self._serialize_nodes(_dict = newvalues, target_node=parent_node)
 
+    def diff(self, other):
+        """Compare this `Emld` to another `Emld` and list the edits between them
+
+        Builds a structural edit script (inserts, deletes, text and tail updates, and attribute updates) that turns
+        this `Emld`'s element tree into `other`'s element tree. Unchanged subtrees are matched by hash and skipped,
+        and whitespace around text is ignored, so re-indented documents don't produce noise.
+        See `src.pyEML.diff.diff_trees()` for the structure of each edit.
+
+        Args:
+            other (Emld): The revised `Emld` to compare against.
+
+        Returns:
+            list: A list of dicts, one per edit. Empty if the two trees are equivalent.
+
+        Examples:
+            old_emld = Emld(filepath='old_metadata.xml', INTERACTIVE=False)
+            new_emld = Emld(filepath='new_metadata.xml', INTERACTIVE=False)
+            edits = old_emld.diff(new_emld)
+        """
+        try:
+            assert isinstance(other, Emld), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {type(other)}.\n`other` must be an `{bcolors.BOLD}Emld{bcolors.ENDC}`.'
+            edits = diff_trees(self.root, other.root)
+
+            if self.interactive == True:
+                if len(edits) == 0:
+                    print(f'{bcolors.OKBLUE + bcolors.BOLD + bcolors.UNDERLINE}No differences.{bcolors.ENDC}')
+                else:
+                    print(f'{bcolors.BOLD}{len(edits)}{bcolors.ENDC} difference(s):')
+                    print('----------')
+                    for edit in edits:
+                        if edit['op'] in ('update_text', 'update_tail'):
+                            print(f'{bcolors.OKBLUE}{edit["op"]}{bcolors.ENDC} {edit["path"]}: "{edit["old"]}" -> "{edit["new"]}"')
+                        elif edit['op'] == 'update_attribute':
+                            print(f'{bcolors.OKBLUE}{edit["op"]}{bcolors.ENDC} {edit["path"]}@{edit["attribute"]}: "{edit["old"]}" -> "{edit["new"]}"')
+                        elif edit['op'] == 'insert':
+                            print(f'{bcolors.OKGREEN}{edit["op"]}{bcolors.ENDC} {edit["path"]}')
+                        else:
+                            print(f'{bcolors.FAIL}{edit["op"]}{bcolors.ENDC} {edit["path"]}')
+            return edits
+
+        except AssertionError as a:
+            print(a)
+
+    def subset(self, *sections:str):
+        """Make a new, independent `Emld` that holds only some sections of this one
+
+        Each requested section is copied with its ancestor nodes (so its xpath is unchanged) and nothing else.
+        Subsets are useful for shipping a small piece of work to another process; see `to_wire()`.
+
+        Args:
+            *sections (str, arbitrary argument): `subset()` accepts any number of comma-separated `LOOKUPS` keys. E.g., subset("title", "keywords")
+
+        Returns:
+            Emld: A new `Emld` containing only the requested sections.
+
+        Examples:
+            mysubset = myemld.subset('title', 'keywords', 'geographic_coverage')
+        """
+        try:
+            assert len(sections) > 0, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided no sections.\nE.g., myemld.subset("title", "keywords")'
+            for section in sections:
+                assert section in LOOKUPS.keys(), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{section}".\nEach section must be one of: {", ".join(LOOKUPS.keys())}.'
+
+            selected = []
+            for section in sections:
+                for node in self.root.findall(LOOKUPS[section]['node_xpath']):
+                    if node not in selected:
+                        selected.append(node)
+            positions = {elm: i for i, elm in enumerate(self.root.iter())}
+            selected.sort(key=lambda elm: positions[elm]) # keep document order
+
+            if self.blob_store is None:
+                new_root = etree.Element(self.root.tag, self.root.attrib, nsmap=self.root.nsmap)
+            else: # keep spilled text loadable in the subset
+                new_root = make_root(tag=self.root.tag, attrib=self.root.attrib, nsmap=self.root.nsmap)
+            copies = {self.root: new_root} # maps each original ancestor to its copy in the subset
+            for node in selected:
+                ancestors = [anc for anc in node.iterancestors()][::-1] # root first
+                for anc in ancestors:
+                    if anc not in copies:
+                        anc_copy = etree.SubElement(copies[anc.getparent()], anc.tag, anc.attrib)
+                        copies[anc] = anc_copy
+                node_copy = deepcopy(node)
+                node_copy.tail = None
+                copies[node.getparent()].append(node_copy)
+
+            new_emld = Emld._from_tree(tree=new_root.getroottree(), xml_src=self.xml_src, interactive=self.interactive, blob_store=self.blob_store)
+            if self.interactive == True:
+                print(f'\n{bcolors.OKBLUE + bcolors.BOLD + bcolors.UNDERLINE}Success!\n\n{bcolors.ENDC}`{bcolors.BOLD}Emld{bcolors.ENDC}` subset created with {len(selected)} node(s): {", ".join(sections)}.')
+            return new_emld
+
+        except AssertionError as a:
+            print(a)
+
+    def to_wire(self):
+        """Serialize the `Emld` to a compact, picklable byte string
+
+        The wire form is zlib-compressed xml, which is much smaller than the element tree and, unlike lxml elements,
+        can be sent to other processes. Spilled text (see `spill_threshold`) is streamed back into the wire form.
+        Rebuild an `Emld` from the wire form with `Emld.from_wire()`.
+
+        Returns:
+            bytes: The compressed xml.
+
+        Examples:
+            wire = myemld.subset('title', 'keywords').to_wire()
+            newemld = Emld.from_wire(wire)
+        """
+        xml = etree.tostring(self.tree, xml_declaration=True, encoding='UTF-8')
+        if self.blob_store is not None and self.blob_store.spilled > 0:
+            buffer = io.BytesIO()
+            write_blobs(xml=xml, f=buffer)
+            xml = buffer.getvalue()
+        return zlib.compress(xml)
+
+    @classmethod
+    def from_wire(cls, wire:bytes, INTERACTIVE:bool=False):
+        """Rebuild an `Emld` from the wire form made by `to_wire()`
+
+        Args:
+            wire (bytes): The output of `to_wire()`.
+            INTERACTIVE (bool): Turns on status messages and overwrite detection. Default is False, because wire forms are usually rebuilt in worker processes.
+
+        Returns:
+            Emld: A new `Emld`.
+
+        Examples:
+            newemld = Emld.from_wire(wire)
+        """
+        parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+        root = etree.fromstring(zlib.decompress(wire), parser)
+        return cls._from_tree(tree=root.getroottree(), xml_src=None, interactive=INTERACTIVE)
+
+    @classmethod
+    async def aload(cls, filepath:str, INTERACTIVE:bool=False, executor=None, **kwargs):
+        """Create an `Emld` from an EML-formatted xml file without blocking the event loop
+
+        Parsing runs in `executor`, so an `asyncio` service can load many documents while it keeps serving other requests.
+        It runs in a copy of the caller's context, so an active `src.pyEML.profiling.profile_memory()` session records it.
+
+        Args:
+            filepath (str): Filepath and name for the source-xml that is parsed to an element tree.
+            INTERACTIVE (bool, optional): Turns on status messages and overwrite detection. Defaults to False, because async callers are usually services, not interactive sessions.
+            executor (concurrent.futures.Executor, optional): Where parsing runs. Defaults to None, which uses the event loop's default thread pool.
+            **kwargs: Passed to the `Emld` constructor (e.g., `spill_threshold`).
+
+        Returns:
+            Emld: A new `Emld`.
+
+        Examples:
+            myemld = await Emld.aload('data/short_input.xml')
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, contextvars.copy_context().run, functools.partial(cls, filepath, INTERACTIVE, **kwargs))
+
+    @classmethod
+    def _from_tree(cls, tree:etree._ElementTree, xml_src:str, interactive:bool, blob_store:BlobStore=None):
+        """Build an `Emld` around an element tree that is already in memory
+
+        Skips parsing and `_set_version()`, which the tree already went through when its source `Emld` was created.
+        """
+        emld = cls.__new__(cls)
+        emld.xml_src = xml_src
+        emld.interactive = interactive
+        emld.blob_store = blob_store
+        emld.memory_profile = None
+        emld._keyword_index = None
+        emld.tree = tree
+        emld.root = tree.getroot()
+        return emld
+
+    def __getstate__(self):
+        # lxml elements can't be pickled; pickle the wire form instead
+        return {'xml_src': self.xml_src, 'interactive': self.interactive, 'wire': self.to_wire()}
+
+    def __setstate__(self, state:dict):
+        emld = Emld.from_wire(state['wire'], INTERACTIVE=state['interactive'])
+        self.__dict__.update(emld.__dict__)
+        self.xml_src = state['xml_src']
+
+    def memory_report(self):
+        """Get the peak and net python allocation of each public method called on this `Emld`
+
+        Requires memory profiling, which is turned on with `Emld(filepath, profile_memory=True)`.
+        To profile many `Emld`s at once (e.g., a batch job), use `src.pyEML.profiling.profile_memory()` instead.
+
+        Args:
+            None
+
+        Returns:
+            dict: If self.interactive == False. Keyed by method name, heaviest first. Each value holds 'calls', 'peak_bytes',
+                'total_peak_bytes', and 'net_bytes'. See `src.pyEML.profiling.MemoryProfile`.
+
+        Examples:
+            myemld = Emld(filepath='data/short_input.xml', profile_memory=True)
+            myemld.set_title(title='my new title')
+            myemld.memory_report()
+        """
+        try:
+            assert self.memory_profile is not None, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}Memory profiling is off for this `{bcolors.BOLD}Emld{bcolors.ENDC}`.\nCreate your `Emld` with `Emld(filepath, profile_memory=True)` to turn it on.'
+            if self.interactive == True:
+                self.memory_profile.print_report()
+            else:
+                return self.memory_profile.report()
+
+        except AssertionError as a:
+            print(a)
+
     def show_overview(self, node_xpath:str=None):
         """Pretty-print up to three levels of xml tags and text
 
@@ -3000,11 +3416,36 @@ class Emld():
         try:
             assert filename.endswith('.xml'),  f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{filename}".\n`filename` must end in ".xml".'
         
-            self.tree.write(filename, pretty_print=True, xml_declaration=True, encoding='UTF-8')
+            if self.blob_store is not None and self.blob_store.spilled > 0:
+                # serialize the (small) tree with placeholders, then stream each spilled blob from disk into the file
+                xml = etree.tostring(self.tree, pretty_print=True, xml_declaration=True, encoding='UTF-8')
+                write_blobs_to_file(xml=xml, filename=filename)
+            else:
+                self.tree.write(filename, pretty_print=True, xml_declaration=True, encoding='UTF-8')
         
         except AssertionError as a:
             print(a)
 
+    async def awrite_eml(self, filename:str, executor=None):
+        """Write EML-formatted xml file without blocking the event loop
+
+        Serializing and writing run in `executor`, in a copy of the caller's context. Don't edit this `Emld` from other tasks while the write is awaiting.
+
+        Args:
+            filename (str): the filename and filepath where you want to save your EML-formatted xml.
+            executor (concurrent.futures.Executor, optional): Where the write runs. Defaults to None, which uses the event loop's default thread pool.
+
+        Examples:
+            await myemld.awrite_eml(filename='test_output.xml')
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, contextvars.copy_context().run, self.write_eml, filename)
+
+# wrap each public `Emld` method (and the constructor) so that memory profiling can record it; see `src.pyEML.profiling`
+for _name, _method in list(vars(Emld).items()):
+    if inspect.isfunction(_method) and not inspect.iscoroutinefunction(_method) and (not _name.startswith('_') or _name == '__init__') and _name != 'memory_report':
+        setattr(Emld, _name, track_memory(_method))
+
 """Copyright (C) 2023 Charles Wainright, US National Park Service
 
 Permission is hereby granted, free of charge, to any person obtaining a copy of
@@ -78,4 +78,51 @@ class InvalidDataStructure(Exception):
         self.msg = bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE + 'Process execution failed.\n' + bcolors.ENDC \
             + bcolors.FAIL + f'\n`{problem_val}`' + bcolors.FAIL + ' does not exist. \n'\
             + bcolors.OKBLUE + f'Enter a value for `{problem_val}` with ' + f'`set_{problem_val}()`' + bcolors.ENDC
-    
\ No newline at end of file
+    
+
+class ExternalServiceError(Exception):
+    """Custom error handling for external http services that could not be reached or kept failing
+
+    Args:
+        Exception (class): parent class
+
+    Examples:
+        try:
+            status, headers, body = default_client.get('irma_unit_geography', url)
+        except ExternalServiceError as e:
+            print(e.msg)
+    """
+    def __init__(self, endpoint:str, url:str, problem_val:str):
+        """Produces `self.msg` which is a str that is printed to console for interactive sessions
+
+        Args:
+            endpoint (str): The name of the service that failed. E.g., 'irma_unit_geography'.
+            url (str): The url that was requested.
+            problem_val (str): The last error. Used to produce f-strings in `self.msg`.
+        """
+        super().__init__(f'{endpoint}: {problem_val} ({url})')
+        self.endpoint = endpoint
+        self.url = url
+        self.msg = bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE + 'Process execution failed.\n' + bcolors.ENDC \
+            + bcolors.FAIL + f'\nThe external service `{endpoint}` failed: ' + bcolors.WARNING + f'{problem_val}\n' \
+            + bcolors.FAIL + f'Requested: {url}\n' \
+            + bcolors.OKBLUE + 'Nothing was changed. Try again later.' + bcolors.ENDC
+
+class CircuitOpenError(ExternalServiceError):
+    """Custom error handling for calls refused because an external service failed repeatedly and its circuit breaker is open
+
+    Args:
+        ExternalServiceError (class): parent class
+    """
+    def __init__(self, endpoint:str, retry_in:float):
+        """Produces `self.msg` which is a str that is printed to console for interactive sessions
+
+        Args:
+            endpoint (str): The name of the service whose circuit breaker is open.
+            retry_in (float): Seconds until the breaker lets a trial request through.
+        """
+        super().__init__(endpoint, None, f'too many recent failures; skipped for another {retry_in:.0f} seconds')
+        self.retry_in = retry_in
+        self.msg = bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE + 'Process execution failed.\n' + bcolors.ENDC \
+            + bcolors.FAIL + f'\nThe external service `{endpoint}` failed repeatedly and is being skipped for another {retry_in:.0f} seconds.\n' \
+            + bcolors.OKBLUE + 'Nothing was changed. Try again later.' + bcolors.ENDC
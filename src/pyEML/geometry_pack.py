@@ -0,0 +1,541 @@
+"""Python source module for an offline pack of NPS unit geometries
+
+`geometry_pack.py` keeps a local SQLite file of precomputed bounding boxes and simplified polygons,
+one row per NPS unit code, so that `Emld.set_nps_geographic_coverage()` works without a network.
+Lookups read the pack first (it is loaded into memory once, so a lookup is a dict access) and fall
+back to the IRMA API for units that are not in it; units fetched that way are added to the pack. The default pack
+only holds answers from the NPS IRMA service; answers from another server (e.g., `src.pyEML.irma_standin`) are never saved to it.
+`simplify_geometry()` reduces outlines to a tolerance or a vertex budget (vectorized Douglas-Peucker or
+Visvalingam-Whyatt), e.g., for EML `datasetGPolygon` rings.
+`refresh_pack()` rebuilds the pack from the API when a network is available:
+
+    python -m src.pyEML.geometry_pack refresh GLAC ACAD ANTI
+    python -m src.pyEML.geometry_pack refresh          # every unit already in the pack
+    python -m src.pyEML.geometry_pack info
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import asyncio
+import heapq
+import os
+import sqlite3
+import threading
+import time
+import lxml.etree as etree
+import numpy as np
+from src.pyEML.constants import GEOMETRY_PACK_PATH, GEOMETRY_PACK_TOLERANCE, GEOMETRY_PACK_VERSION
+from src.pyEML.error_classes import ExternalServiceError
+from src.pyEML import unit_api
+from src.pyEML.wkt import WktGeometry, parse_wkt
+
+#: simplification methods that `simplify_geometry()` understands
+SIMPLIFY_METHODS = ('douglas-peucker', 'visvalingam')
+
+class GeometryPack():
+    """A versioned SQLite file of NPS unit bounding boxes and simplified polygons"""
+
+    def __init__(self, path:str=GEOMETRY_PACK_PATH):
+        """Constructor for class GeometryPack
+
+        Args:
+            path (str, optional): The SQLite file. Created on first write. Defaults to `src.pyEML.constants.GEOMETRY_PACK_PATH`.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._units = None # unit code: row dict; loaded from `path` on first lookup
+
+    def lookup(self, unit:str):
+        """Get one unit's precomputed geometry
+
+        Args:
+            unit (str): A four-character NPS unit code. E.g., "GLAC".
+
+        Returns:
+            dict: 'north', 'east', 'south', 'west' (float, decimal degrees), 'polygon' (str, simplified WKT), and 'fetched_at' (float, epoch seconds).
+                None if the unit is not in the pack.
+        """
+        return self._load().get(unit.upper())
+
+    def units(self):
+        """Get every unit code in the pack
+
+        Returns:
+            list: Unit codes, sorted.
+        """
+        return sorted(self._load().keys())
+
+    def info(self):
+        """Describe the pack
+
+        Returns:
+            dict: 'path', 'version' (None if the file doesn't exist or has another schema version), 'built_at' (epoch seconds of the last write), and 'units' (count).
+        """
+        meta = self._read_meta()
+        version = meta.get('version')
+        return {
+            'path': self.path,
+            'version': int(version) if version == str(GEOMETRY_PACK_VERSION) else None,
+            'built_at': float(meta['built_at']) if 'built_at' in meta else None,
+            'units': len(self._load())
+        }
+
+    def store(self, geographies:dict, tolerance:float=GEOMETRY_PACK_TOLERANCE):
+        """Add or replace units in the pack
+
+        Args:
+            geographies (dict): WKT strings (the IRMA `Geography` text) or parsed `src.pyEML.wkt.WktGeometry`s, keyed by unit code.
+            tolerance (float, optional): Douglas-Peucker tolerance, in decimal degrees, for the stored polygons. Defaults to `src.pyEML.constants.GEOMETRY_PACK_TOLERANCE`.
+
+        Returns:
+            dict: The new rows, keyed by unit code.
+        """
+        now = time.time()
+        rows = {}
+        for unit, wkt in geographies.items():
+            geometry = parse_wkt(wkt) if isinstance(wkt, str) else wkt
+            north, east, south, west = geometry.extent()
+            rows[unit.upper()] = {'north': north, 'east': east, 'south': south, 'west': west, 'polygon': simplify_wkt(geometry, tolerance), 'fetched_at': now}
+        if len(rows) == 0:
+            return rows
+
+        directory = os.path.dirname(self.path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            connection = sqlite3.connect(self.path)
+            try:
+                with connection:
+                    self._create(connection)
+                    connection.executemany(
+                        'INSERT OR REPLACE INTO units (unit, north, east, south, west, polygon, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        [(unit, row['north'], row['east'], row['south'], row['west'], row['polygon'], row['fetched_at']) for unit, row in rows.items()]
+                        )
+                    connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built_at', ?)", (str(now),))
+            finally:
+                connection.close()
+            if self._units is not None:
+                self._units.update(rows)
+        return rows
+
+    def _load(self):
+        """Read every row into memory once; a missing file or a pack with another schema version reads as empty"""
+        if self._units is not None:
+            return self._units
+        with self._lock:
+            if self._units is None:
+                units = {}
+                if self._read_meta().get('version') == str(GEOMETRY_PACK_VERSION):
+                    connection = sqlite3.connect(self.path)
+                    try:
+                        for unit, north, east, south, west, polygon, fetched_at in connection.execute('SELECT unit, north, east, south, west, polygon, fetched_at FROM units'):
+                            units[unit] = {'north': north, 'east': east, 'south': south, 'west': west, 'polygon': polygon, 'fetched_at': fetched_at}
+                    finally:
+                        connection.close()
+                self._units = units
+        return self._units
+
+    def _read_meta(self):
+        if not os.path.exists(self.path):
+            return {}
+        connection = sqlite3.connect(self.path)
+        try:
+            return dict(connection.execute('SELECT key, value FROM meta'))
+        except sqlite3.DatabaseError: # not a pack, or a pack without a meta table
+            return {}
+        finally:
+            connection.close()
+
+    def _create(self, connection):
+        """Create the tables, discarding any rows written under another schema version"""
+        connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        version = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is not None and version[0] != str(GEOMETRY_PACK_VERSION):
+            connection.execute('DROP TABLE IF EXISTS units')
+            self._units = {}
+        connection.execute('CREATE TABLE IF NOT EXISTS units (unit TEXT PRIMARY KEY, north REAL, east REAL, south REAL, west REAL, polygon TEXT, fetched_at REAL)')
+        connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(GEOMETRY_PACK_VERSION),))
+
+#: the pack that `get_unit_bounding_boxes()` uses when no `pack` is passed; None turns the pack off
+default_pack = GeometryPack()
+
+def set_default_pack(path:str=GEOMETRY_PACK_PATH, enabled:bool=True):
+    """Configure the geometry pack that `get_unit_bounding_boxes()` uses by default
+
+    Args:
+        path (str, optional): The SQLite file. Defaults to `src.pyEML.constants.GEOMETRY_PACK_PATH`.
+        enabled (bool, optional): False turns the pack off, so every lookup goes to the API. Defaults to True.
+
+    Examples:
+        set_default_pack(path='/data/pyEML/nps_unit_geometry.sqlite')
+    """
+    global default_pack
+    default_pack = GeometryPack(path=path) if enabled else None
+
+def get_unit_bounding_boxes(units:list, pack:GeometryPack=None, quiet:bool=True, polygons:bool=False):
+    """Get bounding boxes for NPS units from the geometry pack, falling back to the IRMA API
+
+    Units missing from the pack are fetched concurrently with `src.pyEML.unit_api.get_unit_geographies()` and added to the pack.
+
+    Args:
+        units (list): Four-character NPS unit codes. E.g., ['GLAC', 'ACAD'].
+        pack (GeometryPack, optional): The pack to use. Defaults to `default_pack`, or to no pack while `src.pyEML.unit_api.set_unit_api_url()` points at another server than the NPS IRMA service.
+        quiet (bool, optional): False prints which units came from the pack and which from the API. Defaults to True.
+        polygons (bool, optional): True adds each unit's 'polygon' (str, WKT simplified at `src.pyEML.constants.GEOMETRY_PACK_TOLERANCE`). Defaults to False.
+
+    Returns:
+        dict: Keyed by unit code as given. Each value holds 'north', 'east', 'south', and 'west' (float, decimal degrees), and 'polygon' if `polygons` is True.
+
+    Raises:
+        ExternalServiceError: A unit is not in the pack and could not be fetched, or the service's answer could not be read.
+
+    Examples:
+        bboxes = get_unit_bounding_boxes(['GLAC', 'ACAD'])
+    """
+    pack = _pack_or_default(pack)
+    boxes, missing = _from_pack(units, pack, quiet, polygons)
+    if len(missing) > 0:
+        _from_bodies(unit_api.get_unit_geographies(units=missing, quiet=quiet), boxes, pack, polygons)
+    return {unit: boxes[unit] for unit in units}
+
+async def aget_unit_bounding_boxes(units:list, pack:GeometryPack=None, quiet:bool=True, polygons:bool=False):
+    """Get bounding boxes for NPS units without blocking the event loop
+
+    The `asyncio` version of `get_unit_bounding_boxes()`. Missing units are fetched with `src.pyEML.unit_api.aget_unit_geographies()`;
+    reading the pack, parsing geometries, and writing the pack run in the default executor.
+
+    Returns:
+        dict: Keyed by unit code as given. Each value holds 'north', 'east', 'south', and 'west' (float, decimal degrees), and 'polygon' if `polygons` is True.
+
+    Raises:
+        ExternalServiceError: A unit is not in the pack and could not be fetched, or the service's answer could not be read.
+
+    Examples:
+        bboxes = await aget_unit_bounding_boxes(['GLAC', 'ACAD'])
+    """
+    pack = _pack_or_default(pack)
+    boxes, missing = await asyncio.to_thread(_from_pack, units, pack, quiet, polygons)
+    if len(missing) > 0:
+        bodies = await unit_api.aget_unit_geographies(units=missing, quiet=quiet)
+        await asyncio.to_thread(_from_bodies, bodies, boxes, pack, polygons)
+    return {unit: boxes[unit] for unit in units}
+
+def _pack_or_default(pack:GeometryPack):
+    """`pack`, or the default pack if lookups go to the NPS IRMA service; another server's geometries (e.g., a stand-in's synthetic polygons) must not reach the shared pack"""
+    if pack is not None:
+        return pack
+    return default_pack if unit_api.is_nps_api() else None
+
+def _from_pack(units:list, pack:GeometryPack, quiet:bool, polygons:bool=False):
+    """Split `units` into bounding boxes found in `pack` and a list of units that are missing from it"""
+    keys = ('north', 'east', 'south', 'west', 'polygon') if polygons else ('north', 'east', 'south', 'west')
+    boxes = {}
+    missing = []
+    for unit in units:
+        row = pack.lookup(unit) if pack is not None else None
+        if row is None:
+            missing.append(unit)
+        else:
+            boxes[unit] = {key: row[key] for key in keys}
+    if quiet == False and len(boxes) > 0:
+        print(f'Using geometry pack for {", ".join(boxes.keys())}... {pack.path}')
+    return boxes, missing
+
+def _from_bodies(bodies:dict, boxes:dict, pack:GeometryPack, polygons:bool=False):
+    """Add bounding boxes (and simplified polygons) for freshly fetched IRMA responses to `boxes`, and add the units to `pack`"""
+    geometries = {}
+    for unit, body in bodies.items():
+        try:
+            geometries[unit] = parse_wkt(_geography_wkt(body))
+        except (ValueError, etree.XMLSyntaxError) as e:
+            raise ExternalServiceError(unit_api.ENDPOINT, unit_api.unit_api_url.format(unit=unit.upper()), f'unreadable geography: {e}')
+        north, east, south, west = geometries[unit].extent()
+        boxes[unit] = {'north': north, 'east': east, 'south': south, 'west': west}
+    rows = {}
+    if pack is not None:
+        try:
+            rows = pack.store(geometries)
+        except (OSError, sqlite3.Error): # a read-only pack still works for lookups
+            pass
+    if polygons:
+        for unit, geometry in geometries.items():
+            row = rows.get(unit.upper())
+            boxes[unit]['polygon'] = row['polygon'] if row is not None else simplify_wkt(geometry)
+
+def refresh_pack(units:list=None, pack:GeometryPack=None, tolerance:float=GEOMETRY_PACK_TOLERANCE, quiet:bool=False):
+    """Rebuild units in the geometry pack from the IRMA API
+
+    Every unit is revalidated with the server, even if the on-disk http cache (`src.pyEML.unit_api.default_cache`) considers it fresh.
+
+    Args:
+        units (list, optional): Four-character NPS unit codes. Defaults to None, which refreshes every unit already in the pack.
+        pack (GeometryPack, optional): The pack to rebuild. Defaults to `default_pack`, which can only be rebuilt from the NPS IRMA service.
+        tolerance (float, optional): Douglas-Peucker tolerance, in decimal degrees, for the stored polygons. Defaults to `src.pyEML.constants.GEOMETRY_PACK_TOLERANCE`.
+        quiet (bool, optional): False prints progress. Defaults to False.
+
+    Returns:
+        list: The unit codes that were refreshed.
+
+    Examples:
+        refresh_pack(['GLAC', 'ACAD', 'ANTI'])
+    """
+    if pack is None:
+        assert unit_api.is_nps_api(), f'Unit geography lookups go to {unit_api.unit_api_url}, not the NPS IRMA service. Pass `pack` to build a pack from another server.'
+        pack = default_pack if default_pack is not None else GeometryPack()
+    if units is None:
+        units = pack.units()
+    assert len(units) > 0, f'The geometry pack at {pack.path} is empty. Pass `units` to choose which units to add.'
+    cache = unit_api.default_cache
+    if cache is not None:
+        cache = unit_api.ResponseCache(directory=cache.directory, ttl=0) # revalidate every unit
+    bodies = unit_api.get_unit_geographies(units=[unit.upper() for unit in units], cache=cache, quiet=quiet)
+    pack.store({unit: _geography_wkt(body) for unit, body in bodies.items()}, tolerance=tolerance)
+    if quiet == False:
+        print(f'Refreshed {len(bodies)} units in {pack.path}')
+    return list(bodies.keys())
+
+def simplify_wkt(wkt, tolerance:float=GEOMETRY_PACK_TOLERANCE):
+    """Simplify every ring of a WKT geometry with Douglas-Peucker, keeping the geometry's structure
+
+    Args:
+        wkt (str or src.pyEML.wkt.WktGeometry): The WKT text, or an already-parsed geometry.
+        tolerance (float, optional): The largest distance, in decimal degrees, a dropped vertex may lie from the simplified ring. Defaults to `src.pyEML.constants.GEOMETRY_PACK_TOLERANCE`.
+
+    Returns:
+        str: The simplified WKT geometry.
+    """
+    return simplify_geometry(wkt, tolerance=tolerance).to_wkt()
+
+def simplify_geometry(wkt, tolerance:float=None, max_vertices:int=None, method:str='douglas-peucker'):
+    """Simplify a WKT geometry to a tolerance, a vertex budget, or both
+
+    With both, the coarser result wins: vertices within `tolerance` are always dropped, and more are dropped until the geometry fits `max_vertices`.
+    'douglas-peucker' adds vertices most-distant-first across every ring at once, so a budget is spent where the outline needs it most and the work stops when the budget is spent.
+    'visvalingam' removes the vertices with the smallest effective triangle areas, in vectorized rounds of non-adjacent vertices; it keeps smoother outlines at the same budget.
+
+    Args:
+        wkt (str or src.pyEML.wkt.WktGeometry): The WKT text, or an already-parsed geometry.
+        tolerance (float, optional): For 'douglas-peucker', the largest distance, in decimal degrees, a dropped vertex may lie from the simplified ring.
+            For 'visvalingam', vertices whose effective area is below `tolerance` squared are dropped. Defaults to None (no tolerance).
+        max_vertices (int, optional): The most vertices, across every ring, the simplified geometry may have (closing vertices count). Must be at least 4.
+            When the budget can't hold four vertices for every ring, the smallest rings are dropped (an exterior ring's holes go with it). Defaults to None (no budget).
+        method (str, optional): One of `SIMPLIFY_METHODS`. Defaults to 'douglas-peucker'.
+
+    Returns:
+        src.pyEML.wkt.WktGeometry: The simplified geometry. Closed rings keep at least four vertices.
+
+    Raises:
+        ValueError: `wkt` is text that `src.pyEML.wkt.parse_wkt()` can't read.
+
+    Examples:
+        geometry = simplify_geometry(wkt, max_vertices=500, method='visvalingam')
+        geometry.to_wkt()
+    """
+    assert method in SIMPLIFY_METHODS, f'`method` must be one of {SIMPLIFY_METHODS}; got "{method}".'
+    assert tolerance is not None or max_vertices is not None, 'Pass `tolerance`, `max_vertices`, or both.'
+    assert max_vertices is None or max_vertices >= 4, f'`max_vertices` must be at least 4; got {max_vertices}.'
+    geometry = parse_wkt(wkt) if isinstance(wkt, str) else wkt
+
+    # drop the smallest rings when the budget can't give every ring its four vertices
+    rings = _budget_rings(geometry, max_vertices)
+    all_rings = geometry.rings()
+    coords = np.concatenate([all_rings[ring] for ring in rings])
+    offsets = np.concatenate(([0], np.cumsum([len(all_rings[ring]) for ring in rings])))
+    if method == 'douglas-peucker':
+        keep = _douglas_peucker_keep(coords, offsets, tolerance, max_vertices)
+    else:
+        keep = _visvalingam_keep(coords, offsets, tolerance, max_vertices)
+
+    kept_rings = [coords[start:end][keep[start:end]] for start, end in zip(offsets[:-1], offsets[1:])]
+    _, ring_polygons = np.unique(geometry.ring_polygons[rings], return_inverse=True) # renumber polygons, in order
+    return WktGeometry(
+        coords=np.concatenate(kept_rings),
+        ring_offsets=np.concatenate(([0], np.cumsum([len(ring) for ring in kept_rings]))),
+        ring_polygons=ring_polygons.reshape(-1),
+        multi=geometry.multi
+        )
+
+def simplify_ring(points:list, tolerance:float):
+    """Douglas-Peucker simplification of one ring or line
+
+    Args:
+        points (list): (lon, lat) pairs.
+        tolerance (float): The largest distance a dropped vertex may lie from the simplified line.
+
+    Returns:
+        list: The kept (lon, lat) pairs, in order. A closed ring keeps at least four points.
+    """
+    if len(points) <= 4:
+        return list(points)
+    coords = np.asarray(points, dtype=np.float64)
+    keep = _douglas_peucker_keep(coords, np.array([0, len(coords)]), tolerance, None)
+    return [tuple(point) for point in coords[keep].tolist()]
+
+def _budget_rings(geometry:WktGeometry, max_vertices:int):
+    """Indices of the rings that fit in `max_vertices` at four vertices each, largest area first; returned in document order"""
+    offsets = geometry.ring_offsets
+    if max_vertices is None or 4 * (len(offsets) - 1) <= max_vertices:
+        return list(range(len(offsets) - 1))
+    x, y = geometry.coords[:, 0], geometry.coords[:, 1]
+    cross = x[:-1] * y[1:] - x[1:] * y[:-1]
+    cross = np.append(cross, 0)
+    ends = offsets[1:] - 1
+    cross[ends] = 0 # don't join the last vertex of one ring to the first of the next
+    areas = np.abs(np.add.reduceat(cross, offsets[:-1])) / 2
+
+    exteriors = set(np.flatnonzero(np.diff(np.concatenate(([-1], geometry.ring_polygons))) != 0).tolist()) # first ring of each polygon
+    kept = []
+    kept_polygons = set()
+    for ring in np.argsort(-areas, kind='stable').tolist():
+        if 4 * (len(kept) + 1) > max_vertices:
+            break
+        polygon = int(geometry.ring_polygons[ring])
+        if ring in exteriors:
+            kept_polygons.add(polygon)
+            kept.append(ring)
+        elif polygon in kept_polygons: # a hole whose exterior is kept
+            kept.append(ring)
+    return sorted(kept)
+
+def _ring_floors(coords:np.ndarray, offsets:np.ndarray):
+    """The fewest vertices each ring may keep: four for a closed ring, two (its ends) for a line"""
+    starts, ends = offsets[:-1], offsets[1:] - 1
+    closed = np.all(coords[starts] == coords[ends], axis=1)
+    return np.minimum(np.where(closed, 4, 2), ends - starts + 1)
+
+def _farthest(coords:np.ndarray, first:int, last:int):
+    """The vertex between `first` and `last` farthest from the line through them, and its distance; None if there is none"""
+    if last - first < 2:
+        return None
+    (x1, y1), (x2, y2) = coords[first], coords[last]
+    between = coords[first + 1:last]
+    dx, dy = x2 - x1, y2 - y1
+    length = (dx * dx + dy * dy) ** 0.5
+    if length == 0: # closed ring; measure from the shared endpoint
+        distances = np.hypot(between[:, 0] - x1, between[:, 1] - y1)
+    else:
+        distances = np.abs(dy * between[:, 0] - dx * between[:, 1] + x2 * y1 - y2 * x1) / length
+    i = int(distances.argmax())
+    return float(distances[i]), first + 1 + i
+
+def _douglas_peucker_keep(coords:np.ndarray, offsets:np.ndarray, tolerance:float, max_vertices:int):
+    """Best-first Douglas-Peucker over every ring at once; returns a keep mask for `coords`"""
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[offsets[:-1]] = keep[offsets[1:] - 1] = True
+    heap = []
+    for start, end, floor in zip(offsets[:-1].tolist(), (offsets[1:] - 1).tolist(), _ring_floors(coords, offsets).tolist()):
+        segments = [(start, end)]
+        for _ in range(floor - 2): # a closed ring's first two splits are kept whatever their distance
+            split = max(((_farthest(coords, a, b), a, b) for a, b in segments if b - a > 1), key=lambda item: item[0][0])
+            (_, i), a, b = split
+            keep[i] = True
+            segments.remove((a, b))
+            segments += [(a, i), (i, b)]
+        for a, b in segments:
+            farthest = _farthest(coords, a, b)
+            if farthest is not None:
+                heapq.heappush(heap, (-farthest[0], farthest[1], a, b))
+
+    remaining = np.inf if max_vertices is None else max_vertices - int(keep.sum())
+    while heap and remaining > 0:
+        distance, i, a, b = heapq.heappop(heap)
+        if tolerance is not None and -distance <= tolerance:
+            break
+        keep[i] = True
+        remaining -= 1
+        for first, last in ((a, i), (i, b)):
+            farthest = _farthest(coords, first, last)
+            if farthest is not None:
+                heapq.heappush(heap, (-farthest[0], farthest[1], first, last))
+    return keep
+
+def _visvalingam_keep(coords:np.ndarray, offsets:np.ndarray, tolerance:float, max_vertices:int):
+    """Visvalingam-Whyatt in vectorized rounds; each round removes non-adjacent vertices whose effective area is a local minimum"""
+    keep = np.ones(len(coords), dtype=bool)
+    ring_of = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    floors = _ring_floors(coords, offsets)
+    effective = np.zeros(len(coords)) # the largest area removed next to each vertex; areas never shrink below it
+    threshold = -np.inf if tolerance is None else tolerance * tolerance
+    x, y = coords[:, 0], coords[:, 1]
+    while True:
+        alive = np.flatnonzero(keep)
+        ring = ring_of[alive]
+        a, b, c = alive[:-2], alive[1:-1], alive[2:]
+        area = np.full(len(alive), np.inf) # ring ends are never removed
+        interior = (ring[:-2] == ring[1:-1]) & (ring[2:] == ring[1:-1])
+        triangles = np.abs((x[a] - x[c]) * (y[b] - y[a]) - (x[a] - x[b]) * (y[c] - y[a])) / 2
+        area[1:-1] = np.where(interior, np.maximum(triangles, effective[b]), np.inf)
+
+        # local minima are never adjacent, so they can all be removed in one round
+        left = np.concatenate(([np.inf], area[:-1]))
+        right = np.concatenate((area[1:], [np.inf]))
+        candidates = np.flatnonzero(np.isfinite(area) & (area < left) & (area <= right))
+        counts = np.bincount(ring, minlength=len(floors))
+        order = np.lexsort((area[candidates], ring[candidates]))
+        candidates = candidates[order]
+        candidate_rings = ring[candidates]
+        rank = np.arange(len(candidates)) - np.searchsorted(candidate_rings, candidate_rings) # position within its ring, smallest area first
+        candidates = candidates[rank < (counts - floors)[candidate_rings]]
+        candidates = candidates[np.argsort(area[candidates], kind='stable')]
+
+        excess = 0 if max_vertices is None else len(alive) - max_vertices
+        below = int(np.count_nonzero(area[candidates] < threshold))
+        remove = candidates[:max(excess, below)]
+        if len(remove) == 0:
+            return keep
+        keep[alive[remove]] = False
+        np.maximum.at(effective, alive[remove - 1], area[remove])
+        np.maximum.at(effective, alive[remove + 1], area[remove])
+
+def _geography_wkt(body:bytes):
+    """Pull the WKT out of an IRMA `ArrayOfUnitGeography` response; several `Geography` elements are combined into one MULTIPOLYGON"""
+    root = etree.fromstring(body)
+    geometries = [elm.text.strip() for elm in root.iter('{*}Geography') if elm.text]
+    if len(geometries) == 0:
+        raise ValueError('The IRMA response has no `Geography`.')
+    if len(geometries) == 1:
+        return geometries[0]
+    polygons = []
+    for wkt in geometries:
+        body = wkt[wkt.index('('):].strip()
+        polygons.append(body[1:-1].strip() if wkt.upper().startswith('MULTIPOLYGON') else body)
+    return 'MULTIPOLYGON (' + ', '.join(polygons) + ')'
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m src.pyEML.geometry_pack', description='Build or inspect the offline NPS unit geometry pack.')
+    parser.add_argument('--path', default=GEOMETRY_PACK_PATH, help='the SQLite pack file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    refresh_parser = subparsers.add_parser('refresh', help='rebuild units from the IRMA API')
+    refresh_parser.add_argument('units', nargs='*', help='unit codes; defaults to every unit already in the pack')
+    refresh_parser.add_argument('--tolerance', type=float, default=GEOMETRY_PACK_TOLERANCE, help='Douglas-Peucker tolerance in decimal degrees')
+    subparsers.add_parser('info', help='describe the pack')
+    args = parser.parse_args()
+    mypack = GeometryPack(path=args.path)
+    if args.command == 'refresh':
+        refresh_pack(units=args.units or None, pack=mypack, tolerance=args.tolerance)
+    else:
+        print(mypack.info())
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
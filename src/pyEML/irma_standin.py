@@ -0,0 +1,313 @@
+"""Python source module for a local stand-in of the NPS IRMA unit geography API
+
+`irma_standin.py` runs a small http server that answers `/v2/rest/unit/{unit}/geography` the way the IRMA
+service does. It serves `ArrayOfUnitGeography` xml fixtures recorded from the real service (see
+`record_fixtures()`) or synthetic ones, with configurable latency and injected failures, so that
+`Emld.set_nps_geographic_coverage()` and the cache, connection pool, and retry behaviour of
+`src.pyEML.unit_api` can be tested and benchmarked without a network. Each run is reproducible
+from its `seed`.
+
+No recorded fixtures ship with pyEML: recording needs the live service, and its responses may change. Record a set
+for your own tests with `record_fixtures()` where a network is available; without fixtures, every unit is answered
+with a synthetic polygon, which is what pyEML's own tests use.
+
+Point pyEML at a stand-in with `src.pyEML.unit_api.set_unit_api_url(server.url)`. Its responses are cached apart from
+the real service's, and fixture geometries are never saved to the default geometry pack:
+
+    with IrmaStandIn(latency=0.2, failure_rate=0.1) as server:
+        set_unit_api_url(server.url)
+        myemld.set_nps_geographic_coverage('ANTI', 'CATO', 'CHOH')
+        print(server.stats())
+
+Or from a shell: `python -m src.pyEML.irma_standin --port 8123 --latency 0.2 --failure-rate 0.1`
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import hashlib
+import http.server
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+
+#: the request path the stand-in answers; the same as the IRMA service's
+_PATH_PATTERN = re.compile(r'^/v2/rest/unit/([A-Za-z0-9]+)/geography/?$')
+#: the IRMA response envelope; `{geography}` is the unit's WKT
+FIXTURE_TEMPLATE = '<?xml version="1.0" encoding="utf-8"?><ArrayOfUnitGeography xmlns:i="http://www.w3.org/2001/XMLSchema-instance" xmlns="http://schemas.datacontract.org/2004/07/IRMA.Services.Rest.Models"><UnitGeography><Geography>{geography}</Geography><UnitCode>{unit}</UnitCode></UnitGeography></ArrayOfUnitGeography>'
+
+class IrmaStandIn():
+    """A local http server that stands in for the IRMA unit geography API"""
+
+    def __init__(self, fixtures:str=None, host:str='127.0.0.1', port:int=0, latency:float=0.0, jitter:float=0.0,
+                 failure_rate:float=0.0, failure_status:int=503, drop_rate:float=0.0, synthesize:bool=True,
+                 synthetic_vertices:int=1000, seed:int=0):
+        """Constructor for class IrmaStandIn
+
+        Args:
+            fixtures (str, optional): A directory of recorded responses named `<UNIT>.xml` (see `record_fixtures()`). Defaults to None.
+            host (str, optional): The interface to listen on. Defaults to '127.0.0.1'.
+            port (int, optional): The port to listen on. Defaults to 0, which picks a free port.
+            latency (float, optional): Seconds added before every response. Defaults to 0.0.
+            jitter (float, optional): Up to this many more seconds, drawn uniformly, added to `latency`. Defaults to 0.0.
+            failure_rate (float, optional): The share of requests (0 to 1) answered with `failure_status`. Defaults to 0.0.
+            failure_status (int, optional): The status of an injected failure. Defaults to 503.
+            drop_rate (float, optional): The share of requests (0 to 1) whose connection is closed without any response. Defaults to 0.0.
+            synthesize (bool, optional): True answers units that have no fixture with a synthetic polygon; False answers them with 404. Defaults to True.
+            synthetic_vertices (int, optional): Vertices in each synthetic polygon. Defaults to 1000.
+            seed (int, optional): Seeds latency jitter, failure injection, and synthetic polygons, so runs are reproducible. Defaults to 0.
+
+        Attributes:
+            url (str): The url template to pass to `src.pyEML.unit_api.set_unit_api_url()`. Set once the server starts.
+            requests (list): One dict per request received: 'unit', 'status' (None if dropped), 'conditional' (True if it carried a validator), and 'time'.
+        """
+        self.fixtures = fixtures
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.drop_rate = drop_rate
+        self.synthesize = synthesize
+        self.synthetic_vertices = synthetic_vertices
+        self.seed = seed
+        self.url = None
+        self.requests = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bodies = {} # unit code: response body; fixtures are read once
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Start serving in a background thread
+
+        Returns:
+            IrmaStandIn: self.
+        """
+        standin = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1' # keep-alive, like the real service
+
+            def do_GET(self):
+                standin._handle(self)
+
+            def log_message(self, format, *args): # keep test and benchmark output quiet
+                pass
+
+        class Server(http.server.ThreadingHTTPServer):
+            def handle_error(self, request, client_address):
+                if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)): # the client gave up or hung up; not the stand-in's problem
+                    return
+                super().handle_error(request, client_address)
+
+        self._server = Server((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        host, port = self._server.server_address[:2]
+        self.url = f'http://{host}:{port}/v2/rest/unit/{{unit}}/geography'
+        self._thread = threading.Thread(target=self._server.serve_forever, name='IrmaStandIn', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def stats(self):
+        """Summarize the requests received so far
+
+        Returns:
+            dict: 'requests' (total), 'units' (distinct units requested), 'conditional' (requests carrying a validator), and 'statuses' (count per response status; 'dropped' for dropped connections).
+        """
+        with self._lock:
+            requests = list(self.requests)
+        statuses = {}
+        for request in requests:
+            status = request['status'] if request['status'] is not None else 'dropped'
+            statuses[status] = statuses.get(status, 0) + 1
+        return {
+            'requests': len(requests),
+            'units': len(set(request['unit'] for request in requests)),
+            'conditional': sum(1 for request in requests if request['conditional']),
+            'statuses': statuses
+        }
+
+    def body(self, unit:str):
+        """Get the response body the stand-in serves for one unit
+
+        Args:
+            unit (str): A four-character NPS unit code.
+
+        Returns:
+            bytes: The response body. None if there is no fixture and `synthesize` is False.
+        """
+        unit = unit.upper()
+        with self._lock:
+            if unit not in self._bodies:
+                body = None
+                filename = os.path.join(self.fixtures, unit + '.xml') if self.fixtures is not None else None
+                if filename is not None and os.path.exists(filename):
+                    with open(filename, 'rb') as f:
+                        body = f.read()
+                elif self.synthesize:
+                    body = FIXTURE_TEMPLATE.format(geography=synthetic_polygon(unit, self.synthetic_vertices, self.seed), unit=unit).encode('utf-8')
+                self._bodies[unit] = body
+            return self._bodies[unit]
+
+    def _handle(self, handler):
+        """Answer one request: wait, maybe fail, then serve the unit's body or a 304"""
+        match = _PATH_PATTERN.match(handler.path.split('?')[0])
+        unit = match.group(1).upper() if match else None
+        conditional = handler.headers.get('If-None-Match') is not None or handler.headers.get('If-Modified-Since') is not None
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            draw = self._random.random()
+        if delay > 0:
+            time.sleep(delay)
+
+        if draw < self.drop_rate:
+            self._log(unit, None, conditional)
+            handler.close_connection = True
+            return
+        if draw < self.drop_rate + self.failure_rate:
+            self._send(handler, unit, self.failure_status, b'', conditional)
+            return
+        body = self.body(unit) if unit is not None else None
+        if body is None:
+            self._send(handler, unit, 404, b'', conditional)
+            return
+
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if handler.headers.get('If-None-Match') == etag:
+            self._send(handler, unit, 304, b'', conditional, {'ETag': etag})
+        else:
+            self._send(handler, unit, 200, body, conditional, {'ETag': etag, 'Content-Type': 'application/xml; charset=utf-8'})
+
+    def _send(self, handler, unit, status:int, body:bytes, conditional:bool, headers:dict=None):
+        self._log(unit, status, conditional) # before the response goes out, so a client that has its answer always finds the request logged
+        handler.send_response(status)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header('Date', formatdate(usegmt=True))
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        if len(body) > 0:
+            handler.wfile.write(body)
+
+    def _log(self, unit, status, conditional:bool):
+        with self._lock:
+            self.requests.append({'unit': unit, 'status': status, 'conditional': conditional, 'time': time.time()})
+
+def synthetic_polygon(unit:str, vertices:int=1000, seed:int=0):
+    """Make a deterministic, made-up polygon for a unit code
+
+    The polygon is a wobbly ring around a point inside the continental US that is derived from the unit code;
+    it has nothing to do with the unit's real boundary.
+
+    Args:
+        unit (str): A unit code.
+        vertices (int, optional): Vertices in the ring, not counting the closing vertex. Defaults to 1000.
+        seed (int, optional): Changes every polygon. Defaults to 0.
+
+    Returns:
+        str: WKT POLYGON text.
+    """
+    rng = random.Random(f'{unit.upper()}:{seed}')
+    lon, lat = rng.uniform(-124, -67), rng.uniform(25, 49)
+    radius = rng.uniform(0.05, 0.5)
+    points = []
+    for i in range(vertices):
+        angle = 2 * math.pi * i / vertices
+        r = radius * (1 + 0.2 * math.sin(5 * angle) + rng.uniform(-0.02, 0.02))
+        points.append(f'{lon + r * math.cos(angle):.6f} {lat + r * math.sin(angle):.6f}')
+    points.append(points[0])
+    return 'POLYGON ((' + ', '.join(points) + '))'
+
+def record_fixtures(units:list, directory:str, quiet:bool=False):
+    """Save live IRMA responses as fixtures for `IrmaStandIn`
+
+    Requires a network. Responses are fetched from the url currently set with `src.pyEML.unit_api.set_unit_api_url()`, bypassing the on-disk cache.
+
+    Args:
+        units (list): Four-character NPS unit codes.
+        directory (str): Where fixtures are saved, one `<UNIT>.xml` per unit.
+        quiet (bool, optional): False prints each unit as it is saved. Defaults to False.
+
+    Examples:
+        record_fixtures(['ANTI', 'CATO', 'CHOH', 'GWMP'], 'data/irma_fixtures')
+    """
+    from src.pyEML import unit_api # imported here so that the stand-in itself needs nothing from the client
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.TemporaryDirectory() as cache_directory: # an empty cache, so every unit is fetched
+        bodies = unit_api.get_unit_geographies(units=[unit.upper() for unit in units], cache=unit_api.ResponseCache(directory=cache_directory), quiet=True)
+    for unit, body in bodies.items():
+        with open(os.path.join(directory, unit + '.xml'), 'wb') as f:
+            f.write(body)
+        if quiet == False:
+            print(f'Saved {unit}... {os.path.join(directory, unit + ".xml")}')
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m src.pyEML.irma_standin', description='Serve a local stand-in for the NPS IRMA unit geography API.')
+    parser.add_argument('--fixtures', default=None, help='a directory of <UNIT>.xml fixtures')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8123)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added before every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='up to this many more seconds of latency')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='share of requests answered with --failure-status')
+    parser.add_argument('--failure-status', type=int, default=503)
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='share of requests whose connection is closed without a response')
+    parser.add_argument('--no-synthesize', action='store_true', help='answer units without a fixture with 404')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    server = IrmaStandIn(fixtures=args.fixtures, host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                         failure_rate=args.failure_rate, failure_status=args.failure_status, drop_rate=args.drop_rate,
+                         synthesize=not args.no_synthesize, seed=args.seed).start()
+    print(f'Serving {server.url}\nexport PYEML_IRMA_UNIT_API={server.url}\nCtrl-C to stop.')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+        print(server.stats())
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
@@ -0,0 +1,179 @@
+"""Python source module for editing an element tree's keywords as a set
+
+`keywords.py` holds `KeywordIndex`, an ordered set of a document's keywords that keeps a reference to each
+`keyword` element and to each `keywordSet`. Adding a keyword is a dict lookup and one element insert; removing
+one is a dict pop and one element unlink per copy of it; checking for one is a dict lookup. Nothing else in the tree is
+rebuilt, so tagging jobs that add a few keywords to thousands of documents cost a few microseconds per
+keyword. `Emld.add_keywords()`, `Emld.remove_keywords()`, and `Emld.has_keyword()` build one on first use.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import lxml.etree as etree
+from src.pyEML.constants import LOOKUPS
+
+#: xpath, relative to the EML root, of every `keywordSet`
+_KEYWORD_SET_XPATH = LOOKUPS['keywords']['node_xpath']
+
+def normalize_keyword(keyword):
+    """Normalize a keyword for the set: str, stripped, inner whitespace collapsed to one space
+
+    Args:
+        keyword (str, int, or float): A keyword.
+
+    Returns:
+        str: The normalized keyword. E.g., "forest ecology" for " forest  ecology".
+    """
+    return ' '.join(str(keyword).split())
+
+class KeywordIndex():
+    """An ordered set of an element tree's keywords, kept in sync with their `keyword` elements
+
+    Keywords are compared after `normalize_keyword()`. A keyword that a document repeats is one member of the set; the index keeps every one of its elements, so removing it removes them all.
+    The index only sees edits made through it; rebuild it after editing `keywordSet`s any other way.
+    """
+
+    def __init__(self, root:etree._Element):
+        """Constructor for class KeywordIndex
+
+        Args:
+            root (lxml.etree._Element): The root node of an EML element tree.
+        """
+        self.root = root
+        self._elements = {} # keyword: list of its `keyword` elements, in document order
+        self._sets = {} # thesaurus title (None for no `keywordThesaurus`): (keywordSet element, keywordThesaurus element or None)
+        self._counts = {} # keywordSet element: number of indexed `keyword` elements in it, in document order
+        for keyword_set in root.iterfind(_KEYWORD_SET_XPATH):
+            thesaurus = keyword_set.find('keywordThesaurus')
+            title = normalize_keyword(thesaurus.text or '') if thesaurus is not None else None
+            self._sets.setdefault(title, (keyword_set, thesaurus))
+            self._counts[keyword_set] = 0
+            for elm in keyword_set.iterfind('keyword'):
+                keyword = normalize_keyword(elm.text or '')
+                if keyword != '':
+                    self._elements.setdefault(keyword, []).append(elm)
+                    self._counts[keyword_set] += 1
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __contains__(self, keyword):
+        return normalize_keyword(keyword) in self._elements
+
+    def __iter__(self):
+        return iter(list(self._elements))
+
+    def add(self, keyword, thesaurus:str=None):
+        """Add a keyword, unless the tree already has it
+
+        Args:
+            keyword (str, int, or float): The keyword.
+            thesaurus (str, optional): The title of the thesaurus the keyword comes from. The keyword goes in the `keywordSet` whose `keywordThesaurus` is `thesaurus`,
+                which is made (after the last `keywordSet`, or at the end of `dataset`) if the tree doesn't have one. Defaults to None (the `keywordSet` without a `keywordThesaurus`).
+
+        Returns:
+            bool: True if the keyword was added; False if the tree already had it.
+
+        Raises:
+            ValueError: The keyword is blank, or the tree has no `dataset` node to hold a new `keywordSet`.
+        """
+        keyword = normalize_keyword(keyword)
+        if keyword == '':
+            raise ValueError('Keywords cannot be blank.')
+        if keyword in self._elements:
+            return False
+        if thesaurus is not None:
+            thesaurus = normalize_keyword(thesaurus)
+        keyword_set, thesaurus_elm = self._sets.get(thesaurus) or self._new_set(thesaurus)
+        elm = etree.Element('keyword')
+        elm.text = keyword
+        if thesaurus_elm is not None: # EML puts `keywordThesaurus` after the keywords
+            thesaurus_elm.addprevious(elm)
+        else:
+            keyword_set.append(elm)
+        self._elements[keyword] = [elm]
+        self._counts[keyword_set] += 1
+        return True
+
+    def remove(self, keyword):
+        """Remove a keyword, if the tree has it
+
+        Every `keyword` element that holds the keyword is removed. A `keywordSet` left with no keywords is removed too, because EML requires at least one.
+
+        Args:
+            keyword (str, int, or float): The keyword.
+
+        Returns:
+            bool: True if the keyword was removed; False if the tree didn't have it.
+        """
+        elms = self._elements.pop(normalize_keyword(keyword), None)
+        if elms is None:
+            return False
+        for elm in elms:
+            keyword_set = elm.getparent()
+            keyword_set.remove(elm)
+            self._counts[keyword_set] -= 1
+            if self._counts[keyword_set] == 0 and not any(child.tag == 'keyword' for child in keyword_set): # only blank keywords, which the index never held, would be left
+                del self._counts[keyword_set]
+                keyword_set.getparent().remove(keyword_set)
+                for title, (indexed_set, _) in list(self._sets.items()):
+                    if indexed_set is keyword_set:
+                        del self._sets[title]
+        return True
+
+    def thesaurus(self, keyword):
+        """Get the thesaurus title of a keyword's `keywordSet`
+
+        Args:
+            keyword (str, int, or float): The keyword.
+
+        Returns:
+            str: The title, or None if the keyword's `keywordSet` has no `keywordThesaurus` or the tree doesn't have the keyword. For a repeated keyword, the first one's.
+        """
+        elms = self._elements.get(normalize_keyword(keyword))
+        if elms is None:
+            return None
+        thesaurus = elms[0].getparent().find('keywordThesaurus')
+        return normalize_keyword(thesaurus.text or '') if thesaurus is not None else None
+
+    def _new_set(self, thesaurus:str):
+        """Make an empty `keywordSet` (with its `keywordThesaurus`, if any) after the last `keywordSet`, or at the end of `dataset`"""
+        keyword_set = etree.Element('keywordSet')
+        thesaurus_elm = None
+        if thesaurus is not None:
+            thesaurus_elm = etree.SubElement(keyword_set, 'keywordThesaurus')
+            thesaurus_elm.text = thesaurus
+        last_set = next(reversed(self._counts), None)
+        if last_set is not None:
+            last_set.addnext(keyword_set)
+        else:
+            dataset = self.root.find(LOOKUPS['keywords']['parent'])
+            if dataset is None:
+                raise ValueError('The tree has no `dataset` node to hold keywords.')
+            dataset.append(keyword_set)
+        self._sets[thesaurus] = (keyword_set, thesaurus_elm)
+        self._counts[keyword_set] = 0
+        return keyword_set, thesaurus_elm
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
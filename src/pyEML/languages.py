@@ -0,0 +1,237 @@
+"""Python source module for fast ISO 639 language lookups
+
+`languages.py` resolves free-text language names and codes to ISO 639-3 codes (the `part3` code that EML's
+`language` node holds). The first lookup builds one in-memory index over every ISO 639 name, inverted name,
+alternate name, alpha-2 and alpha-3 code, and the aliases in `src.pyEML.constants.LANGUAGE_ALIASES`; later
+lookups are one dict access. Keys are case- and accent-insensitive, so "english", "ENG", "en", and
+"Norwegian Bokmal" all resolve. A trigram index, built on first use, suggests close matches for misspellings.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+from collections import Counter
+import re
+import threading
+import unicodedata
+import iso639
+from src.pyEML.constants import LANGUAGE_ALIASES, LANGUAGE_SUGGESTIONS
+
+#: runs of anything but letters and digits; collapsed to one space when keys are normalized
+_SEPARATORS = re.compile(r'[\W_]+')
+#: a trailing parenthetical qualifier, e.g. " (macrolanguage)" or " (1453-)"
+_QUALIFIER = re.compile(r'\s*\([^)]*\)\s*$')
+
+def normalize_language_key(text:str):
+    """Normalize a language name or code for lookup: accents removed, case folded, punctuation and whitespace collapsed
+
+    Args:
+        text (str): A language name or code. E.g., "Norwegian Bokmål".
+
+    Returns:
+        str: The lookup key. E.g., "norwegian bokmal".
+    """
+    if not text.isascii():
+        text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    return _SEPARATORS.sub(' ', text.casefold()).strip()
+
+class LanguageIndex():
+    """An in-memory index from normalized ISO 639 names, codes, and aliases to ISO 639-3 codes"""
+
+    def __init__(self, aliases:dict=LANGUAGE_ALIASES):
+        """Constructor for class LanguageIndex
+
+        Nothing is built until the first lookup.
+
+        Args:
+            aliases (dict, optional): Extra names, keyed by name, whose values are ISO 639-3 codes. Defaults to `src.pyEML.constants.LANGUAGE_ALIASES`.
+        """
+        self.aliases = aliases
+        self._lock = threading.Lock()
+        self._keys = None # normalized key: part3 code
+        self._names = None # part3 code: ISO 639 reference name
+        self._grams = None # trigram: list of indices into `_gram_keys`
+        self._gram_keys = None # the name keys that `suggest()` ranks
+
+    def lookup(self, language:str):
+        """Resolve a language name or code to its ISO 639-3 code
+
+        Args:
+            language (str): An English ISO 639 name or alias (e.g., "spanish", "Castilian"), an ISO 639-1 code ("es"), or an ISO 639-2/3 code ("spa").
+
+        Returns:
+            str: The ISO 639-3 code, or None if `language` isn't in the index.
+        """
+        return self._load().get(normalize_language_key(language))
+
+    def name(self, code:str):
+        """Get the ISO 639 reference name of an ISO 639-3 code
+
+        Args:
+            code (str): An ISO 639-3 code. E.g., "nob".
+
+        Returns:
+            str: The reference name (e.g., "Norwegian Bokmål"), or None if `code` isn't an ISO 639-3 code.
+        """
+        self._load()
+        return self._names.get(code.lower())
+
+    def suggest(self, language:str, limit:int=LANGUAGE_SUGGESTIONS, min_score:float=0.3):
+        """Find the language names closest to a misspelled or unknown name
+
+        Names are compared by their shared trigrams (Dice coefficient), through an inverted trigram index that is built on first use.
+
+        Args:
+            language (str): The name to match. E.g., "englsh".
+            limit (int, optional): The most suggestions to return. Defaults to `src.pyEML.constants.LANGUAGE_SUGGESTIONS`.
+            min_score (float, optional): The lowest similarity, from 0 to 1, worth suggesting. Defaults to 0.3.
+
+        Returns:
+            list: (name, part3 code, score) tuples, best match first. One entry per part3 code.
+        """
+        grams, keys = self._load_grams()
+        query = _trigrams(normalize_language_key(language))
+        if len(query) == 0:
+            return []
+        shared = Counter()
+        for gram in query:
+            shared.update(grams.get(gram, ()))
+        codes = self._load()
+        ranked = sorted(((2 * count / (len(query) + len(keys[i][1])), keys[i][0]) for i, count in shared.items()), reverse=True)
+        suggestions = []
+        seen = set()
+        for score, key in ranked:
+            if score < min_score or len(suggestions) >= limit:
+                break
+            code = codes[key]
+            if code not in seen:
+                seen.add(code)
+                suggestions.append((self._names[code], code, round(score, 3)))
+        return suggestions
+
+    def _load(self):
+        """Build the key index once; later calls return it"""
+        if self._keys is not None:
+            return self._keys
+        with self._lock:
+            if self._keys is None:
+                keys = {}
+                names = {}
+                # major languages (with ISO 639-1 and 639-2 codes) claim shared names before minor ones
+                # ISO 639-2 collective codes (e.g., "Creoles and pidgins, English-based") have no ISO 639-3 code, so EML can't hold them
+                ranked = sorted((lang for lang in iso639.languages.languages if lang.part3 != ''), key=lambda lang: (lang.part1 == '', lang.part2b == ''))
+                for lang in ranked:
+                    names[lang.part3] = lang.name
+                # codes claim their keys first, then curated aliases, then names
+                for field in ('part3', 'part1', 'part2b', 'part2t'):
+                    for lang in ranked:
+                        code = getattr(lang, field)
+                        if code != '':
+                            keys.setdefault(code.lower(), lang.part3)
+                for alias, code in self.aliases.items():
+                    keys.setdefault(normalize_language_key(alias), code)
+                for lang in ranked:
+                    for text in [lang.name, lang.inverted] + [alternate for pair in lang.names for alternate in pair]:
+                        keys.setdefault(normalize_language_key(text), lang.part3)
+                for lang in ranked:
+                    # qualifiers are dropped last, so "Swahili (macrolanguage)" can't take a name that another language holds outright
+                    for text in (lang.name, lang.inverted):
+                        keys.setdefault(normalize_language_key(_QUALIFIER.sub('', text)), lang.part3)
+                keys.pop('', None)
+                self._names = names
+                self._keys = keys
+        return self._keys
+
+    def _load_grams(self):
+        """Build the trigram index over every name key (not codes) once"""
+        if self._grams is not None:
+            return self._grams, self._gram_keys
+        codes = self._load()
+        with self._lock:
+            if self._grams is None:
+                gram_keys = [(key, _trigrams(key)) for key in codes if len(key) > 3 or ' ' in key]
+                grams = {}
+                for i, (_, key_grams) in enumerate(gram_keys):
+                    for gram in key_grams:
+                        grams.setdefault(gram, []).append(i)
+                self._gram_keys = gram_keys
+                self._grams = grams
+        return self._grams, self._gram_keys
+
+def _trigrams(key:str):
+    """The set of character trigrams of a normalized key, padded so that word starts and ends count"""
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+#: the index that the module-level functions use; built on first lookup, once per process
+default_index = LanguageIndex()
+
+def lookup_language(language:str):
+    """Resolve a language name or code to its ISO 639-3 code with `default_index`
+
+    Args:
+        language (str): A name or ISO 639-1/2/3 code, in any case, with or without accents. E.g., "english", "EN", "eng".
+
+    Returns:
+        str: The ISO 639-3 code, or None if `language` isn't recognized.
+
+    Examples:
+        lookup_language('Norwegian Bokmal') # 'nob'
+    """
+    return default_index.lookup(language)
+
+def suggest_languages(language:str, limit:int=LANGUAGE_SUGGESTIONS):
+    """Find the ISO 639 names closest to an unrecognized language with `default_index`
+
+    Args:
+        language (str): The name to match. E.g., "spansh".
+        limit (int, optional): The most suggestions to return. Defaults to `src.pyEML.constants.LANGUAGE_SUGGESTIONS`.
+
+    Returns:
+        list: (name, part3 code, score) tuples, best match first.
+    """
+    return default_index.suggest(language, limit=limit)
+
+def normalize_languages(values):
+    """Resolve many language names or codes to ISO 639-3 codes at once
+
+    Each distinct value is normalized once, so a corpus' worth of language fields (mostly repeats of a few languages) costs about one dict access per value.
+
+    Args:
+        values (iterable): Language names or codes (e.g., the `get_language()` text of every document in a corpus). None and blank values pass through as None.
+
+    Returns:
+        list: ISO 639-3 codes in the order of `values`; None where a value isn't recognized.
+
+    Examples:
+        normalize_languages(['English', 'eng', 'en', 'Espanol', None]) # ['eng', 'eng', 'eng', None, None]
+    """
+    resolved = {}
+    codes = []
+    for value in values:
+        if value not in resolved:
+            resolved[value] = default_index.lookup(value) if isinstance(value, str) and value.strip() != '' else None
+        codes.append(resolved[value])
+    return codes
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
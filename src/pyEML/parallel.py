@@ -0,0 +1,111 @@
+"""Python source module for finding EML files and reading many of them in worker processes
+
+`parallel.py` holds the pieces that every corpus-level reader shares: `walk_xml()` finds the .xml files under a
+directory, `xml_filepaths()` turns a directory or a list of files into a list of filepaths, and `map_files()`
+runs a per-file function over them, in a pool of worker processes when there are enough files to be worth it.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+from src.pyEML.error_classes import bcolors
+
+def walk_xml(root_dir:str, skip:tuple=()):
+    """Find every .xml file under a directory, at any depth
+
+    Directories whose names start with "." are skipped.
+
+    Args:
+        root_dir (str): The directory.
+        skip (tuple, optional): Directories not to descend into (e.g., an index directory inside `root_dir`). Defaults to ().
+
+    Yields:
+        tuple: (path relative to `root_dir` with "/" separators, filepath, os.stat_result), depth-first.
+    """
+    skip = {os.path.abspath(directory) for directory in skip}
+    stack = [(root_dir, '')]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.') and os.path.abspath(entry.path) not in skip:
+                        stack.append((entry.path, prefix + entry.name + '/'))
+                elif entry.name.endswith('.xml') and entry.is_file():
+                    yield prefix + entry.name, entry.path, entry.stat()
+
+def xml_filepaths(filepaths):
+    """List the files a corpus-level function was asked to read
+
+    Args:
+        filepaths (str or list): A directory (every .xml file under it, at any depth; directories whose names start with "." are skipped), or a list of .xml filepaths.
+
+    Returns:
+        list: Filepaths. Sorted, for a directory; in the order given, for a list.
+
+    Raises:
+        AssertionError: `filepaths` is a str but not a directory, or a listed filepath doesn't end in ".xml". The message is formatted for the console.
+    """
+    if isinstance(filepaths, str):
+        assert os.path.isdir(filepaths), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{filepaths}".\n`filepaths` must be a directory or a list of .xml filepaths.'
+        return sorted(filepath for _, filepath, _ in walk_xml(filepaths))
+    filepaths = list(filepaths)
+    for filepath in filepaths:
+        assert isinstance(filepath, str) and filepath.endswith('.xml'), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{filepath}".\nEach filepath must end in ".xml".'
+    return filepaths
+
+def map_files(items:list, fn, max_workers:int=None):
+    """Run `fn` over `items`, in a pool of worker processes if there is more than one item and worker
+
+    Items are sent to workers several at a time, to amortize inter-process communication. `fn` must be a module-level
+    function, so that it can be pickled and sent to worker processes; its results must be picklable too.
+
+    Args:
+        items (list): The arguments, one per call (e.g., filepaths).
+        fn (function): The per-item function.
+        max_workers (int, optional): The number of worker processes. 1 runs in the current process. Defaults to `os.cpu_count()`.
+
+    Returns:
+        iterator: `fn`'s results, in the order of `items`, produced as they are ready. The pool shuts down once the iterator is exhausted or closed.
+
+    Raises:
+        AssertionError: `max_workers` isn't an int of at least 1. The message is formatted for the console.
+    """
+    if max_workers is not None:
+        assert isinstance(max_workers, int) and max_workers >= 1, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided {max_workers}.\n`max_workers` must be an int of at least 1.'
+    items = list(items)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, max(len(items), 1))
+    if max_workers == 1:
+        return map(fn, items)
+    return _pool_map(items, fn, max_workers)
+
+def _pool_map(items:list, fn, max_workers:int):
+    chunksize = max(1, len(items) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(fn, items, chunksize=chunksize)
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
@@ -0,0 +1,183 @@
+"""Python source module for opt-in memory profiling of `Emld` operations
+
+`profiling.py` uses `tracemalloc` to record the peak and net python allocation of each public `Emld`
+method call. Profiling is off by default and costs one attribute check per call when it is off.
+Turn it on for one `Emld` with `Emld(filepath, profile_memory=True)` and read the results with
+`myemld.memory_report()`, or wrap a batch job in `with profile_memory() as profile:` to record every
+`Emld` method called inside the block.
+
+`tracemalloc` keeps one peak for the whole process, so profiled calls are serialized: while one thread is inside a
+profiled call, a profiled call in another thread (e.g., an `Emld.aload()` or `Emld.awrite_eml()` worker) waits for it.
+Allocations that unprofiled threads make during a profiled call are still counted in that call's numbers.
+
+`profile_memory` sessions are held in a `contextvars.ContextVar`. `Emld.aload()` and `Emld.awrite_eml()` run their work in
+a copy of the caller's context, so a session records the constructor and `write_eml()` calls they make on executor threads.
+A thread started with `threading.Thread` begins with an empty context; run its target with `contextvars.copy_context().run`
+to profile it in the caller's sessions. `async` methods themselves aren't measured, because other tasks run while they wait.
+
+Tracing is started by the first profiling owner (a `profile_memory` session or an `Emld(filepath, profile_memory=True)`)
+and stopped when the last one goes away, unless something else had started it.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import contextvars
+import functools
+import json
+import threading
+import tracemalloc
+from src.pyEML.error_classes import bcolors
+
+#: the active `profile_memory` sessions, as a tuple; copied into the contexts that `Emld`'s async methods run their work in
+_sessions = contextvars.ContextVar('pyEML_profile_memory_sessions', default=())
+#: per-thread profiling state: the depth of nested `Emld` calls
+_state = threading.local()
+#: held for the whole of each measured call, and while tracing starts and stops; `tracemalloc`'s peak is process-wide
+_tracemalloc_lock = threading.RLock()
+#: how many profiling owners (sessions and profiled `Emld`s) are alive, and whether tracing was started by one of them
+_tracing = {'owners': 0, 'started': False}
+
+class MemoryProfile():
+    """Running totals of python allocation for each profiled method"""
+
+    def __init__(self):
+        """Constructor for class MemoryProfile
+
+        Attributes:
+            methods (dict): Keyed by method name. Each value holds 'calls', 'peak_bytes' (the largest peak of any call),
+                'total_peak_bytes', and 'net_bytes' (allocated and still held after the calls returned, summed over calls).
+        """
+        self.methods = {}
+
+    def record(self, method:str, peak_bytes:int, net_bytes:int):
+        """Add one call's allocation to the running totals
+
+        Args:
+            method (str): The method's name.
+            peak_bytes (int): The most memory allocated at any point during the call, relative to the start of the call.
+            net_bytes (int): Memory allocated during the call that was still held when it returned. Negative if the call freed memory.
+        """
+        totals = self.methods.setdefault(method, {'calls': 0, 'peak_bytes': 0, 'total_peak_bytes': 0, 'net_bytes': 0})
+        totals['calls'] += 1
+        totals['peak_bytes'] = max(totals['peak_bytes'], peak_bytes)
+        totals['total_peak_bytes'] += peak_bytes
+        totals['net_bytes'] += net_bytes
+
+    def report(self):
+        """Get the running totals, heaviest methods first
+
+        Returns:
+            dict: `self.methods`, sorted by 'peak_bytes' in descending order.
+        """
+        return dict(sorted(self.methods.items(), key=lambda item: item[1]['peak_bytes'], reverse=True))
+
+    def print_report(self):
+        """Pretty-print the running totals to console"""
+        if len(self.methods) == 0:
+            print(f'{bcolors.WARNING + bcolors.BOLD + bcolors.UNDERLINE}Warning!{bcolors.ENDC}\nNo profiled method calls were recorded.')
+        else:
+            print(json.dumps(self.report(), indent=4))
+
+class profile_memory():
+    """A context manager that profiles every `Emld` method called inside its block
+
+    Examples:
+        with profile_memory() as profile:
+            for filename in filenames:
+                myemld = Emld(filepath=filename, INTERACTIVE=False)
+                myemld.set_title(title='my new title')
+        profile.print_report()
+    """
+
+    def __init__(self):
+        self.profile = MemoryProfile()
+
+    def __enter__(self):
+        start_tracing()
+        _sessions.set(_sessions.get() + (self.profile,))
+        return self.profile
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _sessions.set(tuple(profile for profile in _sessions.get() if profile is not self.profile))
+        stop_tracing()
+        return False
+
+def start_tracing():
+    """Register a profiling owner, starting `tracemalloc` if it isn't already tracing
+
+    Every call must be matched by one `stop_tracing()` call, e.g., from a `weakref.finalize` on the profiled object.
+    """
+    with _tracemalloc_lock:
+        if _tracing['owners'] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing['started'] = True
+        _tracing['owners'] += 1
+
+def stop_tracing():
+    """Release a profiling owner registered by `start_tracing()`, stopping `tracemalloc` after the last one if an owner started it"""
+    with _tracemalloc_lock:
+        _tracing['owners'] -= 1
+        if _tracing['owners'] == 0 and _tracing['started']:
+            _tracing['started'] = False
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+def track_memory(method):
+    """Wrap an `Emld` method so that, when profiling is on, each call's peak and net allocation is recorded
+
+    Only the outermost profiled call is measured; e.g., the `get_title()` call inside `set_title()` is counted as part of `set_title()`.
+    Measured calls hold a process-wide lock, so profiled calls in other threads wait rather than reset each other's peak.
+
+    Args:
+        method (function): The method to wrap.
+
+    Returns:
+        function: The wrapped method.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        emld_profile = self.__dict__.get('memory_profile')
+        sessions = _sessions.get()
+        if (emld_profile is None and len(sessions) == 0) or getattr(_state, 'depth', 0) > 0 or not tracemalloc.is_tracing():
+            return method(self, *args, **kwargs)
+
+        with _tracemalloc_lock:
+            if not tracemalloc.is_tracing(): # a session in another thread stopped tracing while this call waited
+                return method(self, *args, **kwargs)
+            _state.depth = 1
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                current, peak = tracemalloc.get_traced_memory()
+                _state.depth = 0
+                profiles = list(sessions)
+                if emld_profile is not None:
+                    profiles.append(emld_profile)
+                for profile in profiles:
+                    profile.record(method=method.__name__, peak_bytes=peak - start, net_bytes=current - start)
+    return wrapper
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
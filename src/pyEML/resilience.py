@@ -0,0 +1,588 @@
+"""Python source module for resilient calls to external http services
+
+`resilience.py` is the shared client layer for pyEML's network lookups (e.g., `src.pyEML.unit_api`).
+Requests go through a `ConnectionPool` of keep-alive connections with separate connect and read
+timeouts, or, from `asyncio` code, an `AsyncConnectionPool` that never blocks the event loop. A `ResilientClient` retries transient failures (connection errors, timeouts, 429, and 5xx)
+with exponential backoff and full jitter, and keeps a `CircuitBreaker` per endpoint: after repeated
+failures the endpoint is skipped outright for a cool-down period, so one bad dependency fails fast
+instead of stalling a large batch. Per-endpoint latency and error counters are available from
+`ResilientClient.stats()`.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import asyncio
+import http.client
+import io
+import random
+import ssl
+import threading
+import time
+import urllib.parse
+import weakref
+from src.pyEML.constants import APP_NAME, CURRENT_RELEASE, HTTP_BREAKER_FAILURE_THRESHOLD, HTTP_BREAKER_RESET_TIMEOUT, HTTP_RETRY_ATTEMPTS, HTTP_RETRY_BASE_DELAY, HTTP_RETRY_MAX_DELAY, UNIT_API_CONNECT_TIMEOUT, UNIT_API_MAX_CONNECTIONS, UNIT_API_TIMEOUT
+from src.pyEML.error_classes import CircuitOpenError, ExternalServiceError
+
+#: response statuses that are worth retrying; any other status is returned to the caller
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+#: errors that mean the server closed an idle keep-alive connection; a request on a reused connection that fails with one is resent once on a new connection.
+#: Timeouts are not among them: a slow server is left to `RetryPolicy`, so a slow request never waits out its read timeout twice.
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+
+class ConnectionPool():
+    """A thread-safe pool of keep-alive http(s) connections with a per-host concurrency limit"""
+
+    def __init__(self, max_per_host:int=UNIT_API_MAX_CONNECTIONS, timeout:float=UNIT_API_TIMEOUT, connect_timeout:float=UNIT_API_CONNECT_TIMEOUT):
+        """Constructor for class ConnectionPool
+
+        Args:
+            max_per_host (int, optional): The most requests in flight to one host at a time; also the most connections kept open to it. Defaults to `src.pyEML.constants.UNIT_API_MAX_CONNECTIONS`.
+            timeout (float, optional): Read timeout; seconds a request may wait for data before it fails. Defaults to `src.pyEML.constants.UNIT_API_TIMEOUT`.
+            connect_timeout (float, optional): Seconds a new connection may take to connect before it fails. Defaults to `src.pyEML.constants.UNIT_API_CONNECT_TIMEOUT`.
+        """
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._lock = threading.Lock()
+        self._idle = {} # (scheme, host, port): connections that are open and not in use
+        self._limits = {} # (scheme, host, port): semaphore that caps requests in flight
+
+    def get(self, url:str, headers:dict=None):
+        """Send one GET request, reusing an idle connection to the host when there is one
+
+        Args:
+            url (str): The url to request.
+            headers (dict, optional): Request headers. Defaults to None.
+
+        Returns:
+            tuple: (status, headers, body). `status` (int) is the response status, `headers` (http.client.HTTPMessage) the response headers, and `body` (bytes) the response body.
+        """
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        request_headers = {'User-Agent': f'{APP_NAME}/{CURRENT_RELEASE}'}
+        request_headers.update(headers or {})
+        with self._limit(key):
+            connection, reused = self._checkout(key)
+            try:
+                response, body = self._send(connection, path, request_headers)
+            except STALE_CONNECTION_ERRORS:
+                connection.close()
+                if not reused:
+                    raise
+                # the server closed an idle keep-alive connection; retry once on a new one
+                connection, reused = self._connect(key), False
+                try:
+                    response, body = self._send(connection, path, request_headers)
+                except BaseException:
+                    connection.close()
+                    raise
+            except BaseException: # e.g., a read timeout; the connection is in an unknown state
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._checkin(key, connection)
+        return response.status, response.headers, body
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _send(self, connection, path:str, headers:dict):
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+        return response, response.read() # read the whole body so the connection can be reused
+
+    def _limit(self, key:tuple):
+        with self._lock:
+            if key not in self._limits:
+                self._limits[key] = threading.BoundedSemaphore(self.max_per_host)
+            return self._limits[key]
+
+    def _checkout(self, key:tuple):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _checkin(self, key:tuple, connection):
+        with self._lock:
+            self._idle.setdefault(key, []).append(connection)
+
+    def _connect(self, key:tuple):
+        """Open a new connection with the connect timeout, then switch its socket to the read timeout"""
+        scheme, host, port = key
+        if scheme == 'https':
+            connection = http.client.HTTPSConnection(host, port, timeout=self.connect_timeout)
+        else:
+            connection = http.client.HTTPConnection(host, port, timeout=self.connect_timeout)
+        connection.connect()
+        connection.sock.settimeout(self.timeout)
+        return connection
+
+
+class AsyncConnectionPool():
+    """An `asyncio` pool of keep-alive http(s) connections with a per-host concurrency limit
+
+    Connections and limits belong to the event loop that created them, so one pool can be used from several loops (e.g., successive `asyncio.run()` calls).
+    """
+
+    def __init__(self, max_per_host:int=UNIT_API_MAX_CONNECTIONS, timeout:float=UNIT_API_TIMEOUT, connect_timeout:float=UNIT_API_CONNECT_TIMEOUT):
+        """Constructor for class AsyncConnectionPool
+
+        Args:
+            max_per_host (int, optional): The most requests in flight to one host at a time; also the most connections kept open to it. Defaults to `src.pyEML.constants.UNIT_API_MAX_CONNECTIONS`.
+            timeout (float, optional): Read timeout; seconds a request may wait for its whole response before it fails. Defaults to `src.pyEML.constants.UNIT_API_TIMEOUT`.
+            connect_timeout (float, optional): Seconds a new connection may take to connect before it fails. Defaults to `src.pyEML.constants.UNIT_API_CONNECT_TIMEOUT`.
+        """
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._loops = weakref.WeakKeyDictionary() # event loop: (idle connections, semaphores), each keyed by (scheme, host, port)
+
+    async def get(self, url:str, headers:dict=None):
+        """Send one GET request, reusing an idle connection to the host when there is one
+
+        Args:
+            url (str): The url to request.
+            headers (dict, optional): Request headers. Defaults to None.
+
+        Returns:
+            tuple: (status, headers, body). `status` (int) is the response status, `headers` (http.client.HTTPMessage) the response headers, and `body` (bytes) the response body.
+        """
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        request_headers = {'Host': parts.netloc, 'User-Agent': f'{APP_NAME}/{CURRENT_RELEASE}'}
+        request_headers.update(headers or {})
+        request = f'GET {path or "/"} HTTP/1.1\r\n'.encode('latin-1') + b''.join(f'{name}: {value}\r\n'.encode('latin-1') for name, value in request_headers.items()) + b'\r\n'
+
+        idle, limits = self._state()
+        if key not in limits:
+            limits[key] = asyncio.Semaphore(self.max_per_host)
+        async with limits[key]:
+            connections = idle.setdefault(key, [])
+            reused = len(connections) > 0
+            reader, writer = connections.pop() if reused else await self._connect(key)
+            try:
+                status, response_headers, body, will_close = await self._send(reader, writer, request)
+            except STALE_CONNECTION_ERRORS:
+                writer.close()
+                if not reused:
+                    raise
+                # the server closed an idle keep-alive connection; retry once on a new one
+                reader, writer = await self._connect(key)
+                try:
+                    status, response_headers, body, will_close = await self._send(reader, writer, request)
+                except BaseException: # includes asyncio.CancelledError, so a cancelled request doesn't leak its socket
+                    writer.close()
+                    raise
+            except BaseException: # e.g., a read timeout or asyncio.CancelledError; the connection is in an unknown state
+                writer.close()
+                raise
+            if will_close:
+                writer.close()
+            else:
+                connections.append((reader, writer))
+        return status, response_headers, body
+
+    async def close(self):
+        """Close every idle connection that belongs to the running event loop"""
+        idle, _ = self._state()
+        for connections in idle.values():
+            for reader, writer in connections:
+                writer.close()
+            connections.clear()
+
+    def _state(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._loops:
+            self._loops[loop] = ({}, {})
+        return self._loops[loop]
+
+    async def _connect(self, key:tuple):
+        scheme, host, port = key
+        try:
+            return await asyncio.wait_for(asyncio.open_connection(host, port, ssl=ssl.create_default_context() if scheme == 'https' else None), self.connect_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError('timed out connecting')
+
+    async def _send(self, reader, writer, request:bytes):
+        try:
+            writer.write(request)
+            await writer.drain()
+            return await asyncio.wait_for(self._read_response(reader), self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError('timed out')
+        except asyncio.IncompleteReadError as e:
+            raise http.client.IncompleteRead(e.partial)
+        except ValueError as e: # a malformed chunk size or an over-long line
+            raise http.client.HTTPException(str(e))
+
+    async def _read_response(self, reader):
+        """Read one http/1.1 response: status line, headers, then a Content-Length, chunked, or read-to-close body"""
+        status_line = await reader.readline()
+        if not status_line:
+            raise http.client.RemoteDisconnected('Remote end closed connection without response')
+        try:
+            version, status = status_line.decode('latin-1').split(None, 2)[:2]
+            status = int(status)
+        except ValueError:
+            raise http.client.BadStatusLine(status_line)
+        lines = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            lines.append(line)
+        response_headers = http.client.parse_headers(io.BytesIO(b''.join(lines) + b'\r\n'))
+        connection = (response_headers.get('Connection') or '').lower()
+        will_close = connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive')
+
+        if status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif 'chunked' in (response_headers.get('Transfer-Encoding') or '').lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''): # trailers
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b''.join(chunks)
+        elif response_headers.get('Content-Length') is not None:
+            body = await reader.readexactly(int(response_headers['Content-Length']))
+        else:
+            body = await reader.read()
+            will_close = True
+        return status, response_headers, body, will_close
+
+class RetryPolicy():
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, attempts:int=HTTP_RETRY_ATTEMPTS, base_delay:float=HTTP_RETRY_BASE_DELAY, max_delay:float=HTTP_RETRY_MAX_DELAY, seed:int=None):
+        """Constructor for class RetryPolicy
+
+        Args:
+            attempts (int, optional): Tries per request, including the first. Defaults to `src.pyEML.constants.HTTP_RETRY_ATTEMPTS`.
+            base_delay (float, optional): Seconds; the cap on the first backoff. The cap doubles with each retry. Defaults to `src.pyEML.constants.HTTP_RETRY_BASE_DELAY`.
+            max_delay (float, optional): Seconds; the most any one backoff can be. Defaults to `src.pyEML.constants.HTTP_RETRY_MAX_DELAY`.
+            seed (int, optional): Seeds the jitter, for reproducible tests. Defaults to None.
+        """
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._random = random.Random(seed)
+
+    def delay(self, retry:int, retry_after:float=None):
+        """Seconds to wait before retry number `retry` (0 for the first retry)
+
+        Args:
+            retry (int): The number of retries already made.
+            retry_after (float, optional): The server's Retry-After, in seconds; waited for if it is longer than the drawn backoff (up to `max_delay`). Defaults to None.
+
+        Returns:
+            float: A delay drawn uniformly between 0 and min(`max_delay`, `base_delay` * 2 ** `retry`).
+        """
+        delay = self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+class CircuitBreaker():
+    """Fails fast after repeated errors, then lets one trial request through after a cool-down
+
+    The breaker is 'closed' (requests flow) until `failure_threshold` consecutive failures, then 'open'
+    (requests are refused) for `reset_timeout` seconds, then 'half_open': one trial request is let
+    through, which closes the breaker if it succeeds and re-opens it if it fails.
+    """
+
+    def __init__(self, failure_threshold:int=HTTP_BREAKER_FAILURE_THRESHOLD, reset_timeout:float=HTTP_BREAKER_RESET_TIMEOUT):
+        """Constructor for class CircuitBreaker
+
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open the breaker. Defaults to `src.pyEML.constants.HTTP_BREAKER_FAILURE_THRESHOLD`.
+            reset_timeout (float, optional): Seconds the breaker stays open before a trial request. Defaults to `src.pyEML.constants.HTTP_BREAKER_RESET_TIMEOUT`.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """'closed', 'open', or 'half_open'"""
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """True if a request may be sent now"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def retry_in(self):
+        """Seconds until the breaker lets a trial request through; 0 if it isn't open"""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def release(self):
+        """Give back a trial slot taken by `allow()` when the request ended without a verdict (e.g., it was cancelled), so the next call can be the trial"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+class EndpointStats():
+    """Latency and error counters for one endpoint"""
+
+    def __init__(self):
+        """Constructor for class EndpointStats
+
+        Attributes:
+            requests (int): Requests sent, counting each retry.
+            successes (int): Requests answered with a status that isn't retried.
+            failures (int): Requests that failed (connection errors, timeouts, and retried statuses).
+            retries (int): Retries made.
+            short_circuits (int): Calls refused by an open circuit breaker.
+            total_latency (float): Seconds spent on all requests.
+            max_latency (float): Seconds; the slowest request.
+            last_error (str): The most recent failure. None if there were none.
+        """
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.short_circuits = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_error = None
+
+    def record(self, latency:float, error:str=None):
+        self.requests += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if error is None:
+            self.successes += 1
+        else:
+            self.failures += 1
+            self.last_error = error
+
+    def to_dict(self):
+        """The counters as a dict, with 'mean_latency' added"""
+        counters = dict(self.__dict__)
+        counters['mean_latency'] = self.total_latency / self.requests if self.requests > 0 else None
+        return counters
+
+class ResilientClient():
+    """Sends GET requests with retries, backoff, a circuit breaker per endpoint, and per-endpoint counters"""
+
+    def __init__(self, pool:ConnectionPool=None, retry:RetryPolicy=None, failure_threshold:int=HTTP_BREAKER_FAILURE_THRESHOLD, reset_timeout:float=HTTP_BREAKER_RESET_TIMEOUT):
+        """Constructor for class ResilientClient
+
+        Args:
+            pool (ConnectionPool, optional): The connections to send requests over. Defaults to None, which creates a `ConnectionPool` with default timeouts.
+                `aget()` uses an `AsyncConnectionPool` with the same limits and timeouts.
+            retry (RetryPolicy, optional): How to retry transient failures. Defaults to None, which creates a default `RetryPolicy`.
+            failure_threshold (int, optional): Consecutive failures that open an endpoint's circuit breaker. Defaults to `src.pyEML.constants.HTTP_BREAKER_FAILURE_THRESHOLD`.
+            reset_timeout (float, optional): Seconds an open breaker waits before a trial request. Defaults to `src.pyEML.constants.HTTP_BREAKER_RESET_TIMEOUT`.
+        """
+        self.pool = pool if pool is not None else ConnectionPool()
+        self.async_pool = AsyncConnectionPool(max_per_host=self.pool.max_per_host, timeout=self.pool.timeout, connect_timeout=self.pool.connect_timeout)
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint:str, url:str, headers:dict=None):
+        """Send one GET request, retrying transient failures
+
+        Args:
+            endpoint (str): A name for the service being called (e.g., 'irma_unit_geography'). Breakers and counters are kept per endpoint.
+            url (str): The url to request.
+            headers (dict, optional): Request headers. Defaults to None.
+
+        Returns:
+            tuple: (status, headers, body), as from `ConnectionPool.get()`, for any status not in `RETRY_STATUSES`.
+
+        Raises:
+            CircuitOpenError: The endpoint's breaker is open; no request was sent.
+            ExternalServiceError: Every attempt failed.
+        """
+        breaker, stats = self._admit(endpoint)
+        error = None
+        for attempt in range(self.retry.attempts):
+            start = time.perf_counter()
+            try:
+                response = self.pool.get(url, headers)
+            except (http.client.HTTPException, OSError) as e:
+                response, error = None, f'{type(e).__name__}: {e}'
+            except BaseException: # e.g., `asyncio.CancelledError` or `KeyboardInterrupt`; a half-open breaker must not keep waiting on this trial
+                breaker.release()
+                raise
+            delay, error = self._settle(breaker, stats, attempt, start, response, error)
+            if delay is None:
+                return response
+            if delay is False:
+                break
+            time.sleep(delay)
+        raise ExternalServiceError(endpoint, url, error)
+
+    async def aget(self, endpoint:str, url:str, headers:dict=None):
+        """Send one GET request without blocking the event loop, retrying transient failures
+
+        The same as `get()`, but sent over `self.async_pool` with `asyncio` streams. Breakers and counters are shared with `get()`.
+
+        Returns:
+            tuple: (status, headers, body), as from `AsyncConnectionPool.get()`, for any status not in `RETRY_STATUSES`.
+
+        Raises:
+            CircuitOpenError: The endpoint's breaker is open; no request was sent.
+            ExternalServiceError: Every attempt failed.
+        """
+        breaker, stats = self._admit(endpoint)
+        error = None
+        for attempt in range(self.retry.attempts):
+            start = time.perf_counter()
+            try:
+                response = await self.async_pool.get(url, headers)
+            except (http.client.HTTPException, OSError) as e:
+                response, error = None, f'{type(e).__name__}: {e}'
+            except BaseException: # e.g., `asyncio.CancelledError` or `KeyboardInterrupt`; a half-open breaker must not keep waiting on this trial
+                breaker.release()
+                raise
+            delay, error = self._settle(breaker, stats, attempt, start, response, error)
+            if delay is None:
+                return response
+            if delay is False:
+                break
+            await asyncio.sleep(delay)
+        raise ExternalServiceError(endpoint, url, error)
+
+    def stats(self):
+        """Get latency and error counters for every endpoint called so far
+
+        Returns:
+            dict: Keyed by endpoint. Each value is `EndpointStats.to_dict()` plus 'breaker' (the breaker's state).
+        """
+        with self._lock:
+            report = {}
+            for endpoint, stats in self._stats.items():
+                report[endpoint] = stats.to_dict()
+                report[endpoint]['breaker'] = self._breakers[endpoint].state
+            return report
+
+    def reset(self, endpoint:str=None):
+        """Close breakers and zero counters, for one endpoint or (by default) all of them"""
+        with self._lock:
+            for name in ([endpoint] if endpoint is not None else list(self._stats.keys())):
+                self._breakers.pop(name, None)
+                self._stats.pop(name, None)
+
+    def _admit(self, endpoint:str):
+        """Get the endpoint's breaker and counters, or raise `CircuitOpenError` if its breaker refuses the call"""
+        breaker, stats = self._endpoint(endpoint)
+        if not breaker.allow():
+            with self._lock:
+                stats.short_circuits += 1
+            raise CircuitOpenError(endpoint, breaker.retry_in())
+        return breaker, stats
+
+    def _settle(self, breaker:CircuitBreaker, stats:EndpointStats, attempt:int, start:float, response:tuple, error:str):
+        """Record one attempt and decide what happens next
+
+        Returns:
+            tuple: (delay, error). `delay` is None if `response` should be returned, False if there should be no more attempts,
+                or the seconds to wait before the next attempt.
+        """
+        retry_after = None
+        if response is not None:
+            status, response_headers, _ = response
+            if status not in RETRY_STATUSES:
+                with self._lock:
+                    stats.record(time.perf_counter() - start)
+                breaker.record_success()
+                return None, None
+            error = f'HTTP {status}'
+            retry_after = _retry_after(response_headers.get('Retry-After'))
+        with self._lock:
+            stats.record(time.perf_counter() - start, error)
+        breaker.record_failure()
+        if attempt + 1 == self.retry.attempts or not breaker.allow():
+            return False, error
+        with self._lock:
+            stats.retries += 1
+        return self.retry.delay(attempt, retry_after), error
+
+    def _endpoint(self, endpoint:str):
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(failure_threshold=self.failure_threshold, reset_timeout=self.reset_timeout)
+                self._stats[endpoint] = EndpointStats()
+            return self._breakers[endpoint], self._stats[endpoint]
+
+#: the client that pyEML's network lookups share when no `client` is passed
+default_client = ResilientClient()
+
+def _retry_after(value:str):
+    """Parse a Retry-After header given in seconds; the http-date form is ignored"""
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
@@ -0,0 +1,377 @@
+"""Python source module for full-text search over a corpus of EML documents
+
+`search.py` holds `TextIndex`, an inverted index over each document's title, abstract, and keywords. Text is
+tokenized, lowercased, stripped of accents and stopwords, and stemmed with the Porter stemmer, so "Forest
+Pathogens" matches "forests" and "pathogen". Postings map each stem to the documents that hold it and how often;
+`TextIndex.search()` ranks documents with BM25, touching only the postings of the query's terms. Documents are
+added, replaced, and removed one at a time, so `src.pyEML.corpus.EmlCorpus` keeps the index up to date as files
+change, and saves it beside its manifest.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import functools
+import heapq
+import json
+import math
+import os
+import re
+import unicodedata
+from src.pyEML.utils import write_json
+from src.pyEML.constants import LOOKUPS, BM25_K1, BM25_B, TEXT_FIELD_WEIGHTS
+
+#: the index format version; an index saved with another version is discarded and rebuilt
+_VERSION = 1
+_TOKEN = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset((
+    'a', 'about', 'above', 'after', 'all', 'also', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'been', 'between', 'both', 'but', 'by',
+    'can', 'could', 'did', 'do', 'does', 'during', 'each', 'for', 'from', 'had', 'has', 'have', 'how', 'if', 'in', 'into', 'is', 'it', 'its',
+    'may', 'more', 'most', 'no', 'not', 'of', 'on', 'or', 'other', 'our', 'over', 'such', 'than', 'that', 'the', 'their', 'them', 'then',
+    'there', 'these', 'they', 'this', 'those', 'through', 'to', 'under', 'up', 'was', 'we', 'were', 'what', 'when', 'where', 'which',
+    'while', 'who', 'will', 'with', 'within', 'would'
+))
+
+def tokenize(text:str):
+    """Split text into index terms: accents removed, lowercased, stopwords dropped, stemmed
+
+    Args:
+        text (str): Any text. E.g., "Monitoring forest pathogens".
+
+    Returns:
+        list: The terms, in order. E.g., ['monitor', 'forest', 'pathogen'].
+    """
+    if not text:
+        return []
+    if not text.isascii():
+        text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    return [stem(token) for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+def document_text(root):
+    """Extract the fields that `TextIndex` indexes from an EML element tree
+
+    Args:
+        root (lxml.etree._Element): The root node of an EML document.
+
+    Returns:
+        dict: 'title' (str), 'abstract' (str, every paragraph joined), and 'keywords' (list of str). Missing nodes are blank.
+    """
+    title = root.findtext(LOOKUPS['title']['node_xpath']) or ''
+    abstract = ' '.join(' '.join(node.itertext()) for node in root.findall(LOOKUPS['abstract']['node_xpath']))
+    keywords = [elm.text for elm in root.findall(LOOKUPS['keywords']['node_xpath'] + '/keyword') if elm.text]
+    return {'title': title.strip(), 'abstract': ' '.join(abstract.split()), 'keywords': keywords}
+
+class TextIndex():
+    """An inverted index over documents' titles, abstracts, and keywords, ranked with BM25
+
+    Documents are identified by a key (in `src.pyEML.corpus.EmlCorpus`, the file's manifest key); each also carries its packageId and the content hash it was indexed from.
+    """
+
+    #: the index's filename, inside a corpus' index directory
+    filename = 'text_index.json'
+
+    def __init__(self, k1:float=BM25_K1, b:float=BM25_B, weights:dict=TEXT_FIELD_WEIGHTS):
+        """Constructor for class TextIndex
+
+        Args:
+            k1 (float, optional): BM25 term-frequency saturation. Defaults to `src.pyEML.constants.BM25_K1`.
+            b (float, optional): BM25 document-length normalization, from 0 (none) to 1 (full). Defaults to `src.pyEML.constants.BM25_B`.
+            weights (dict, optional): How many times each field's terms count, keyed by 'title', 'abstract', and 'keywords'. Defaults to `src.pyEML.constants.TEXT_FIELD_WEIGHTS`.
+        """
+        self.k1 = k1
+        self.b = b
+        self.weights = weights
+        self._docs = {} # document id: [key, packageId, content hash, length in terms]
+        self._ids = {} # key: document id
+        self._postings = {} # term: {document id: term frequency}
+        self._terms = None # document id: tuple of its terms; built on the first removal after `load()`, since saved indexes don't hold it
+        self._next_id = 0
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, key:str):
+        return key in self._ids
+
+    def hash(self, key:str):
+        """Get the content hash a document was indexed from
+
+        Args:
+            key (str): The document's key.
+
+        Returns:
+            str: The hash, or None if the document isn't indexed.
+        """
+        doc_id = self._ids.get(key)
+        return self._docs[doc_id][2] if doc_id is not None else None
+
+    def keys(self):
+        """Get the key of every indexed document
+
+        Returns:
+            list: The keys.
+        """
+        return list(self._ids)
+
+    def update(self, key:str, document:dict, package_id:str=None, content_hash:str=None):
+        """Index a document, replacing any earlier version with the same key
+
+        Args:
+            key (str): The document's key.
+            document (dict): The text to index: 'title', 'abstract', and 'keywords', as returned by `document_text()`. Missing fields are skipped.
+            package_id (str, optional): The document's packageId, which `search()` returns. Defaults to None.
+            content_hash (str, optional): The hash of the content the text came from. See `hash()`. Defaults to None.
+        """
+        self.remove(key)
+        counts = {}
+        for field, weight in self.weights.items():
+            text = document.get(field)
+            if isinstance(text, (list, tuple)):
+                text = ' '.join(text)
+            for term in tokenize(text):
+                counts[term] = counts.get(term, 0) + weight
+        doc_id = self._next_id
+        self._next_id += 1
+        length = sum(counts.values())
+        self._docs[doc_id] = [key, package_id, content_hash, length]
+        self._ids[key] = doc_id
+        self._total_length += length
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        if self._terms is not None:
+            self._terms[doc_id] = tuple(counts)
+
+    def remove(self, key:str):
+        """Remove a document from the index
+
+        Args:
+            key (str): The document's key.
+
+        Returns:
+            bool: True if the document was indexed.
+        """
+        doc_id = self._ids.pop(key, None)
+        if doc_id is None:
+            return False
+        if self._terms is None:
+            self._terms = _forward(self._postings)
+        for term in self._terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if len(postings) == 0:
+                del self._postings[term]
+        self._total_length -= self._docs.pop(doc_id)[3]
+        return True
+
+    def search(self, query:str, limit:int=10):
+        """Rank documents against a query with BM25
+
+        Args:
+            query (str): Free text. E.g., "forest pathogens".
+            limit (int, optional): The most results to return. Defaults to 10. None returns every match.
+
+        Returns:
+            list: (packageId, score, key) tuples, best match first. Documents that match none of the query's terms are left out.
+        """
+        terms = set(tokenize(query))
+        n_docs = len(self._docs)
+        if n_docs == 0 or len(terms) == 0:
+            return []
+        k1 = self.k1
+        average_length = self._total_length / n_docs or 1
+        scores = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, count in postings.items():
+                norm = k1 * (1 - self.b + self.b * self._docs[doc_id][3] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * count * (k1 + 1) / (count + norm)
+        if limit is None:
+            best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        else:
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self._docs[doc_id][1], round(score, 6), self._docs[doc_id][0]) for doc_id, score in best]
+
+    def save(self, directory:str):
+        """Save the index to `directory`, as `TextIndex.filename`
+
+        Args:
+            directory (str): The directory. It must exist.
+        """
+        data = {
+            'version': _VERSION,
+            'k1': self.k1,
+            'b': self.b,
+            'weights': self.weights,
+            'next_id': self._next_id,
+            'docs': [[doc_id] + doc for doc_id, doc in self._docs.items()],
+            'postings': {term: [value for item in postings.items() for value in item] for term, postings in self._postings.items()} # flattened [id, tf, id, tf, ...]
+        }
+        write_json(os.path.join(directory, self.filename), data)
+
+    @classmethod
+    def load(cls, directory:str):
+        """Load an index saved by `save()`
+
+        Args:
+            directory (str): The directory it was saved to.
+
+        Returns:
+            TextIndex: The index; an empty one if there is no saved index, or it is unreadable or from another version.
+        """
+        try:
+            with open(os.path.join(directory, cls.filename), encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != _VERSION:
+                return cls()
+        except (OSError, ValueError):
+            return cls()
+        index = cls(k1=data['k1'], b=data['b'], weights=data['weights'])
+        index._next_id = data['next_id']
+        for doc_id, key, package_id, content_hash, length in data['docs']:
+            index._docs[doc_id] = [key, package_id, content_hash, length]
+            index._ids[key] = doc_id
+            index._total_length += length
+        for term, flat in data['postings'].items():
+            index._postings[term] = dict(zip(flat[::2], flat[1::2]))
+        return index
+
+def _forward(postings:dict):
+    """Invert postings into each document's terms"""
+    terms = {}
+    for term, docs in postings.items():
+        for doc_id in docs:
+            terms.setdefault(doc_id, []).append(term)
+    return terms
+
+# Porter stemmer (M.F. Porter, 1980, "An algorithm for suffix stripping")
+
+_STEP2 = (
+    ('ational', 'ate'), ('tional', 'tion'), ('enci', 'ence'), ('anci', 'ance'), ('izer', 'ize'), ('bli', 'ble'), ('alli', 'al'),
+    ('entli', 'ent'), ('eli', 'e'), ('ousli', 'ous'), ('ization', 'ize'), ('ation', 'ate'), ('ator', 'ate'), ('alism', 'al'),
+    ('iveness', 'ive'), ('fulness', 'ful'), ('ousness', 'ous'), ('aliti', 'al'), ('iviti', 'ive'), ('biliti', 'ble'), ('logi', 'log')
+)
+_STEP3 = (('icate', 'ic'), ('ative', ''), ('alize', 'al'), ('iciti', 'ic'), ('ical', 'ic'), ('ful', ''), ('ness', ''))
+_STEP4 = ('al', 'ance', 'ence', 'er', 'ic', 'able', 'ible', 'ant', 'ement', 'ment', 'ent', 'ion', 'ou', 'ism', 'ate', 'iti', 'ous', 'ive', 'ize')
+# longest suffix first, so e.g. "ement" is tried before "ment" and "ent"
+_STEP2 = sorted(_STEP2, key=lambda rule: -len(rule[0]))
+_STEP3 = sorted(_STEP3, key=lambda rule: -len(rule[0]))
+_STEP4 = sorted(_STEP4, key=len, reverse=True)
+
+def _consonant(word:str, i:int):
+    if word[i] in 'aeiou':
+        return False
+    if word[i] == 'y':
+        return i == 0 or not _consonant(word, i - 1)
+    return True
+
+def _measure(stem_:str):
+    """The number of vowel-consonant sequences in a stem (Porter's m)"""
+    m = 0
+    previous_vowel = False
+    for i in range(len(stem_)):
+        vowel = not _consonant(stem_, i)
+        if previous_vowel and not vowel:
+            m += 1
+        previous_vowel = vowel
+    return m
+
+def _has_vowel(stem_:str):
+    return any(not _consonant(stem_, i) for i in range(len(stem_)))
+
+def _double_consonant(word:str):
+    return len(word) >= 2 and word[-1] == word[-2] and _consonant(word, len(word) - 1)
+
+def _cvc(word:str):
+    """True if a word ends consonant-vowel-consonant, and the last consonant isn't w, x, or y"""
+    return len(word) >= 3 and _consonant(word, len(word) - 3) and not _consonant(word, len(word) - 2) and _consonant(word, len(word) - 1) and word[-1] not in 'wxy'
+
+@functools.lru_cache(maxsize=65536)
+def stem(word:str):
+    """Stem an English word with the Porter stemmer
+
+    Args:
+        word (str): A lowercase word. E.g., "pathogens".
+
+    Returns:
+        str: The stem. E.g., "pathogen".
+    """
+    if len(word) <= 2 or not word.isalpha():
+        return word
+
+    # step 1a: plurals
+    if word.endswith('sses') or word.endswith('ies'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+
+    # step 1b: -eed, -ed, -ing
+    if word.endswith('eed'):
+        if _measure(word[:-3]) > 0:
+            word = word[:-1]
+    else:
+        for suffix in ('ed', 'ing'):
+            if word.endswith(suffix) and _has_vowel(word[:-len(suffix)]):
+                word = word[:-len(suffix)]
+                if word.endswith(('at', 'bl', 'iz')):
+                    word += 'e'
+                elif _double_consonant(word) and word[-1] not in 'lsz':
+                    word = word[:-1]
+                elif _measure(word) == 1 and _cvc(word):
+                    word += 'e'
+                break
+
+    # step 1c: y to i
+    if word.endswith('y') and _has_vowel(word[:-1]):
+        word = word[:-1] + 'i'
+
+    # steps 2 and 3: double and single derivational suffixes
+    for rules in (_STEP2, _STEP3):
+        for suffix, replacement in rules:
+            if word.endswith(suffix):
+                if _measure(word[:-len(suffix)]) > 0:
+                    word = word[:-len(suffix)] + replacement
+                break
+
+    # step 4: residual suffixes
+    for suffix in _STEP4:
+        if word.endswith(suffix):
+            base = word[:-len(suffix)]
+            if _measure(base) > 1 and (suffix != 'ion' or base.endswith(('s', 't'))):
+                word = base
+            break
+
+    # step 5: final -e and -ll
+    if word.endswith('e'):
+        base = word[:-1]
+        m = _measure(base)
+        if m > 1 or (m == 1 and not _cvc(base)):
+            word = base
+    if word.endswith('ll') and _measure(word) > 1:
+        word = word[:-1]
+    return word
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
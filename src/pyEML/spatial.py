@@ -0,0 +1,297 @@
+"""Python source module for spatial queries over a corpus of EML documents
+
+`spatial.py` holds `SpatialIndex`, a packed R-tree over each document's `boundingCoordinates` boxes (the boxes
+that `Emld.set_geographic_coverage()` and `Emld.set_nps_geographic_coverage()` write). The tree is bulk-loaded
+with Sort-Tile-Recursive (STR) packing into flat NumPy arrays, one per level, and searched one level at a time
+with vectorized box tests, so a query reads only the nodes whose boxes it overlaps. Documents are added and
+removed one at a time; the tree is repacked, in a few milliseconds, on the first query after a change.
+`src.pyEML.corpus.EmlCorpus` keeps the index up to date and saves it beside its manifest.
+
+Boxes are (west, east, north, south) in decimal degrees, as in EML. A box whose west edge is east of its east edge
+crosses the antimeridian; it is stored, and searched, as two boxes.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import math
+import os
+import numpy as np
+from src.pyEML.utils import split_antimeridian
+from src.pyEML.constants import RTREE_NODE_SIZE, SPATIAL_PREDICATES
+
+#: the index format version; an index saved with another version is discarded and rebuilt
+_VERSION = 1
+
+class SpatialIndex():
+    """An STR-packed R-tree over documents' bounding boxes
+
+    Documents are identified by a key (in `src.pyEML.corpus.EmlCorpus`, the file's manifest key); each also carries its packageId and the content hash it was indexed from.
+    """
+
+    #: the index's filename, inside a corpus' index directory
+    filename = 'spatial_index.npz'
+
+    def __init__(self, node_size:int=RTREE_NODE_SIZE):
+        """Constructor for class SpatialIndex
+
+        Args:
+            node_size (int, optional): The most children per tree node. Defaults to `src.pyEML.constants.RTREE_NODE_SIZE`.
+        """
+        self.node_size = node_size
+        self._docs = {} # key: [packageId, content hash, list of (min x, min y, max x, max y) boxes]
+        self._levels = None # packed tree, leaves first: list of (n, 4) arrays of (min x, min y, max x, max y); None until the next query after a change
+        self._order = None # the position of each leaf box in `_docs` order (documents in order, each document's boxes in order)
+        self._items = None # the key of each leaf box, in packed order
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, key:str):
+        return key in self._docs
+
+    def hash(self, key:str):
+        """Get the content hash a document was indexed from
+
+        Args:
+            key (str): The document's key.
+
+        Returns:
+            str: The hash, or None if the document isn't indexed.
+        """
+        doc = self._docs.get(key)
+        return doc[1] if doc is not None else None
+
+    def keys(self):
+        """Get the key of every indexed document
+
+        Returns:
+            list: The keys.
+        """
+        return list(self._docs)
+
+    def update(self, key:str, document:dict, package_id:str=None, content_hash:str=None):
+        """Index a document's boxes, replacing any earlier version with the same key
+
+        Args:
+            key (str): The document's key.
+            document (dict): Holds 'bounding_boxes', a list of [west, east, north, south] boxes as in `src.pyEML.summary.summarize_emld()`. Documents without boxes are recorded, but never match.
+            package_id (str, optional): The document's packageId, which queries return. Defaults to None.
+            content_hash (str, optional): The hash of the content the boxes came from. See `hash()`. Defaults to None.
+        """
+        boxes = []
+        for west, east, north, south in document.get('bounding_boxes') or []:
+            boxes += split_antimeridian(west, east, north, south)
+        self._docs[key] = [package_id, content_hash, boxes]
+        self._levels = None
+
+    def remove(self, key:str):
+        """Remove a document from the index
+
+        Args:
+            key (str): The document's key.
+
+        Returns:
+            bool: True if the document was indexed.
+        """
+        if self._docs.pop(key, None) is None:
+            return False
+        self._levels = None
+        return True
+
+    def intersects(self, west:float, east:float, north:float, south:float):
+        """Find the documents with a box that overlaps an area
+
+        Args:
+            west, east, north, south (float): The area's edges, in decimal degrees. West may be east of east, for areas that cross the antimeridian.
+
+        Returns:
+            list: (packageId, key) tuples, sorted by key.
+        """
+        return self.query(west, east, north, south, predicate='intersects')
+
+    def contains(self, west:float, east:float, north:float, south:float):
+        """Find the documents with a box that holds all of an area (or, with west == east and north == south, a point)
+
+        Args:
+            west, east, north, south (float): The area's edges, in decimal degrees.
+
+        Returns:
+            list: (packageId, key) tuples, sorted by key.
+        """
+        return self.query(west, east, north, south, predicate='contains')
+
+    def within(self, west:float, east:float, north:float, south:float):
+        """Find the documents whose boxes all lie inside an area (e.g., every dataset from inside a park's extent)
+
+        Args:
+            west, east, north, south (float): The area's edges, in decimal degrees.
+
+        Returns:
+            list: (packageId, key) tuples, sorted by key.
+        """
+        return self.query(west, east, north, south, predicate='within')
+
+    def query(self, west:float, east:float, north:float, south:float, predicate:str='intersects'):
+        """Find the documents whose boxes relate to an area
+
+        Args:
+            west, east, north, south (float): The area's edges, in decimal degrees.
+            predicate (str, optional): One of `src.pyEML.constants.SPATIAL_PREDICATES`: 'intersects' (a box overlaps the area),
+                'contains' (a box holds the whole area), or 'within' (every box lies inside the area). Defaults to 'intersects'.
+
+        Returns:
+            list: (packageId, key) tuples, sorted by key.
+
+        Raises:
+            ValueError: `predicate` isn't one of `src.pyEML.constants.SPATIAL_PREDICATES`.
+        """
+        if predicate not in SPATIAL_PREDICATES:
+            raise ValueError(f'`predicate` must be one of {SPATIAL_PREDICATES}.')
+        areas = split_antimeridian(west, east, north, south)
+        if predicate == 'contains' and len(areas) > 1: # only a box that also crosses the antimeridian holds both halves
+            keys = set.intersection(*(self._search(area, predicate) for area in areas))
+        else:
+            keys = set().union(*(self._search(area, predicate) for area in areas))
+        if predicate == 'within': # every box of the document, not just one, must be inside the area
+            keys = {key for key in keys if all(any(_inside(box, area) for area in areas) for box in self._docs[key][2])}
+        return [(self._docs[key][0], key) for key in sorted(keys)]
+
+    def _search(self, area:tuple, predicate:str):
+        """The keys of the documents with a leaf box that `predicate` matches against one (non-crossing) area"""
+        levels = self._pack()
+        if len(self._items) == 0:
+            return set()
+        min_x, min_y, max_x, max_y = area
+        candidates = np.arange(len(levels[-1]))
+        for depth in range(len(levels) - 1, -1, -1):
+            boxes = levels[depth][candidates]
+            if predicate == 'contains': # a node can only hold a box that holds the area if the node holds the area too
+                hits = (boxes[:, 0] <= min_x) & (boxes[:, 1] <= min_y) & (boxes[:, 2] >= max_x) & (boxes[:, 3] >= max_y)
+            else:
+                hits = (boxes[:, 0] <= max_x) & (boxes[:, 1] <= max_y) & (boxes[:, 2] >= min_x) & (boxes[:, 3] >= min_y)
+            candidates = candidates[hits]
+            if depth == 0 or len(candidates) == 0:
+                break
+            children = (candidates[:, None] * self.node_size + np.arange(self.node_size)).ravel()
+            candidates = children[children < len(levels[depth - 1])]
+        if depth > 0: # the search ran out of candidates above the leaves
+            return set()
+        return set(self._items[candidates].tolist())
+
+    def _pack(self):
+        """Bulk-load the tree with Sort-Tile-Recursive packing, if it changed since the last query"""
+        if self._levels is not None:
+            return self._levels
+        items = [(key, box) for key, doc in self._docs.items() for box in doc[2]]
+        boxes = np.array([box for _, box in items], dtype=float).reshape(-1, 4)
+        keys = np.array([key for key, _ in items], dtype=object)
+        order = _str_order(boxes, self.node_size)
+        levels = [boxes[order]]
+        while len(levels[-1]) > 1:
+            levels.append(_parents(levels[-1], self.node_size))
+        self._order = order
+        self._items = keys[order]
+        self._levels = levels
+        return levels
+
+    def save(self, directory:str):
+        """Save the index, with its packed tree, to `directory`, as `SpatialIndex.filename`
+
+        Args:
+            directory (str): The directory. It must exist.
+        """
+        levels = self._pack()
+        keys = list(self._docs)
+        box_counts = [len(self._docs[key][2]) for key in keys]
+        boxes = [box for key in keys for box in self._docs[key][2]]
+        filename = os.path.join(directory, self.filename)
+        tmp_filename = filename + '.tmp.npz' # `np.savez` adds ".npz" to names without it
+        np.savez(
+            tmp_filename,
+            version=np.array(_VERSION),
+            node_size=np.array(self.node_size),
+            keys=np.array(keys, dtype=str),
+            package_ids=np.array([self._docs[key][0] or '' for key in keys], dtype=str),
+            hashes=np.array([self._docs[key][1] or '' for key in keys], dtype=str),
+            box_counts=np.array(box_counts, dtype=np.int64),
+            boxes=np.array(boxes, dtype=float).reshape(-1, 4),
+            order=self._order,
+            level_sizes=np.array([len(level) for level in levels], dtype=np.int64),
+            levels=np.concatenate(levels) if levels else np.zeros((0, 4))
+        )
+        os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load(cls, directory:str):
+        """Load an index saved by `save()`
+
+        Args:
+            directory (str): The directory it was saved to.
+
+        Returns:
+            SpatialIndex: The index; an empty one if there is no saved index, or it is unreadable or from another version.
+        """
+        try:
+            with np.load(os.path.join(directory, cls.filename), allow_pickle=False) as data:
+                if int(data['version']) != _VERSION:
+                    return cls()
+                index = cls(node_size=int(data['node_size']))
+                boxes = data['boxes'].tolist()
+                ends = np.cumsum(data['box_counts']).tolist()
+                start = 0
+                for key, package_id, content_hash, end in zip(data['keys'].tolist(), data['package_ids'].tolist(), data['hashes'].tolist(), ends):
+                    index._docs[key] = [package_id or None, content_hash or None, [tuple(box) for box in boxes[start:end]]]
+                    start = end
+                # restore the packed tree as saved, so the first query doesn't repack it
+                index._order = data['order']
+                index._items = np.repeat(np.array(data['keys'].tolist(), dtype=object), data['box_counts'])[index._order]
+                index._levels = np.split(data['levels'], np.cumsum(data['level_sizes'])[:-1])
+            return index
+        except (OSError, ValueError, KeyError):
+            return cls()
+
+def _inside(box:tuple, area:tuple):
+    return box[0] >= area[0] and box[1] >= area[1] and box[2] <= area[2] and box[3] <= area[3]
+
+def _str_order(boxes:np.ndarray, node_size:int):
+    """Sort-Tile-Recursive order: vertical slices of boxes sorted by center x, then each slice sorted by center y"""
+    n = len(boxes)
+    if n == 0:
+        return np.arange(0)
+    x = (boxes[:, 0] + boxes[:, 2]) / 2
+    y = (boxes[:, 1] + boxes[:, 3]) / 2
+    slice_size = node_size * math.ceil(math.sqrt(math.ceil(n / node_size)))
+    by_x = np.argsort(x, kind='stable')
+    slices = np.arange(n) // slice_size # the slice of each position in `by_x`
+    return by_x[np.lexsort((y[by_x], slices))]
+
+def _parents(boxes:np.ndarray, node_size:int):
+    """The bounding box of each consecutive group of `node_size` boxes"""
+    n_parents = -(-len(boxes) // node_size)
+    padded = np.full((n_parents * node_size, 4), np.nan)
+    padded[:len(boxes)] = boxes
+    groups = padded.reshape(n_parents, node_size, 4)
+    return np.column_stack((np.nanmin(groups[:, :, 0], axis=1), np.nanmin(groups[:, :, 1], axis=1), np.nanmax(groups[:, :, 2], axis=1), np.nanmax(groups[:, :, 3], axis=1)))
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
@@ -0,0 +1,258 @@
+"""Python source module for building corpus-level summary tables from many EML documents
+
+`summary.py` extracts a fixed set of fields (title, publication date, temporal range, bounding boxes,
+keywords, CUI, DOI, and packageId) from each `Emld` and stacks them into one typed, columnar table.
+Extraction runs in parallel across files. The table can be written to Parquet or handed off as an
+Arrow table when the optional dependency `pyarrow` is installed.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+from datetime import datetime
+import pandas as pd
+from src.pyEML.emld import Emld
+from src.pyEML.parallel import map_files, xml_filepaths
+from src.pyEML.error_classes import bcolors
+from src.pyEML.constants import LOOKUPS, SUMMARY_COLUMNS, SUMMARY_DATE_FORMATS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # pyarrow is optional; only needed for `write_summary_parquet()` and `summary_to_arrow()`
+    pa = None
+    pq = None
+
+#: xpaths, relative to the EML root, of each field that `summarize_emld()` extracts
+_KEYWORD_XPATH = LOOKUPS['keywords']['node_xpath'] + '/keyword'
+_BBOX_XPATH = LOOKUPS['geographic_coverage']['node_xpath'] + '//boundingCoordinates' # `set_geographic_coverage()` nests boxes one level deeper, under each area's key
+_BEGIN_XPATHS = (
+    LOOKUPS['temporal_coverage']['node_xpath'] + '/rangeOfDates/beginDate/calendarDate',
+    LOOKUPS['temporal_coverage']['node_xpath'] + '/singleDateTime/calendarDate'
+)
+_END_XPATHS = (
+    LOOKUPS['temporal_coverage']['node_xpath'] + '/rangeOfDates/endDate/calendarDate',
+    LOOKUPS['temporal_coverage']['node_xpath'] + '/singleDateTime/calendarDate'
+)
+
+def summarize_emld(emld:Emld, filepath:str=None):
+    """Extract one summary row from an `Emld`
+
+    Reads nodes directly from `emld.root` so that no console messages are printed, regardless of `emld.interactive`.
+
+    Args:
+        emld (Emld): The `Emld` to summarize.
+        filepath (str, optional): The value for the 'filepath' column. Defaults to `emld.xml_src`.
+
+    Returns:
+        dict: One row keyed by `src.pyEML.constants.SUMMARY_COLUMNS`. Missing nodes are None.
+
+    Examples:
+        row = summarize_emld(myemld)
+    """
+    row = dict.fromkeys(SUMMARY_COLUMNS)
+    row['filepath'] = filepath if filepath is not None else getattr(emld, 'xml_src', None)
+    root = getattr(emld, 'root', None)
+    if root is None: # `Emld.__init__()` failed; return an empty row so the file still shows up in the table
+        return row
+
+    row['package_id'] = root.get('packageId')
+    row['title'] = _first_text(root, LOOKUPS['title']['node_xpath'])
+    row['pub_date'] = _first_text(root, LOOKUPS['pub_date']['node_xpath'])
+    row['cui'] = _first_text(root, LOOKUPS['cui']['node_xpath'])
+    row['doi'] = _first_text(root, LOOKUPS['doi']['node_xpath'])
+    row['keywords'] = [elm.text.strip() for elm in root.findall(_KEYWORD_XPATH) if elm.text and elm.text.strip()]
+
+    # a dataset can have many temporal coverages; report the overall range
+    begin_dates = [_parse_date(elm.text) for xpath in _BEGIN_XPATHS for elm in root.findall(xpath)]
+    end_dates = [_parse_date(elm.text) for xpath in _END_XPATHS for elm in root.findall(xpath)]
+    begin_dates = [x for x in begin_dates if x is not None]
+    end_dates = [x for x in end_dates if x is not None]
+    row['begin_date'] = min(begin_dates) if begin_dates else None
+    row['end_date'] = max(end_dates) if end_dates else None
+
+    # a dataset can have many bounding boxes; keep each box and report their union extent
+    boxes = []
+    for node in root.findall(_BBOX_XPATH):
+        box = [
+            _to_float(node.findtext('westBoundingCoordinate')),
+            _to_float(node.findtext('eastBoundingCoordinate')),
+            _to_float(node.findtext('northBoundingCoordinate')),
+            _to_float(node.findtext('southBoundingCoordinate'))
+        ]
+        if None not in box:
+            boxes.append(box)
+    row['bounding_boxes'] = boxes
+    if boxes:
+        row['west'] = min(box[0] for box in boxes)
+        row['east'] = max(box[1] for box in boxes)
+        row['north'] = max(box[2] for box in boxes)
+        row['south'] = min(box[3] for box in boxes)
+
+    row['pub_date'] = _parse_date(row['pub_date'])
+    return row
+
+def summarize_file(filepath:str):
+    """Parse one EML-formatted xml file and extract its summary row
+
+    Args:
+        filepath (str): Filepath and name of an EML-formatted xml file.
+
+    Returns:
+        dict: One row keyed by `src.pyEML.constants.SUMMARY_COLUMNS`.
+
+    Examples:
+        row = summarize_file('data/short_input.xml')
+    """
+    emld = Emld(filepath=filepath, INTERACTIVE=False)
+    return summarize_emld(emld, filepath=filepath)
+
+def summarize_corpus(filepaths, max_workers:int=None, parquet:str=None):
+    """Build a typed, columnar summary table from many EML-formatted xml files
+
+    Each file is parsed and summarized in a pool of worker processes. The result has one row per file
+    and the columns and dtypes in `src.pyEML.constants.SUMMARY_COLUMNS`.
+
+    Args:
+        filepaths (str or list): A directory (every .xml file under it, at any depth), or a list of .xml filepaths. See `src.pyEML.parallel.xml_filepaths()`.
+        max_workers (int, optional): The number of worker processes. 1 runs in the current process. Defaults to `os.cpu_count()`.
+        parquet (str, optional): If provided, the table is also written to this Parquet filename. Requires `pyarrow`. Defaults to None.
+
+    Returns:
+        pandas.DataFrame: The summary table.
+
+    Examples:
+        mysummary = summarize_corpus('data/')
+        mysummary = summarize_corpus(['data/first.xml', 'data/second.xml'], max_workers=4, parquet='summary.parquet')
+    """
+    try:
+        rows = list(map_files(xml_filepaths(filepaths), summarize_file, max_workers))
+        summary = rows_to_summary(rows)
+        if parquet is not None:
+            write_summary_parquet(summary, parquet)
+        return summary
+
+    except AssertionError as a:
+        print(a)
+
+def summary_to_arrow(summary:pd.DataFrame):
+    """Convert a summary table to a `pyarrow.Table`
+
+    Args:
+        summary (pandas.DataFrame): A table returned by `summarize_corpus()`.
+
+    Returns:
+        pyarrow.Table: The summary table with list columns typed as Arrow lists.
+
+    Examples:
+        mytable = summary_to_arrow(mysummary)
+    """
+    try:
+        assert pa is not None, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}`{bcolors.BOLD}pyarrow{bcolors.ENDC}` is not installed.\nInstall it with `pip install pyarrow` to export Arrow tables.'
+        schema = pa.schema([
+            ('filepath', pa.string()),
+            ('package_id', pa.string()),
+            ('title', pa.string()),
+            ('pub_date', pa.timestamp('ns')),
+            ('begin_date', pa.timestamp('ns')),
+            ('end_date', pa.timestamp('ns')),
+            ('west', pa.float64()),
+            ('east', pa.float64()),
+            ('north', pa.float64()),
+            ('south', pa.float64()),
+            ('bounding_boxes', pa.list_(pa.list_(pa.float64()))),
+            ('keywords', pa.list_(pa.string())),
+            ('cui', pa.string()),
+            ('doi', pa.string())
+        ])
+        return pa.Table.from_pandas(summary, schema=schema, preserve_index=False)
+
+    except AssertionError as a:
+        print(a)
+
+def write_summary_parquet(summary:pd.DataFrame, filename:str):
+    """Write a summary table to a Parquet file
+
+    Args:
+        summary (pandas.DataFrame): A table returned by `summarize_corpus()`.
+        filename (str): The filename and filepath where you want to save your table. Must end in ".parquet".
+
+    Examples:
+        write_summary_parquet(mysummary, 'summary.parquet')
+    """
+    try:
+        assert filename.endswith('.parquet'), f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{filename}".\n`filename` must end in ".parquet".'
+        table = summary_to_arrow(summary)
+        if table is not None:
+            pq.write_table(table, filename)
+
+    except AssertionError as a:
+        print(a)
+
+def rows_to_summary(rows:list):
+    """Stack summary rows into a summary DataFrame
+
+    Args:
+        rows (list): dicts keyed by `src.pyEML.constants.SUMMARY_COLUMNS`, as returned by `summarize_emld()`. Missing keys are blank.
+
+    Returns:
+        pandas.DataFrame: One row per dict, with each column cast to its `SUMMARY_COLUMNS` dtype.
+    """
+    summary = pd.DataFrame.from_records(rows, columns=list(SUMMARY_COLUMNS.keys()))
+    for column, dtype in SUMMARY_COLUMNS.items():
+        if dtype == 'object':
+            summary[column] = summary[column].map(lambda x: x if isinstance(x, list) else [])
+        elif dtype.startswith('datetime'):
+            summary[column] = pd.to_datetime(summary[column]).astype(dtype)
+        else:
+            summary[column] = summary[column].astype(dtype)
+    return summary
+
+def _first_text(root, node_xpath:str):
+    """Return the stripped text of the first node at `node_xpath`, or None"""
+    text = root.findtext(node_xpath)
+    if text is None:
+        return None
+    text = text.strip()
+    return text if text != '' else None
+
+def _parse_date(text):
+    """Type-cast EML date text to `datetime` by trying each of `SUMMARY_DATE_FORMATS`; None if no format matches"""
+    if text is None:
+        return None
+    text = text.strip()
+    for date_format in SUMMARY_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    return None
+
+def _to_float(text):
+    """Type-cast coordinate text to float; None if the text is missing or not numeric"""
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
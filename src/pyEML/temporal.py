@@ -0,0 +1,341 @@
+"""Python source module for time-range queries over a corpus of EML documents
+
+`temporal.py` holds `TemporalIndex`, an interval tree over each document's `temporalCoverage`: every
+`rangeOfDates` (begin to end) and `singleDateTime` (one day). Intervals are sorted by begin date and laid out
+as an implicit balanced binary tree whose nodes also hold the latest end date below them, so a query descends
+only into subtrees that can overlap it. Overlap, containment, and point-in-time queries answer "every dataset
+covering 2010-2012" without opening any files. `src.pyEML.corpus.EmlCorpus` keeps the index up to date and saves
+it beside its manifest.
+
+Dates are compared by day. Year-only and month-only dates stand for the whole year or month, so a range that ends
+in "2012" runs through 2012-12-31.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import calendar
+from datetime import date, datetime
+import math
+import os
+import numpy as np
+from src.pyEML.constants import LOOKUPS, SUMMARY_DATE_FORMATS, TEMPORAL_PREDICATES
+
+#: the index format version; an index saved with another version is discarded and rebuilt
+_VERSION = 1
+_COVERAGE_XPATH = LOOKUPS['temporal_coverage']['node_xpath']
+#: subtrees this deep or shallower are scanned in order instead of descended
+_LEAF_LEVEL = 2
+
+def date_bounds(value):
+    """Get the first and last day a date stands for, as ordinals (see `datetime.date.toordinal()`)
+
+    Args:
+        value (str, int, datetime.date, or datetime.datetime): A date. Text is read with `src.pyEML.constants.SUMMARY_DATE_FORMATS`; an int is a year.
+
+    Returns:
+        tuple: (first day, last day). E.g., the ordinals of 2012-01-01 and 2012-12-31 for "2012". None if `value` isn't a date.
+    """
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.toordinal(), value.toordinal()
+    if isinstance(value, int) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    for date_format in SUMMARY_DATE_FORMATS:
+        try:
+            first = datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+        if '%d' in date_format:
+            last = first
+        elif '%m' in date_format or '%b' in date_format:
+            last = first.replace(day=calendar.monthrange(first.year, first.month)[1])
+        else:
+            last = first.replace(month=12, day=31)
+        return first.toordinal(), last.toordinal()
+    return None
+
+def temporal_ranges(root):
+    """Extract every temporal coverage interval from an EML element tree
+
+    Args:
+        root (lxml.etree._Element): The root node of an EML document.
+
+    Returns:
+        list: [first day, last day] ordinal pairs, one per `rangeOfDates` and `singleDateTime`. Ranges with an unreadable or missing date are left out.
+    """
+    ranges = []
+    for coverage in root.findall(_COVERAGE_XPATH):
+        for node in coverage.findall('rangeOfDates'):
+            begin = date_bounds(node.findtext('beginDate/calendarDate'))
+            end = date_bounds(node.findtext('endDate/calendarDate'))
+            if begin is not None and end is not None:
+                ranges.append([min(begin[0], end[0]), max(begin[1], end[1])]) # a reversed range still covers the days between its dates
+        for node in coverage.findall('singleDateTime'):
+            day = date_bounds(node.findtext('calendarDate'))
+            if day is not None:
+                ranges.append(list(day))
+    return ranges
+
+class TemporalIndex():
+    """An interval tree over documents' temporal coverage
+
+    Documents are identified by a key (in `src.pyEML.corpus.EmlCorpus`, the file's manifest key); each also carries its packageId and the content hash it was indexed from.
+    """
+
+    #: the index's filename, inside a corpus' index directory
+    filename = 'temporal_index.npz'
+
+    def __init__(self):
+        """Constructor for class TemporalIndex"""
+        self._docs = {} # key: [packageId, content hash, list of (first day, last day) intervals]
+        self._tree = None # (begins, ends, subtree max ends, keys, root, root level), as lists, in begin order; None until the next query after a change
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, key:str):
+        return key in self._docs
+
+    def hash(self, key:str):
+        """Get the content hash a document was indexed from
+
+        Args:
+            key (str): The document's key.
+
+        Returns:
+            str: The hash, or None if the document isn't indexed.
+        """
+        doc = self._docs.get(key)
+        return doc[1] if doc is not None else None
+
+    def keys(self):
+        """Get the key of every indexed document
+
+        Returns:
+            list: The keys.
+        """
+        return list(self._docs)
+
+    def update(self, key:str, document:dict, package_id:str=None, content_hash:str=None):
+        """Index a document's temporal coverage, replacing any earlier version with the same key
+
+        Args:
+            key (str): The document's key.
+            document (dict): Holds 'temporal_ranges', as returned by `temporal_ranges()`. Documents without ranges are recorded, but never match.
+            package_id (str, optional): The document's packageId, which queries return. Defaults to None.
+            content_hash (str, optional): The hash of the content the ranges came from. See `hash()`. Defaults to None.
+        """
+        self._docs[key] = [package_id, content_hash, [tuple(interval) for interval in document.get('temporal_ranges') or []]]
+        self._tree = None
+
+    def remove(self, key:str):
+        """Remove a document from the index
+
+        Args:
+            key (str): The document's key.
+
+        Returns:
+            bool: True if the document was indexed.
+        """
+        if self._docs.pop(key, None) is None:
+            return False
+        self._tree = None
+        return True
+
+    def overlaps(self, begin, end=None):
+        """Find the documents with coverage during any part of a period
+
+        Args:
+            begin (str, int, datetime.date, or datetime.datetime): The period's first date. See `date_bounds()`.
+            end (optional): The period's last date. Defaults to None (the period `begin` stands for, e.g., all of 2010 for 2010).
+
+        Returns:
+            list: (packageId, key) tuples, sorted by key.
+        """
+        return self.query(begin, end, predicate='overlaps')
+
+    def contains(self, begin, end=None):
+        """Find the documents with one coverage interval that spans a whole period, or, with one date, a point in time
+
+        Args:
+            begin, end: As in `overlaps()`.
+
+        Returns:
+            list: (packageId, key) tuples, sorted by key.
+        """
+        return self.query(begin, end, predicate='contains')
+
+    def within(self, begin, end=None):
+        """Find the documents whose coverage all falls inside a period
+
+        Args:
+            begin, end: As in `overlaps()`.
+
+        Returns:
+            list: (packageId, key) tuples, sorted by key.
+        """
+        return self.query(begin, end, predicate='within')
+
+    def query(self, begin, end=None, predicate:str='overlaps'):
+        """Find the documents whose coverage relates to a period
+
+        Args:
+            begin, end: As in `overlaps()`.
+            predicate (str, optional): One of `src.pyEML.constants.TEMPORAL_PREDICATES`: 'overlaps' (an interval shares a day with the period),
+                'contains' (an interval spans the whole period), or 'within' (every interval falls inside the period). Defaults to 'overlaps'.
+
+        Returns:
+            list: (packageId, key) tuples, sorted by key.
+
+        Raises:
+            ValueError: `predicate` isn't one of `src.pyEML.constants.TEMPORAL_PREDICATES`, or `begin` or `end` isn't a date.
+        """
+        if predicate not in TEMPORAL_PREDICATES:
+            raise ValueError(f'`predicate` must be one of {TEMPORAL_PREDICATES}.')
+        first = date_bounds(begin)
+        last = date_bounds(end) if end is not None else first
+        if first is None or last is None:
+            raise ValueError(f'Could not read {begin if first is None else end} as a date. Use a datetime.date, a year, or text in one of these formats: {SUMMARY_DATE_FORMATS}.')
+        period_begin, period_end = min(first[0], last[0]), max(first[1], last[1])
+        if predicate == 'contains': # an interval that spans the period holds its first day
+            keys = {key for key, _, interval_end in self._stab(period_begin, period_begin) if interval_end >= period_end}
+        else:
+            keys = {key for key, _, _ in self._stab(period_begin, period_end)}
+        if predicate == 'within':
+            keys = {key for key in keys if all(period_begin <= interval_begin and interval_end <= period_end for interval_begin, interval_end in self._docs[key][2])}
+        return [(self._docs[key][0], key) for key in sorted(keys)]
+
+    def _stab(self, period_begin:int, period_end:int):
+        """Yield (key, begin, end) for every interval that shares a day with [period_begin, period_end]"""
+        begins, ends, maxes, keys, root, level = self._build()
+        if len(keys) == 0:
+            return
+        n = len(keys)
+        stack = [(root, level)]
+        while stack:
+            node, level = stack.pop()
+            if level <= _LEAF_LEVEL: # scan the subtree's intervals in begin order
+                for i in range(node - (1 << level) + 1, min(node + (1 << level), n)):
+                    if begins[i] > period_end:
+                        break
+                    if ends[i] >= period_begin:
+                        yield keys[i], begins[i], ends[i]
+                continue
+            half = 1 << (level - 1)
+            if maxes[node - half] >= period_begin:
+                stack.append((node - half, level - 1))
+            if node < n and begins[node] <= period_end: # nodes past `n` only pad the tree out to a full one
+                if ends[node] >= period_begin:
+                    yield keys[node], begins[node], ends[node]
+                if maxes[node + half] >= period_begin:
+                    stack.append((node + half, level - 1))
+
+    def _build(self):
+        """Sort the intervals by begin date and compute each subtree's latest end, if anything changed since the last query"""
+        if self._tree is not None:
+            return self._tree
+        items = sorted((interval[0], interval[1], key) for key, doc in self._docs.items() for interval in doc[2])
+        begins = np.array([item[0] for item in items], dtype=np.int64)
+        ends = np.array([item[1] for item in items], dtype=np.int64)
+        self._tree = _implicit_tree(begins, ends, [item[2] for item in items])
+        return self._tree
+
+    def save(self, directory:str):
+        """Save the index, with its tree, to `directory`, as `TemporalIndex.filename`
+
+        Args:
+            directory (str): The directory. It must exist.
+        """
+        begins, ends, maxes, tree_keys, _, _ = self._build()
+        keys = list(self._docs)
+        filename = os.path.join(directory, self.filename)
+        tmp_filename = filename + '.tmp.npz' # `np.savez` adds ".npz" to names without it
+        np.savez(
+            tmp_filename,
+            version=np.array(_VERSION),
+            keys=np.array(keys, dtype=str),
+            package_ids=np.array([self._docs[key][0] or '' for key in keys], dtype=str),
+            hashes=np.array([self._docs[key][1] or '' for key in keys], dtype=str),
+            interval_counts=np.array([len(self._docs[key][2]) for key in keys], dtype=np.int64),
+            intervals=np.array([interval for key in keys for interval in self._docs[key][2]], dtype=np.int64).reshape(-1, 2),
+            begins=np.array(begins, dtype=np.int64),
+            ends=np.array(ends, dtype=np.int64),
+            maxes=np.array(maxes, dtype=np.int64),
+            tree_keys=np.array(tree_keys, dtype=str)
+        )
+        os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load(cls, directory:str):
+        """Load an index saved by `save()`
+
+        Args:
+            directory (str): The directory it was saved to.
+
+        Returns:
+            TemporalIndex: The index; an empty one if there is no saved index, or it is unreadable or from another version.
+        """
+        try:
+            with np.load(os.path.join(directory, cls.filename), allow_pickle=False) as data:
+                if int(data['version']) != _VERSION:
+                    return cls()
+                index = cls()
+                intervals = [tuple(interval) for interval in data['intervals'].tolist()]
+                start = 0
+                for key, package_id, content_hash, end in zip(data['keys'].tolist(), data['package_ids'].tolist(), data['hashes'].tolist(), np.cumsum(data['interval_counts']).tolist()):
+                    index._docs[key] = [package_id or None, content_hash or None, intervals[start:end]]
+                    start = end
+                # restore the tree as saved, so the first query doesn't rebuild it
+                maxes = data['maxes'].tolist()
+                level = max(1, math.ceil(math.log2(len(maxes) + 1))) - 1
+                index._tree = (data['begins'].tolist(), data['ends'].tolist(), maxes, data['tree_keys'].tolist(), (1 << level) - 1, level)
+            return index
+        except (OSError, ValueError, KeyError):
+            return cls()
+
+def _implicit_tree(begins:np.ndarray, ends:np.ndarray, keys:list):
+    """Lay sorted intervals out as an implicit balanced binary tree
+
+    Node i's level is its count of trailing 1 bits; a node at level k has children i - 2**(k-1) and i + 2**(k-1).
+    The tree is padded to 2**K - 1 nodes with intervals that begin after, and end before, every real one.
+
+    Returns:
+        tuple: (begins, ends, subtree max ends, keys, root node, root level). `maxes` has an entry for every node, padding included; the others have one per interval.
+    """
+    n = len(keys)
+    levels = max(1, math.ceil(math.log2(n + 1)))
+    size = (1 << levels) - 1
+    maxes = np.full(size, np.iinfo(np.int64).min, dtype=np.int64)
+    maxes[:n] = ends
+    for level in range(1, levels):
+        nodes = np.arange((1 << level) - 1, size, 1 << (level + 1))
+        half = 1 << (level - 1)
+        maxes[nodes] = np.maximum(maxes[nodes], np.maximum(maxes[nodes - half], maxes[nodes + half]))
+    return begins.tolist(), ends.tolist(), maxes.tolist(), keys, (1 << (levels - 1)) - 1, levels - 1
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
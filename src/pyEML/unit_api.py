@@ -0,0 +1,323 @@
+"""Python source module for NPS IRMA unit geography lookups
+
+`unit_api.py` fetches NPS content unit geographies (the `ArrayOfUnitGeography` xml that
+`Emld.set_nps_geographic_coverage()` turns into bounding boxes) from the IRMA REST service.
+Responses are cached on disk, keyed by unit code (and by server, for servers other than the NPS IRMA service). A cached response is used without any network
+call until it is older than its time-to-live; after that it is revalidated with the server's
+ETag/Last-Modified validators, so an unchanged unit costs one small 304 response instead of a download.
+Requests go through the shared `src.pyEML.resilience` client (pooled keep-alive connections, timeouts,
+retries with backoff, and a circuit breaker), and `get_unit_geographies()` fetches many units
+concurrently, so a multi-park network costs about one round trip instead of one per park.
+`aget_unit_geography()` and `aget_unit_geographies()` do the same from `asyncio` code without blocking the event loop.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import time
+from src.pyEML.constants import IRMA_UNIT_API, NPS_IRMA_UNIT_API, UNIT_CACHE_DIR, UNIT_CACHE_TTL
+from src.pyEML.error_classes import ExternalServiceError, bcolors
+from src.pyEML.resilience import ResilientClient, default_client
+from src.pyEML.utils import write_bytes
+
+#: the endpoint name that unit geography requests are counted under in `ResilientClient.stats()`
+ENDPOINT = 'irma_unit_geography'
+
+class ResponseCache():
+    """An on-disk cache of http response bodies and their validators"""
+
+    def __init__(self, directory:str=UNIT_CACHE_DIR, ttl:int=UNIT_CACHE_TTL):
+        """Constructor for class ResponseCache
+
+        Args:
+            directory (str, optional): Where responses are saved. Defaults to `src.pyEML.constants.UNIT_CACHE_DIR`.
+            ttl (int, optional): Seconds a response is used before it is revalidated with the server. Defaults to `src.pyEML.constants.UNIT_CACHE_TTL`.
+        """
+        self.directory = directory
+        self.ttl = ttl
+
+    def lookup(self, key:str):
+        """Read a cached response
+
+        Args:
+            key (str): The cache key (e.g., a unit code).
+
+        Returns:
+            tuple: (body, meta). `body` (bytes) is the response body and `meta` (dict) holds 'url', 'fetched_at', 'etag', and 'last_modified'.
+                (None, None) if there is no cached response.
+        """
+        try:
+            with open(self._filename(key, '.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(self._filename(key, '.xml'), 'rb') as f:
+                body = f.read()
+            return body, meta
+        except (OSError, ValueError): # missing or half-written entry; treat as a miss
+            return None, None
+
+    def is_fresh(self, meta:dict):
+        """True if a cached response is younger than `self.ttl`"""
+        return time.time() - meta.get('fetched_at', 0) < self.ttl
+
+    def store(self, key:str, url:str, body:bytes, etag:str=None, last_modified:str=None):
+        """Save a response and its validators
+
+        Args:
+            key (str): The cache key (e.g., a unit code).
+            url (str): The url the response came from.
+            body (bytes): The response body.
+            etag (str, optional): The response's ETag header. Defaults to None.
+            last_modified (str, optional): The response's Last-Modified header. Defaults to None.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        meta = {'url': url, 'fetched_at': time.time(), 'etag': etag, 'last_modified': last_modified}
+        write_bytes(self._filename(key, '.xml'), body)
+        write_bytes(self._filename(key, '.json'), json.dumps(meta).encode('utf-8')) # written last; its presence marks a complete entry
+
+    def touch(self, key:str, meta:dict):
+        """Restart the time-to-live of a cached response that the server confirmed is unchanged"""
+        meta['fetched_at'] = time.time()
+        write_bytes(self._filename(key, '.json'), json.dumps(meta).encode('utf-8'))
+
+    def _filename(self, key:str, suffix:str):
+        return os.path.join(self.directory, key + suffix)
+
+#: the cache that `get_unit_geography()` uses when no `cache` is passed; None turns caching off
+default_cache = ResponseCache()
+
+def set_default_cache(directory:str=UNIT_CACHE_DIR, ttl:int=UNIT_CACHE_TTL, enabled:bool=True):
+    """Configure the on-disk cache that `get_unit_geography()` uses by default
+
+    Args:
+        directory (str, optional): Where responses are saved. Defaults to `src.pyEML.constants.UNIT_CACHE_DIR`.
+        ttl (int, optional): Seconds a response is used before it is revalidated. Defaults to `src.pyEML.constants.UNIT_CACHE_TTL`.
+        enabled (bool, optional): False turns caching off. Defaults to True.
+
+    Examples:
+        set_default_cache(directory='/data/pyEML_cache', ttl=7*24*60*60)
+        set_default_cache(enabled=False)
+    """
+    global default_cache
+    default_cache = ResponseCache(directory=directory, ttl=ttl) if enabled else None
+
+#: the url template that `get_unit_geography()` requests; `{unit}` is replaced with the unit code
+unit_api_url = IRMA_UNIT_API
+
+def set_unit_api_url(url:str=NPS_IRMA_UNIT_API):
+    """Point unit geography lookups at another server, e.g., a `src.pyEML.irma_standin.IrmaStandIn` in tests and benchmarks
+
+    Responses from other servers are cached apart from the NPS IRMA service's, so switching servers never serves or overwrites another server's cached response,
+    and they aren't saved to the default geometry pack (see `src.pyEML.geometry_pack.get_unit_bounding_boxes()`).
+
+    Args:
+        url (str, optional): A url template containing `{unit}`. Defaults to `src.pyEML.constants.NPS_IRMA_UNIT_API`, the NPS IRMA service.
+
+    Examples:
+        set_unit_api_url('http://127.0.0.1:8123/v2/rest/unit/{unit}/geography')
+        set_unit_api_url() # back to the NPS IRMA service
+    """
+    assert '{unit}' in url, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{url}".\n`url` must contain "{{unit}}", which is replaced with a unit code.'
+    global unit_api_url
+    unit_api_url = url
+
+def is_nps_api():
+    """True if unit geography lookups go to the NPS IRMA service (`src.pyEML.constants.NPS_IRMA_UNIT_API`), not another server"""
+    return unit_api_url == NPS_IRMA_UNIT_API
+
+def get_unit_geographies(units:list, cache:ResponseCache=None, client:ResilientClient=None, quiet:bool=True):
+    """Get the `ArrayOfUnitGeography` xml for many NPS units, fetching them concurrently
+
+    Units that are fresh in the cache cost no network call. The rest are requested in parallel over `client.pool`,
+    at most `client.pool.max_per_host` at a time.
+
+    Args:
+        units (list): Four-character NPS unit codes. E.g., ['ANTI', 'CATO', 'CHOH'].
+        cache (ResponseCache, optional): The cache to use. Defaults to `default_cache`.
+        client (ResilientClient, optional): The client to send requests with. Defaults to `src.pyEML.resilience.default_client`.
+        quiet (bool, optional): False prints whether each response came from the cache or the network. Defaults to True.
+
+    Returns:
+        dict: Response bodies (bytes), keyed by unit code as given, in the order of `units`.
+
+    Raises:
+        ExternalServiceError: A unit could not be fetched and isn't cached (`CircuitOpenError` if the service is being skipped after repeated failures).
+
+    Examples:
+        bodies = get_unit_geographies(['ANTI', 'CATO', 'CHOH'])
+    """
+    if client is None:
+        client = default_client
+    units = list(dict.fromkeys(units)) # drop repeats; keeps order
+    if len(units) <= 1:
+        return {unit: get_unit_geography(unit=unit, cache=cache, client=client, quiet=quiet) for unit in units}
+    with ThreadPoolExecutor(max_workers=min(len(units), client.pool.max_per_host)) as executor:
+        bodies = executor.map(lambda unit: get_unit_geography(unit=unit, cache=cache, client=client, quiet=quiet), units)
+        return dict(zip(units, bodies))
+
+def get_unit_geography(unit:str, cache:ResponseCache=None, client:ResilientClient=None, quiet:bool=True):
+    """Get the `ArrayOfUnitGeography` xml for one NPS unit, from the cache when possible
+
+    Args:
+        unit (str): A four-character NPS unit code. E.g., "GLAC".
+        cache (ResponseCache, optional): The cache to use. Defaults to `default_cache`.
+        client (ResilientClient, optional): The client to send requests with. Defaults to `src.pyEML.resilience.default_client`.
+        quiet (bool, optional): False prints whether the response came from the cache or the network. Defaults to True.
+
+    Returns:
+        bytes: The response body. If the service fails and a stale cached response exists, the stale response.
+
+    Raises:
+        ExternalServiceError: The service failed (after retries) and nothing is cached (`CircuitOpenError` if the service is being skipped after repeated failures).
+
+    Examples:
+        body = get_unit_geography('GLAC')
+    """
+    if client is None:
+        client = default_client
+    request = _prepare(unit, cache, quiet)
+    if request['fresh']:
+        return request['body']
+    try:
+        status, response_headers, response_body = _http_get(client, request['url'], request['headers'])
+    except ExternalServiceError:
+        if request['body'] is not None: # the server can't be reached; a stale response is better than none
+            return request['body']
+        raise
+    return _complete(request, status, response_headers, response_body)
+
+async def aget_unit_geographies(units:list, cache:ResponseCache=None, client:ResilientClient=None, quiet:bool=True):
+    """Get the `ArrayOfUnitGeography` xml for many NPS units without blocking the event loop
+
+    The `asyncio` version of `get_unit_geographies()`. Requests are sent concurrently over `client.async_pool`,
+    at most `client.async_pool.max_per_host` at a time; cache reads and writes run in the default executor.
+
+    Returns:
+        dict: Response bodies (bytes), keyed by unit code as given, in the order of `units`.
+
+    Raises:
+        ExternalServiceError: A unit could not be fetched and isn't cached.
+
+    Examples:
+        bodies = await aget_unit_geographies(['ANTI', 'CATO', 'CHOH'])
+    """
+    units = list(dict.fromkeys(units)) # drop repeats; keeps order
+    bodies = await asyncio.gather(*[aget_unit_geography(unit=unit, cache=cache, client=client, quiet=quiet) for unit in units])
+    return dict(zip(units, bodies))
+
+async def aget_unit_geography(unit:str, cache:ResponseCache=None, client:ResilientClient=None, quiet:bool=True):
+    """Get the `ArrayOfUnitGeography` xml for one NPS unit without blocking the event loop
+
+    The `asyncio` version of `get_unit_geography()`; the request is sent with `ResilientClient.aget()`.
+
+    Returns:
+        bytes: The response body. If the service fails and a stale cached response exists, the stale response.
+
+    Raises:
+        ExternalServiceError: The service failed (after retries) and nothing is cached.
+
+    Examples:
+        body = await aget_unit_geography('GLAC')
+    """
+    if client is None:
+        client = default_client
+    request = await asyncio.to_thread(_prepare, unit, cache, quiet)
+    if request['fresh']:
+        return request['body']
+    try:
+        status, response_headers, response_body = await _ahttp_get(client, request['url'], request['headers'])
+    except ExternalServiceError:
+        if request['body'] is not None:
+            return request['body']
+        raise
+    return await asyncio.to_thread(_complete, request, status, response_headers, response_body)
+
+def _prepare(unit:str, cache:ResponseCache, quiet:bool):
+    """Look a unit up in the cache and build its request
+
+    Returns:
+        dict: 'key', 'url', 'cache', 'cache_key', 'body' and 'meta' (the cached response, or None), 'fresh' (True if `body` can be used as-is),
+            and 'headers' (the request headers, with validators if a stale response is cached).
+    """
+    if cache is None:
+        cache = default_cache
+    key = unit.upper()
+    url = unit_api_url.format(unit=key)
+    cache_key = key if is_nps_api() else key + '-' + hashlib.sha1(unit_api_url.encode('utf-8')).hexdigest()[:10] # other servers get their own entries
+
+    body, meta = (None, None) if cache is None else cache.lookup(cache_key)
+    if meta is not None and meta.get('url') != url: # cached from another server
+        body, meta = None, None
+    request = {'key': key, 'url': url, 'cache': cache, 'cache_key': cache_key, 'body': body, 'meta': meta, 'fresh': False, 'headers': {}}
+    if body is not None and cache.is_fresh(meta):
+        if quiet == False:
+            print(f'Using cached geography for {key}... {cache.directory}')
+        request['fresh'] = True
+        return request
+
+    if meta is not None: # stale entry; ask the server whether it changed
+        if meta.get('etag'):
+            request['headers']['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            request['headers']['If-Modified-Since'] = meta['last_modified']
+    if quiet == False:
+        print(f'API call for {key}... {url}')
+    return request
+
+def _complete(request:dict, status:int, response_headers, response_body:bytes):
+    """Update the cache from a response and return the body to use"""
+    cache = request['cache']
+    if status == 304:
+        cache.touch(request['cache_key'], request['meta'])
+        return request['body']
+    if cache is not None:
+        cache.store(request['cache_key'], request['url'], response_body, etag=response_headers.get('ETag'), last_modified=response_headers.get('Last-Modified'))
+    return response_body
+
+def _http_get(client:ResilientClient, url:str, headers:dict):
+    """Send one GET request through `client`
+
+    Returns:
+        tuple: (status, headers, body). A 304 (Not Modified) response is returned rather than raised.
+
+    Raises:
+        ExternalServiceError: The service kept failing, or answered with a status that is neither 2xx nor 304 (e.g., 404 for an unknown unit code).
+    """
+    status, response_headers, body = client.get(ENDPOINT, url, headers)
+    if status != 304 and not 200 <= status < 300:
+        raise ExternalServiceError(ENDPOINT, url, f'HTTP {status} {http.client.responses.get(status, "")}'.strip())
+    return status, response_headers, body
+
+async def _ahttp_get(client:ResilientClient, url:str, headers:dict):
+    """The `asyncio` version of `_http_get()`"""
+    status, response_headers, body = await client.aget(ENDPOINT, url, headers)
+    if status != 304 and not 200 <= status < 300:
+        raise ExternalServiceError(ENDPOINT, url, f'HTTP {status} {http.client.responses.get(status, "")}'.strip())
+    return status, response_headers, body
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
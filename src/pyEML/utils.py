@@ -0,0 +1,78 @@
+"""Python source module for small helpers that several pyEML modules share
+
+`utils.py` holds `split_antimeridian()`, which turns EML bounding coordinates into boxes that never cross the
+antimeridian, and `write_bytes()` and `write_json()`, which save files through a temporary file so that an
+interrupted save leaves the previous file in place.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import json
+import os
+
+def split_antimeridian(west:float, east:float, north:float, south:float):
+    """Turn EML bounding coordinates into boxes, splitting a box that crosses the antimeridian in two
+
+    Args:
+        west (float): The west bounding coordinate, in decimal degrees. A `west` greater than `east` crosses the antimeridian.
+        east (float): The east bounding coordinate, in decimal degrees.
+        north (float): The north bounding coordinate, in decimal degrees.
+        south (float): The south bounding coordinate, in decimal degrees.
+
+    Returns:
+        list: One or two (min x, min y, max x, max y) tuples. When there are two, the western half is first.
+
+    Examples:
+        split_antimeridian(170.0, -170.0, 10.0, -10.0)
+    """
+    min_y, max_y = min(north, south), max(north, south)
+    if west > east:
+        return [(west, min_y, 180.0, max_y), (-180.0, min_y, east, max_y)]
+    return [(west, min_y, east, max_y)]
+
+def write_bytes(filename:str, data:bytes):
+    """Write bytes through a temporary file, so that concurrent readers never see a partial file
+
+    Args:
+        filename (str): The file to write. Its directory must exist.
+        data (bytes): The file's contents.
+    """
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_filename, filename)
+
+def write_json(filename:str, data):
+    """Write compact JSON through a temporary file, so that an interrupted save leaves the previous file in place
+
+    Args:
+        filename (str): The file to write. Its directory must exist.
+        data (dict or list): Anything `json.dump()` accepts.
+    """
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_filename, filename)
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
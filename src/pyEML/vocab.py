@@ -0,0 +1,486 @@
+"""Python source module for controlled-vocabulary keywords
+
+`vocab.py` loads local thesauri (e.g., NPS, GCMD, and LTER keyword lists) into one compact prefix trie.
+Keys are normalized (case, accents, punctuation, and whitespace don't matter), and each key holds the
+preferred term and thesaurus it belongs to, so validating or canonicalizing a keyword is one walk down the
+trie, O(keyword length), and autocompletion is a walk to the prefix's node and a sorted walk below it.
+`Vocabulary.keyword_sets()` groups keywords into EML `keywordSet`s, one per thesaurus, each with its
+`keywordThesaurus`; `validate_corpus()` checks every keyword of a corpus in one pass.
+
+Thesaurus files are read by extension:
+    .txt    one preferred term per line, optionally followed by tab-separated alternate terms; '#' starts a comment line
+    .csv    hierarchical keyword columns, as in GCMD downloads (Category, Topic, Term, ...); each row's terms are joined with ' > ',
+            and its last term is an alternate. Metadata rows before the header and 'UUID' columns are skipped.
+    .rdf    SKOS concepts: `skos:prefLabel` is preferred; `skos:altLabel` and `skos:hiddenLabel` are alternates
+    .xml    same as .rdf
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import csv
+import os
+import re
+import threading
+import unicodedata
+import lxml.etree as etree
+import pandas as pd
+from src.pyEML.error_classes import bcolors
+from src.pyEML.parallel import map_files, xml_filepaths
+from src.pyEML.constants import LOOKUPS, THESAURUS_DIR, THESAURUS_TITLES
+
+#: the extensions `Vocabulary.load()` reads
+THESAURUS_EXTENSIONS = ('.txt', '.csv', '.rdf', '.xml')
+_SKOS = 'http://www.w3.org/2004/02/skos/core#'
+_XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+_SEPARATORS = re.compile(r'[\W_]+')
+#: xpath, relative to the EML root, of every keyword
+_KEYWORD_XPATH = LOOKUPS['keywords']['node_xpath'] + '/keyword'
+
+def normalize_term(text:str):
+    """Normalize a keyword for lookup: accents removed, case folded, punctuation and whitespace collapsed
+
+    Args:
+        text (str): A keyword. E.g., "Forest  Pathogens".
+
+    Returns:
+        str: The lookup key. E.g., "forest pathogens".
+    """
+    if not text.isascii():
+        text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    return _SEPARATORS.sub(' ', text.casefold()).strip()
+
+class _TrieNode():
+    __slots__ = ('edges', 'value')
+
+    def __init__(self):
+        self.edges = None # first character of an edge label: (label, child node); None on leaves, to save memory
+        self.value = None
+
+class PrefixTrie():
+    """A path-compressed (radix) trie from str keys to values
+
+    Chains of single-child nodes are merged into one edge, so the trie has fewer than two nodes per key.
+    """
+
+    def __init__(self):
+        """Constructor for class PrefixTrie"""
+        self.root = _TrieNode()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, key:str):
+        return self.get(key) is not None
+
+    def insert(self, key:str, value):
+        """Set the value of `key`
+
+        Args:
+            key (str): The key.
+            value: Any value but None.
+
+        Returns:
+            The value `key` held before, or None.
+        """
+        node = self.root
+        i = 0
+        while i < len(key):
+            if node.edges is None:
+                node.edges = {}
+            edge = node.edges.get(key[i])
+            if edge is None: # no edge starts with this character; hang the rest of the key here
+                child = _TrieNode()
+                child.value = value
+                node.edges[key[i]] = (key[i:], child)
+                self._size += 1
+                return None
+            label, child = edge
+            common = len(os.path.commonprefix((label, key[i:i + len(label)])))
+            if common < len(label): # the key leaves this edge part way along; split it
+                middle = _TrieNode()
+                middle.edges = {label[common]: (label[common:], child)}
+                node.edges[key[i]] = (label[:common], middle)
+                child = middle
+            node = child
+            i += common
+        previous = node.value
+        if previous is None:
+            self._size += 1
+        node.value = value
+        return previous
+
+    def get(self, key:str, default=None):
+        """Get the value of `key`
+
+        Args:
+            key (str): The key.
+            default (optional): Returned if `key` isn't in the trie. Defaults to None.
+
+        Returns:
+            The value, or `default`.
+        """
+        node = self.root
+        i = 0
+        while i < len(key):
+            edge = node.edges.get(key[i]) if node.edges is not None else None
+            if edge is None or not key.startswith(edge[0], i):
+                return default
+            i += len(edge[0])
+            node = edge[1]
+        return node.value if node.value is not None else default
+
+    def items(self, prefix:str='', limit:int=None):
+        """Get the keys that start with `prefix`, in sorted order
+
+        Args:
+            prefix (str, optional): The prefix. Defaults to '' (every key).
+            limit (int, optional): The most items to return. Defaults to None (all).
+
+        Returns:
+            list: (key, value) tuples.
+        """
+        node = self.root
+        path = ''
+        i = 0
+        while i < len(prefix):
+            edge = node.edges.get(prefix[i]) if node.edges is not None else None
+            if edge is None:
+                return []
+            label, child = edge
+            rest = prefix[i:]
+            if not (label.startswith(rest) or rest.startswith(label)):
+                return []
+            path += label
+            i += len(label)
+            node = child
+        results = []
+        stack = [(path, node)]
+        while stack and (limit is None or len(results) < limit):
+            path, node = stack.pop()
+            if node.value is not None:
+                results.append((path, node.value))
+            if node.edges is not None:
+                stack += [(path + label, child) for label, child in sorted(node.edges.values(), reverse=True)]
+        return results
+
+class Vocabulary():
+    """Controlled keywords from one or more thesauri, indexed in one `PrefixTrie`"""
+
+    def __init__(self, directory:str=None):
+        """Constructor for class Vocabulary
+
+        Args:
+            directory (str, optional): A directory of thesaurus files, loaded on first lookup. Defaults to None (start empty; call `load()` or `add_terms()`).
+        """
+        self.directory = directory
+        self.thesauri = {} # title: count of preferred terms
+        self._trie = PrefixTrie() # normalized term: tuple of (preferred term, thesaurus title), in load order
+        self._lock = threading.RLock() # reentrant: `_load()` holds it while `add_terms()` takes it for each file
+        self._loaded = directory is None
+
+    def __len__(self):
+        self._load()
+        return len(self._trie)
+
+    def load(self, path:str, title:str=None):
+        """Load one thesaurus file
+
+        Args:
+            path (str): A .txt, .csv, .rdf, or .xml thesaurus file. See the module docstring for the formats.
+            title (str, optional): The thesaurus title written in `keywordThesaurus`. Defaults to the file name's entry in `src.pyEML.constants.THESAURUS_TITLES`, or the file name.
+
+        Returns:
+            str: The thesaurus title.
+
+        Examples:
+            myvocab.load('thesauri/gcmd.csv')
+        """
+        if title is None:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            title = THESAURUS_TITLES.get(stem.lower(), stem)
+        self.add_terms(title, read_thesaurus(path))
+        return title
+
+    def add_terms(self, title:str, terms):
+        """Add terms to a thesaurus
+
+        Args:
+            title (str): The thesaurus title.
+            terms (iterable): Preferred terms (str), or (preferred term, list of alternate terms) tuples.
+
+        Returns:
+            int: The number of preferred terms added.
+        """
+        count = 0
+        with self._lock:
+            for term in terms:
+                preferred, alternates = (term, ()) if isinstance(term, str) else term
+                preferred = ' '.join(preferred.split())
+                if preferred == '':
+                    continue
+                count += 1
+                for label in (preferred, *alternates):
+                    key = normalize_term(label)
+                    if key == '':
+                        continue
+                    matches = self._trie.get(key, ())
+                    if (preferred, title) in matches:
+                        continue
+                    # a key's preferred terms come before the terms it is an alternate of, then thesauri in load order
+                    position = len(matches)
+                    if label is preferred:
+                        position = next((i for i, (term, _) in enumerate(matches) if normalize_term(term) != key), position)
+                    self._trie.insert(key, matches[:position] + ((preferred, title),) + matches[position:])
+            self.thesauri[title] = self.thesauri.get(title, 0) + count
+        return count
+
+    def lookup(self, keyword:str, thesaurus:str=None):
+        """Find a keyword's preferred term
+
+        Args:
+            keyword (str): The keyword, or one of its alternate terms, in any case.
+            thesaurus (str, optional): Only match terms from this thesaurus title. Defaults to None (the first thesaurus, in load order, that has it).
+
+        Returns:
+            tuple: (preferred term, thesaurus title), or None if the keyword isn't in the vocabulary.
+        """
+        self._load()
+        for match in self._trie.get(normalize_term(keyword), ()):
+            if thesaurus is None or match[1] == thesaurus:
+                return match
+        return None
+
+    def validate(self, keyword:str, thesaurus:str=None):
+        """Check whether a keyword is in the vocabulary
+
+        Args:
+            keyword, thesaurus: As in `lookup()`.
+
+        Returns:
+            bool: True if it is.
+        """
+        return self.lookup(keyword, thesaurus=thesaurus) is not None
+
+    def canonicalize(self, keyword:str, thesaurus:str=None):
+        """Get a keyword's preferred term
+
+        Args:
+            keyword, thesaurus: As in `lookup()`.
+
+        Returns:
+            str: The preferred term, or None if the keyword isn't in the vocabulary.
+        """
+        match = self.lookup(keyword, thesaurus=thesaurus)
+        return match[0] if match is not None else None
+
+    def complete(self, prefix:str, limit:int=10, thesaurus:str=None):
+        """Autocomplete a keyword
+
+        Args:
+            prefix (str): The start of a keyword, in any case.
+            limit (int, optional): The most terms to return. Defaults to 10.
+            thesaurus (str, optional): Only complete to terms from this thesaurus title. Defaults to None.
+
+        Returns:
+            list: Preferred terms whose term or alternate term starts with `prefix`, in sorted order of the matching terms.
+        """
+        self._load()
+        terms = []
+        # alternates can map several keys to one term, so read past `limit` keys until `limit` distinct terms are found
+        for _, matches in self._trie.items(normalize_term(prefix), limit=None if thesaurus is not None else limit * 4):
+            for preferred, title in matches:
+                if (thesaurus is None or title == thesaurus) and preferred not in terms:
+                    terms.append(preferred)
+            if len(terms) >= limit:
+                break
+        return terms[:limit]
+
+    def check(self, keywords, thesaurus:str=None):
+        """Look up many keywords
+
+        Args:
+            keywords (iterable): Keywords.
+            thesaurus (str, optional): As in `lookup()`.
+
+        Returns:
+            dict: Each distinct keyword: (preferred term, thesaurus title), or None if it isn't in the vocabulary.
+        """
+        return {keyword: self.lookup(str(keyword), thesaurus=thesaurus) for keyword in keywords}
+
+    def keyword_sets(self, keywords, strict:bool=False):
+        """Group keywords into EML `keywordSet`s, one per thesaurus
+
+        Args:
+            keywords (iterable): Keywords, in the order they should be written.
+            strict (bool, optional): True raises on keywords that aren't in the vocabulary. Defaults to False, which writes them in a last `keywordSet` without a `keywordThesaurus`.
+
+        Returns:
+            list: One dict per `keywordSet` with 'keyword' (list of preferred terms, without duplicates) and, for thesaurus terms, 'keywordThesaurus' (the thesaurus title).
+
+        Raises:
+            KeyError: `strict` is True and some keywords aren't in the vocabulary. The error lists them.
+        """
+        sets = {} # thesaurus title (None for uncontrolled keywords): list of terms
+        unknown = []
+        for keyword in keywords:
+            keyword = str(keyword)
+            match = self.lookup(keyword)
+            if match is None:
+                unknown.append(keyword)
+                term, title = ' '.join(keyword.split()), None
+            else:
+                term, title = match
+            terms = sets.setdefault(title, [])
+            if term not in terms:
+                terms.append(term)
+        if strict and len(unknown) > 0:
+            raise KeyError(unknown)
+        keyword_sets = [{'keyword': terms, 'keywordThesaurus': title} for title, terms in sets.items() if title is not None]
+        if None in sets:
+            keyword_sets.append({'keyword': sets[None]})
+        return keyword_sets
+
+    def _load(self):
+        """Load every thesaurus file in `directory`, once; other threads that look keywords up meanwhile wait for it to finish"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if os.path.isdir(self.directory):
+                # files named in THESAURUS_TITLES load first, in its order, so its thesauri win shared terms
+                ranks = {stem: i for i, stem in enumerate(THESAURUS_TITLES)}
+                for entry in sorted(os.scandir(self.directory), key=lambda entry: (ranks.get(os.path.splitext(entry.name)[0].lower(), len(ranks)), entry.name)):
+                    if entry.is_file() and entry.name.lower().endswith(THESAURUS_EXTENSIONS):
+                        self.load(entry.path)
+            self._loaded = True # set last, so other threads wait for the whole directory rather than read a partial trie
+
+def read_thesaurus(path:str):
+    """Read the terms of one thesaurus file
+
+    Args:
+        path (str): A .txt, .csv, .rdf, or .xml thesaurus file. See the module docstring for the formats.
+
+    Returns:
+        list: (preferred term, list of alternate terms) tuples.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    assert extension in THESAURUS_EXTENSIONS, f'{bcolors.FAIL + bcolors.BOLD + bcolors.UNDERLINE}Process execution failed.\n{bcolors.ENDC}You provided "{path}".\nThesaurus files must end in one of {THESAURUS_EXTENSIONS}.'
+    if extension == '.txt':
+        return _read_txt(path)
+    if extension == '.csv':
+        return _read_csv(path)
+    return _read_skos(path)
+
+def _read_txt(path:str):
+    terms = []
+    with open(path, encoding='utf-8-sig') as f:
+        for line in f:
+            if line.strip() == '' or line.lstrip().startswith('#'):
+                continue
+            labels = [label.strip() for label in line.rstrip('\n').split('\t')]
+            terms.append((labels[0], [label for label in labels[1:] if label != '']))
+    return terms
+
+def _read_csv(path:str):
+    terms = []
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        columns = None
+        for row in csv.reader(f):
+            if columns is None:
+                if len(row) == 0 or any(':' in cell for cell in row): # GCMD downloads start with a "Keyword Version: ..." row
+                    continue
+                columns = [i for i, name in enumerate(row) if name.strip().lower() not in ('uuid', 'id')]
+                continue
+            path_terms = [row[i].strip() for i in columns if i < len(row) and row[i].strip() != '']
+            if len(path_terms) == 0:
+                continue
+            terms.append((' > '.join(path_terms), path_terms[-1:] if len(path_terms) > 1 else []))
+    return terms
+
+def _read_skos(path:str):
+    terms = []
+    for _, concept in etree.iterparse(path, events=('end',), tag=f'{{{_SKOS}}}Concept'):
+        labels = concept.findall(f'{{{_SKOS}}}prefLabel')
+        english = [label for label in labels if label.get(_XML_LANG) in (None, 'en')]
+        preferred = (english or labels)[0].text if labels else None
+        if preferred:
+            alternates = [label.text for tag in ('altLabel', 'hiddenLabel') for label in concept.findall(f'{{{_SKOS}}}{tag}') if label.text]
+            alternates += [label.text for label in labels if label.text and label.text != preferred]
+            terms.append((preferred, alternates))
+        concept.clear()
+    return terms
+
+#: the vocabulary that `validate_corpus()` and `Emld.set_keywords(vocabulary=...)` examples use; loads `src.pyEML.constants.THESAURUS_DIR` on first lookup
+default_vocabulary = Vocabulary(directory=THESAURUS_DIR)
+
+def read_keywords(filepath:str):
+    """Read one EML-formatted xml file's packageId and keywords without building an `Emld`
+
+    Args:
+        filepath (str): Filepath and name of an EML-formatted xml file.
+
+    Returns:
+        tuple: (filepath, packageId, list of keywords).
+    """
+    root = etree.parse(filepath).getroot()
+    return filepath, root.get('packageId'), [elm.text.strip() for elm in root.findall(_KEYWORD_XPATH) if elm.text and elm.text.strip()]
+
+def validate_corpus(filepaths, vocabulary:Vocabulary=None, max_workers:int=None):
+    """Check every keyword of many EML-formatted xml files against a vocabulary in one pass
+
+    Files are read in a pool of worker processes; keywords are checked in this process, so the vocabulary is never copied to workers.
+
+    Args:
+        filepaths (str or list): A directory (every .xml file under it, at any depth), or a list of .xml filepaths. See `src.pyEML.parallel.xml_filepaths()`.
+        vocabulary (Vocabulary, optional): Defaults to `default_vocabulary`.
+        max_workers (int, optional): The number of worker processes. 1 runs in the current process. Defaults to `os.cpu_count()`.
+
+    Returns:
+        pandas.DataFrame: One row per keyword per file: 'filepath', 'package_id', 'keyword', 'preferred' (None if not in the vocabulary), and 'thesaurus'.
+
+    Examples:
+        report = validate_corpus('data/')
+        report[report['preferred'].isna()]
+    """
+    try:
+        documents = map_files(xml_filepaths(filepaths), read_keywords, max_workers)
+        if vocabulary is None:
+            vocabulary = default_vocabulary
+
+        rows = []
+        matches = {} # keywords repeat across a corpus; look each one up once
+        for filepath, package_id, keywords in documents:
+            for keyword in keywords:
+                if keyword not in matches:
+                    matches[keyword] = vocabulary.lookup(keyword)
+                preferred, thesaurus = matches[keyword] or (None, None)
+                rows.append((filepath, package_id, keyword, preferred, thesaurus))
+        return pd.DataFrame.from_records(rows, columns=['filepath', 'package_id', 'keyword', 'preferred', 'thesaurus'])
+
+    except AssertionError as a:
+        print(a)
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
@@ -0,0 +1,188 @@
+"""Python source module for numeric parsing of WKT polygons
+
+`wkt.py` parses WKT `POLYGON` and `MULTIPOLYGON` text (the `Geography` that the IRMA unit API returns)
+straight into float64 NumPy arrays. The text is scanned once as a byte array to find ring and polygon
+boundaries, and every coordinate is converted in one call, so a park boundary with hundreds of thousands
+of vertices parses in milliseconds. Extents are vectorized reductions over the coordinate array.
+
+Entity: US National Park Service
+License: MIT, license information at end of file
+"""
+
+import re
+import warnings
+import numpy as np
+
+#: WKT geometry types that `parse_wkt()` understands, and the parenthesis depth of their rings
+WKT_RING_DEPTHS = {'POLYGON': 2, 'MULTIPOLYGON': 3}
+#: translates WKT punctuation to spaces so that only numbers are left
+_PUNCTUATION = str.maketrans('(),', '   ')
+#: anything but number characters and whitespace, once punctuation is translated away
+_NOT_NUMERIC = re.compile(r'[^0-9eE+\-.\s]+')
+
+class WktGeometry():
+    """A parsed WKT polygon or multipolygon"""
+
+    def __init__(self, coords:np.ndarray, ring_offsets:np.ndarray, ring_polygons:np.ndarray, multi:bool):
+        """Constructor for class WktGeometry
+
+        Args:
+            coords (numpy.ndarray): float64 array of shape (vertices, 2); column 0 is longitude (x), column 1 latitude (y).
+            ring_offsets (numpy.ndarray): Ring `i` is `coords[ring_offsets[i]:ring_offsets[i + 1]]`.
+            ring_polygons (numpy.ndarray): The polygon each ring belongs to. The first ring of each polygon is its exterior; any others are holes.
+            multi (bool): True if the geometry is a MULTIPOLYGON.
+        """
+        self.coords = coords
+        self.ring_offsets = ring_offsets
+        self.ring_polygons = ring_polygons
+        self.multi = multi
+
+    def extent(self):
+        """Compute the geometry's bounding box
+
+        Returns:
+            tuple: (north, east, south, west) in decimal degrees.
+        """
+        west, south = self.coords.min(axis=0)
+        east, north = self.coords.max(axis=0)
+        return float(north), float(east), float(south), float(west)
+
+    def rings(self):
+        """Get every ring
+
+        Returns:
+            list: One float64 array of shape (vertices, 2) per ring, in document order. The arrays are views into `self.coords`.
+        """
+        return [self.coords[start:end] for start, end in zip(self.ring_offsets[:-1], self.ring_offsets[1:])]
+
+    def polygons(self):
+        """Group rings by polygon
+
+        Returns:
+            list: One list per polygon; each holds the polygon's exterior ring followed by its holes.
+        """
+        polygons = [[] for _ in range(int(self.ring_polygons[-1]) + 1)] if len(self.ring_polygons) > 0 else []
+        for polygon, ring in zip(self.ring_polygons, self.rings()):
+            polygons[polygon].append(ring)
+        return polygons
+
+    def to_wkt(self, rings:list=None):
+        """Write the geometry back out as WKT
+
+        Args:
+            rings (list, optional): Replacement coordinates, one array per ring in the order of `self.rings()` (e.g., simplified rings). Defaults to None, which writes `self.coords`.
+
+        Returns:
+            str: WKT text. Coordinates are written with `repr()` precision, so a parse/write round trip is lossless.
+        """
+        if rings is None:
+            rings = self.rings()
+        polygons = [[] for _ in range(int(self.ring_polygons[-1]) + 1)]
+        for polygon, ring in zip(self.ring_polygons, rings):
+            polygons[polygon].append('(' + ', '.join(f'{x!r} {y!r}' for x, y in ring.tolist()) + ')')
+        polygons = ['(' + ', '.join(polygon) + ')' for polygon in polygons]
+        if self.multi:
+            return 'MULTIPOLYGON (' + ', '.join(polygons) + ')'
+        return 'POLYGON ' + polygons[0]
+
+    def to_grings(self):
+        """Write each polygon as EML `gRing` text
+
+        Returns:
+            list: One list per polygon; each holds the exterior ring's `gRing` followed by its holes'. A `gRing` is "lon,lat" pairs separated by spaces.
+        """
+        return [[' '.join(f'{x!r},{y!r}' for x, y in ring.tolist()) for ring in polygon] for polygon in self.polygons()]
+
+def parse_wkt(wkt:str):
+    """Parse WKT POLYGON or MULTIPOLYGON text into float64 arrays
+
+    Z and M ordinates (e.g., `POLYGON Z ((...))`) are dropped.
+
+    Args:
+        wkt (str): The WKT text.
+
+    Returns:
+        WktGeometry: The parsed geometry.
+
+    Raises:
+        ValueError: `wkt` is not a non-empty POLYGON or MULTIPOLYGON, or its coordinates are malformed.
+
+    Examples:
+        geometry = parse_wkt('POLYGON ((-77.5 38.2, -77.1 38.9, -78.2 39.0, -77.5 38.2))')
+        north, east, south, west = geometry.extent()
+    """
+    start = wkt.find('(')
+    kind = wkt[:start].split()[0].upper() if start > 0 and wkt[:start].strip() != '' else None
+    if kind not in WKT_RING_DEPTHS:
+        raise ValueError(f'Expected a non-empty POLYGON or MULTIPOLYGON; got "{wkt[:40]}"')
+    ring_depth = WKT_RING_DEPTHS[kind]
+    body = wkt[start:]
+
+    # find ring and polygon boundaries from the positions of parentheses and commas
+    chars = np.frombuffer(body.encode('ascii'), dtype=np.uint8)
+    parens = np.flatnonzero((chars == ord('(')) | (chars == ord(')')))
+    is_open = chars[parens] == ord('(')
+    depth = np.cumsum(np.where(is_open, 1, -1)) # depth after each parenthesis
+    ring_starts = parens[is_open & (depth == ring_depth)]
+    ring_ends = parens[~is_open & (depth == ring_depth - 1)]
+    if len(ring_starts) == 0 or len(ring_starts) != len(ring_ends) or depth[-1] != 0 or depth.min() < 0:
+        raise ValueError('Unbalanced or empty WKT rings.')
+    commas = np.flatnonzero(chars == ord(','))
+    ring_sizes = np.searchsorted(commas, ring_ends) - np.searchsorted(commas, ring_starts) + 1 # vertices per ring
+    ring_offsets = np.concatenate(([0], np.cumsum(ring_sizes)))
+    if kind == 'MULTIPOLYGON':
+        polygon_starts = parens[is_open & (depth == 2)]
+        ring_polygons = np.searchsorted(polygon_starts, ring_starts, side='right') - 1
+    else:
+        ring_polygons = np.zeros(len(ring_starts), dtype=np.int64)
+
+    text = body.translate(_PUNCTUATION)
+    unexpected = _NOT_NUMERIC.search(text)
+    if unexpected is not None:
+        raise ValueError(f'Unexpected text in WKT coordinates: "{unexpected.group()[:40]}"')
+    # convert every number in one C-level pass. A malformed number (e.g., "1.2.3") ends the pass early on numpy 1.x, which fails the count check below;
+    # numpy 2 raises ValueError instead
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            values = np.fromstring(text, dtype=np.float64, sep=' ')
+    except ValueError as e:
+        raise ValueError(f'Malformed WKT coordinates: {e}')
+    vertices = int(ring_offsets[-1])
+    if vertices == 0 or len(values) % vertices != 0 or len(values) // vertices < 2:
+        raise ValueError(f'{len(values)} numbers do not split into {vertices} vertices.')
+    coords = values.reshape(vertices, -1)[:, :2]
+    return WktGeometry(coords=coords, ring_offsets=ring_offsets, ring_polygons=ring_polygons, multi=kind == 'MULTIPOLYGON')
+
+def wkt_extent(wkt:str):
+    """Compute the bounding box of WKT POLYGON or MULTIPOLYGON text
+
+    Args:
+        wkt (str): The WKT text.
+
+    Returns:
+        tuple: (north, east, south, west) in decimal degrees.
+    """
+    return parse_wkt(wkt).extent()
+
+"""Copyright (C) 2023 Charles Wainright, US National Park Service
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
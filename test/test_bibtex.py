@@ -0,0 +1,32 @@
+from src.pyEML.bibtex import ReferenceIndex, deduplicate, parse_bibtex
+
+TITLE_THEN_DOI = """
+@article{first, title={Forest Pathogens of the Blue Ridge}, year={2019}}
+@article{second, title={Forest pathogens of the blue ridge}, year={2019}, doi={10.1000/xyz123}, journal={Journal of Forests}}
+"""
+
+def test_add_merges_title_record_into_later_doi_record():
+    index = ReferenceIndex()
+    keys = index.add('pkg1', parse_bibtex(TITLE_THEN_DOI))
+    assert keys == ['doi:10.1000/xyz123']
+    assert len(index) == 1
+    assert index.cited_by(doi='https://doi.org/10.1000/xyz123') == ['pkg1']
+    assert index.cited_by(title='forest pathogens of the blue ridge', year='2019') == ['pkg1']
+    record = index.references('pkg1')[0]
+    assert record['key'] == 'first' and record['journal'] == 'Journal of Forests'
+
+def test_deduplicate_title_then_doi():
+    unique = deduplicate(parse_bibtex(TITLE_THEN_DOI))
+    assert len(unique) == 1
+    assert unique[0]['doi'] == '10.1000/xyz123'
+
+def test_title_record_cited_elsewhere_moves_under_doi():
+    records = parse_bibtex(TITLE_THEN_DOI)
+    index = ReferenceIndex()
+    index.add('pkg1', records[:1])
+    index.add('pkg2', records[1:])
+    assert index.cited_by(doi='10.1000/xyz123') == ['pkg1', 'pkg2']
+    assert index.references('pkg1') == index.references('pkg2')
+    index.remove('pkg1')
+    index.remove('pkg2')
+    assert len(index) == 0
@@ -0,0 +1,24 @@
+import os
+import lxml.etree as etree
+from src.pyEML.emld import Emld
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'short_input.xml')
+
+def _big_input(tmp_path):
+    tree = etree.parse(DATA)
+    para = tree.getroot().find('.//abstract/para')
+    para.text = 'Fish & <frogs> "quoted" café ' * 400 + ']]>' # long, with characters that must be escaped
+    path = str(tmp_path / 'big.xml')
+    tree.write(path, xml_declaration=True, encoding='UTF-8')
+    return path
+
+def test_spilled_output_is_byte_identical(tmp_path):
+    path = _big_input(tmp_path)
+    plain = Emld(path, INTERACTIVE=False)
+    spilled = Emld(path, INTERACTIVE=False, spill_threshold=64, spill_dir=str(tmp_path / 'blobs'))
+    assert spilled.blob_store.spilled > 0
+    assert spilled.root.find('.//abstract/para').text == plain.root.find('.//abstract/para').text # spilled text reads back on access
+    plain.write_eml(str(tmp_path / 'plain.xml'))
+    spilled.write_eml(str(tmp_path / 'spilled.xml'))
+    with open(tmp_path / 'plain.xml', 'rb') as a, open(tmp_path / 'spilled.xml', 'rb') as b:
+        assert a.read() == b.read()
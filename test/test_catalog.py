@@ -0,0 +1,59 @@
+import math
+import os
+import lxml.etree as etree
+import numpy as np
+import pytest
+from src.pyEML.catalog import EmlCatalog
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'short_input.xml')
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Five copies of the short example, each with its own packageId, title, and temporal coverage"""
+    tree = etree.parse(DATA)
+    root = tree.getroot()
+    for i in range(5):
+        root.set('packageId', f'pkg.{i}')
+        root.find('./dataset/title').text = f'Survey {i}'
+        coverage = root.find('./dataset/coverage/temporalCoverage/rangeOfDates')
+        coverage.find('beginDate/calendarDate').text = str(2000 + i)
+        coverage.find('endDate/calendarDate').text = str(2000 + i)
+        tree.write(str(tmp_path / f'doc{i}.xml'))
+    return tmp_path
+
+def test_rebuild_and_query(corpus, tmp_path):
+    catalog = EmlCatalog(str(tmp_path / 'catalog.sqlite'))
+    counts = catalog.rebuild(str(corpus), max_workers=1)
+    assert counts == {'packages': 5, 'errors': {}}
+    assert len(catalog) == 5
+    assert [package_id for package_id, _ in catalog.find(begin=2001, end=2002)] == ['pkg.1', 'pkg.2']
+    assert len(catalog.find(title='survey')) == 5
+    record = catalog.get('pkg.3')
+    assert record['begin_date'] == '2003-01-01' and record['end_date'] == '2003-12-31'
+    keyword = record['keywords'][0][0]
+    assert len(catalog.find(keyword=keyword.upper())) == 5
+    west, east, north, south = record['boxes'][0]
+    assert len(catalog.find(bbox=(west, east, north, south))) == 5
+    assert catalog.find(bbox=(east + 1, east + 2, north, south)) == []
+    assert len(catalog.find(bbox=(np.int64(math.floor(west)), np.int64(math.ceil(east)), np.int64(math.ceil(north)), np.int64(math.floor(south))))) == 5 # any real number type
+    catalog.close()
+
+def test_ingest_same_file_twice_in_one_call(corpus, tmp_path):
+    catalog = EmlCatalog(str(tmp_path / 'catalog.sqlite'))
+    filepath = str(corpus / 'doc0.xml')
+    relative = os.path.relpath(filepath)
+    assert catalog.ingest([filepath, filepath, relative], max_workers=1)['packages'] == 1
+    assert catalog.rebuild([filepath, relative], max_workers=1)['packages'] == 1
+    assert len(catalog) == 1
+    assert catalog.remove([filepath]) == 1
+    assert len(catalog) == 0
+    catalog.close()
+
+def test_refuses_to_write_over_a_file_that_is_not_sqlite(corpus, tmp_path, capsys):
+    path = tmp_path / 'notes.txt'
+    path.write_text('not a database')
+    catalog = EmlCatalog(str(path))
+    assert catalog.rebuild(str(corpus), max_workers=1) is None
+    assert 'is not a SQLite file' in capsys.readouterr().out
+    assert path.read_text() == 'not a database'
+    assert len(catalog) == 0 and catalog.find(keyword='x') == [] and catalog.get('pkg.0') is None
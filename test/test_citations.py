@@ -0,0 +1,13 @@
+from src.pyEML.citations import format_citation, format_many
+
+PARTS = {'authors': [{'first': 'albus', 'middle': 'percival', 'last': 'fumblesnore'}], 'title': 'My protocol.', 'date': '2021-01-01',
+         'version': '1.0', 'doc_type': 'Protocol', 'publisher': 'NPS.', 'url': 'https://example.org'}
+
+def test_fields_ending_in_a_period_are_punctuated_once():
+    assert format_citation(PARTS, style='apa') == 'Fumblesnore, A. P. (2021). My protocol (Version 1.0) [Protocol]. NPS. https://example.org'
+    assert format_citation(PARTS, style='chicago') == 'Albus P. Fumblesnore. 2021. My protocol. Protocol. Version 1.0. https://example.org.'
+    assert format_citation(PARTS, style='mla') == 'Fumblesnore, Albus P. My protocol. Protocol, version 1.0, NPS, 2021, https://example.org.'
+
+def test_questions_ellipses_and_missing_parts():
+    citations = format_many([{'title': 'Why birds?', 'date': 2020, 'doc_type': 'Report'}, {'authors': 'Smith, J. M.', 'title': 'Birds...', 'publisher': None}], style='datacite')
+    assert citations == ['(2020): Why birds? (Report).', 'Smith, J. M. Birds...']
@@ -0,0 +1,53 @@
+import os
+import lxml.etree as etree
+from src.pyEML.corpus import EmlCorpus
+from src.pyEML.constants import CORPUS_INDEX_DIR
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'short_input.xml')
+
+def _write(tmp_path, name, title):
+    tree = etree.parse(DATA)
+    tree.getroot().set('packageId', name)
+    tree.getroot().find('./dataset/title').text = title
+    path = tmp_path / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tree.write(str(path))
+    return path
+
+def test_incremental_scan(tmp_path):
+    _write(tmp_path, 'a.xml', 'Forest birds')
+    _write(tmp_path, 'sub/b.xml', 'Stream fish')
+    corpus = EmlCorpus(str(tmp_path))
+    changes = corpus.scan(max_workers=2)
+    assert changes['added'] == ['a.xml', 'sub/b.xml']
+    assert os.path.isdir(tmp_path / CORPUS_INDEX_DIR)
+
+    reloaded = EmlCorpus(str(tmp_path))
+    assert reloaded.scan(max_workers=1) == {'added': [], 'changed': [], 'removed': [], 'touched': [], 'unchanged': 2}
+    assert reloaded.search('fish')[0][2] == 'sub/b.xml'
+
+    _write(tmp_path, 'a.xml', 'Forest bats')
+    os.remove(tmp_path / 'sub' / 'b.xml')
+    changes = reloaded.scan(max_workers=1)
+    assert changes['changed'] == ['a.xml'] and changes['removed'] == ['sub/b.xml']
+    assert reloaded.search('fish') == []
+    assert [key for _, _, key in reloaded.search('bats')] == ['a.xml']
+    assert reloaded.find('a.xml') == ['a.xml']
+
+def test_file_that_vanishes_during_a_scan_is_recorded(tmp_path, monkeypatch):
+    from src.pyEML import corpus as corpus_module
+    _write(tmp_path, 'a.xml', 'Forest birds')
+    walk_xml = corpus_module.walk_xml
+    def _walk_with_a_ghost(root_dir, skip=()):
+        yield from walk_xml(root_dir, skip)
+        yield 'gone.xml', str(tmp_path / 'gone.xml'), os.stat(tmp_path / 'a.xml') # listed by the walk, deleted before it is read
+    monkeypatch.setattr(corpus_module, 'walk_xml', _walk_with_a_ghost)
+    corpus = EmlCorpus(str(tmp_path))
+    changes = corpus.scan(max_workers=1)
+    assert changes['added'] == ['a.xml', 'gone.xml']
+    assert corpus.manifest['gone.xml']['error'] is not None and corpus.manifest['a.xml']['error'] is None
+    assert [key for _, _, key in corpus.search('birds')] == ['a.xml']
+
+    monkeypatch.setattr(corpus_module, 'walk_xml', walk_xml)
+    changes = EmlCorpus(str(tmp_path)).scan(max_workers=1) # saved despite the error
+    assert changes['removed'] == ['gone.xml'] and changes['unchanged'] == 1
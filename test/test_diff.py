@@ -0,0 +1,21 @@
+import lxml.etree as etree
+from src.pyEML.diff import diff_trees
+
+def _diff(old, new):
+    return diff_trees(etree.fromstring(old), etree.fromstring(new))
+
+def test_identical_and_reindented_trees_have_no_edits():
+    assert _diff('<eml><para>hello <b>x</b> world</para></eml>', '<eml><para>hello <b>x</b> world</para></eml>') == []
+    assert _diff('<eml><a>text</a></eml>', '<eml>\n  <a>\n    text\n  </a>\n</eml>') == []
+
+def test_mixed_content_tail_change():
+    edits = _diff('<para>hello <b>x</b> world</para>', '<para>hello <b>x</b> universe</para>')
+    assert edits == [{'op': 'update_tail', 'path': '/para/b', 'old': 'world', 'new': 'universe'}]
+
+def test_text_attribute_insert_and_delete():
+    edits = _diff('<eml><a id="1">old</a><c/></eml>', '<eml><a id="2">new</a><d/></eml>')
+    ops = [(edit['op'], edit['path']) for edit in edits]
+    assert ('update_text', '/eml/a') in ops
+    assert ('update_attribute', '/eml/a') in ops
+    assert ('delete', '/eml/c') in ops
+    assert ('insert', '/eml/d') in ops
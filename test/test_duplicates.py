@@ -0,0 +1,86 @@
+import itertools
+import random
+import numpy as np
+from src.pyEML.emld import Emld
+from src.pyEML.duplicates import DuplicateIndex, find_duplicates, lsh_bands, minhash, shingles
+
+WORDS = [f'{a}{b}' for a in 'forest wetland stream bird bat soil fire plant'.split() for b in 'ab cd ef gh ij kl mn op qr st'.split()]
+
+TITLE = 'Vegetation monitoring of upland forest plots at Acadia National Park, 2019'
+ABSTRACT = 'Field crews recorded tree species, diameter, and canopy condition on permanent plots across the park during the summer season.'
+
+def _random_docs(rng, count):
+    """Random documents, about a third of them edited copies of an earlier one, so pair similarities spread across the threshold"""
+    docs = []
+    for i in range(count):
+        if docs and rng.random() < 0.35:
+            words = list(rng.choice(docs)['abstract'].split())
+            for position in rng.sample(range(len(words)), rng.randint(0, 4)):
+                words[position] = rng.choice(WORDS)
+        else:
+            words = rng.choices(WORDS, k=rng.randint(20, 40))
+        docs.append({'title': '', 'abstract': ' '.join(words), 'keywords': []})
+    return docs
+
+def test_near_copy_is_found_and_unrelated_pair_is_not():
+    index = DuplicateIndex()
+    index.update('2019', {'title': TITLE, 'abstract': ABSTRACT, 'keywords': ['vegetation', 'forests']}, package_id='pkg-2019')
+    index.update('2020', {'title': TITLE.replace('2019', '2020'), 'abstract': ABSTRACT, 'keywords': ['vegetation', 'forests']}, package_id='pkg-2020')
+    index.update('bats', {'title': 'Acoustic bat surveys', 'abstract': 'Detectors recorded echolocation calls at caves and ponds.', 'keywords': ['bats']}, package_id='pkg-bats')
+    found = index.duplicates(0.8)
+    assert [pair[:2] for pair in found] == [('2019', '2020')]
+    assert found[0][2] >= 0.8
+    matches = index.similar({'title': TITLE.replace('2019', '2021'), 'abstract': ABSTRACT, 'keywords': ['vegetation', 'forests']}, 0.8)
+    assert sorted(match[0] for match in matches) == ['pkg-2019', 'pkg-2020']
+    assert index.similar({'title': 'Acoustic bat surveys', 'abstract': 'Bird point counts.', 'keywords': []}, 0.8) == []
+
+def test_find_duplicates_reports_list_positions():
+    emlds = [Emld('data/short_input.xml', INTERACTIVE=False) for _ in range(2)]
+    assert find_duplicates(emlds) == [(0, 1, 1.0)]
+
+def test_estimate_is_close_to_exact_jaccard():
+    rng = random.Random(3)
+    docs = _random_docs(rng, 200)
+    errors = []
+    for first, second in rng.sample(list(itertools.combinations(docs, 2)), 400):
+        a, b = set(shingles(first).tolist()), set(shingles(second).tolist())
+        exact = len(a & b) / len(a | b)
+        estimate = float((minhash(first) == minhash(second)).mean())
+        errors.append(abs(estimate - exact))
+    assert max(errors) < 0.2 # about 4.5 standard errors at 128 permutations
+    assert np.mean(errors) < 0.03
+
+def test_lsh_candidates_match_brute_force():
+    rng = random.Random(7)
+    docs = _random_docs(rng, 300)
+    index = DuplicateIndex()
+    signatures = {}
+    for i, doc in enumerate(docs):
+        index.update(f'k{i:03d}', doc)
+        signatures[f'k{i:03d}'] = minhash(doc)
+    for threshold in (0.5, 0.8):
+        brute = {}
+        for first, second in itertools.combinations(sorted(signatures), 2):
+            similarity = float((signatures[first] == signatures[second]).mean())
+            if similarity >= threshold:
+                brute[(first, second)] = similarity
+        found = {(first, second): similarity for first, second, similarity in index.duplicates(threshold)}
+        assert len(brute) > 20
+        assert all(brute.get(pair) == similarity for pair, similarity in found.items()) # no false positives, same estimates
+        bands, rows = lsh_bands(threshold)
+        missed = [similarity for pair, similarity in brute.items() if pair not in found]
+        assert all(1.0 - (1.0 - similarity ** rows) ** bands < 0.999 for similarity in missed) # only pairs near the threshold may be missed
+        assert len(missed) <= 0.05 * len(brute)
+
+def test_save_and_load_round_trip(tmp_path):
+    docs = _random_docs(random.Random(11), 60)
+    index = DuplicateIndex()
+    for i, doc in enumerate(docs):
+        index.update(f'k{i:02d}', doc, package_id=f'pkg{i}', content_hash=f'h{i}' if i % 2 else None)
+    index.save(str(tmp_path))
+    loaded = DuplicateIndex.load(str(tmp_path))
+    assert loaded.keys() == sorted(index.keys())
+    assert all(loaded.hash(key) == index.hash(key) for key in index.keys())
+    assert loaded.duplicates(0.5) == index.duplicates(0.5)
+    assert loaded.similar(docs[5], 0.5) == index.similar(docs[5], 0.5)
+    assert len(DuplicateIndex.load(str(tmp_path), seed=2)) == 0 # another seed's signatures aren't comparable
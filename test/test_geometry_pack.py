@@ -0,0 +1,22 @@
+import os
+from src.pyEML import geometry_pack, unit_api
+from src.pyEML.constants import NPS_IRMA_UNIT_API
+from src.pyEML.irma_standin import IrmaStandIn
+
+def test_standin_answers_stay_out_of_the_default_pack(tmp_path, monkeypatch):
+    pack_path = str(tmp_path / 'pack.sqlite')
+    monkeypatch.setattr(geometry_pack, 'default_pack', geometry_pack.GeometryPack(path=pack_path))
+    monkeypatch.setattr(unit_api, 'default_cache', unit_api.ResponseCache(directory=str(tmp_path / 'cache')))
+    with IrmaStandIn(synthetic_vertices=50) as server:
+        unit_api.set_unit_api_url(server.url)
+        try:
+            boxes = geometry_pack.get_unit_bounding_boxes(['ANTI', 'CATO'])
+            explicit = geometry_pack.GeometryPack(path=str(tmp_path / 'standin.sqlite'))
+            geometry_pack.get_unit_bounding_boxes(['ANTI'], pack=explicit)
+        finally:
+            unit_api.set_unit_api_url()
+    assert set(boxes) == {'ANTI', 'CATO'}
+    assert not os.path.exists(pack_path)
+    assert explicit.units() == ['ANTI'] # a pack passed explicitly still stores another server's answers
+    assert all(name != 'ANTI.json' for name in os.listdir(tmp_path / 'cache')) # cached apart from the NPS service's entries
+    assert unit_api.unit_api_url == NPS_IRMA_UNIT_API
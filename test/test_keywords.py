@@ -0,0 +1,22 @@
+import lxml.etree as etree
+from src.pyEML.keywords import KeywordIndex
+
+DOC = """<eml><dataset>
+<keywordSet><keyword>birds</keyword><keyword>forest</keyword></keywordSet>
+<keywordSet><keyword> birds </keyword><keywordThesaurus>NPS</keywordThesaurus></keywordSet>
+</dataset></eml>"""
+
+def _keywords(root):
+    return [elm.text.strip() for elm in root.iter('keyword')]
+
+def test_remove_drops_every_copy_of_a_repeated_keyword():
+    root = etree.fromstring(DOC)
+    index = KeywordIndex(root)
+    assert list(index) == ['birds', 'forest']
+    assert index.remove('birds')
+    assert 'birds' not in index and 'birds' not in _keywords(root)
+    assert len(root.findall('dataset/keywordSet')) == 1 # the NPS set held only "birds"
+    assert not index.remove('birds')
+    assert index.add('birds', thesaurus='NPS')
+    assert _keywords(root) == ['forest', 'birds']
+    assert index.thesaurus('birds') == 'NPS'
@@ -0,0 +1,14 @@
+from src.pyEML.constants import LANGUAGE_ALIASES
+from src.pyEML.languages import lookup_language, normalize_language_key
+
+def test_codes_names_and_aliases():
+    assert lookup_language('en') == 'eng'
+    assert lookup_language('English') == 'eng'
+    assert lookup_language('navaho') == 'nav'
+    assert lookup_language('American Sign Language') == 'ase'
+
+def test_every_alias_takes_effect():
+    for alias, code in LANGUAGE_ALIASES.items():
+        assert lookup_language(alias) == code, alias
+    assert normalize_language_key('ASL') == 'asl'
+    assert lookup_language('asl') == 'asl' # Asilulu, not American Sign Language
@@ -0,0 +1,39 @@
+import os
+import pytest
+from src.pyEML.parallel import map_files, walk_xml, xml_filepaths
+from src.pyEML.summary import summarize_corpus
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'short_input.xml')
+
+def _tree(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / '.hidden').mkdir()
+    for name in ('a.xml', 'sub/b.xml', '.hidden/c.xml', 'notes.txt'):
+        (tmp_path / name).write_bytes(open(DATA, 'rb').read())
+    return tmp_path
+
+def test_walk_skips_hidden_and_listed_directories(tmp_path):
+    root = _tree(tmp_path)
+    assert sorted(key for key, _, _ in walk_xml(str(root))) == ['a.xml', 'sub/b.xml']
+    assert [key for key, _, _ in walk_xml(str(root), skip=(str(root / 'sub'),))] == ['a.xml']
+
+def test_xml_filepaths(tmp_path):
+    root = _tree(tmp_path)
+    assert xml_filepaths(str(root)) == [str(root / 'a.xml'), str(root / 'sub' / 'b.xml')]
+    assert xml_filepaths(['x.xml']) == ['x.xml']
+    with pytest.raises(AssertionError):
+        xml_filepaths(['x.txt'])
+    with pytest.raises(AssertionError):
+        xml_filepaths(str(root / 'missing'))
+
+def test_map_files_keeps_order():
+    items = list(range(50))
+    assert list(map_files(items, abs, max_workers=1)) == items
+    assert list(map_files(items, abs, max_workers=2)) == items
+    with pytest.raises(AssertionError):
+        map_files(items, abs, max_workers=0)
+
+def test_summarize_corpus(tmp_path):
+    summary = summarize_corpus(str(_tree(tmp_path)), max_workers=2)
+    assert len(summary) == 2
+    assert set(summary['package_id']) == {'2022_NCRN_forest_vegetation_metadata'}
@@ -0,0 +1,70 @@
+import asyncio
+import gc
+import threading
+import time
+import tracemalloc
+from src.pyEML.emld import Emld
+from src.pyEML.profiling import MemoryProfile, profile_memory, track_memory
+
+class _Worker():
+    def __init__(self):
+        self.memory_profile = MemoryProfile()
+        self.held = None
+        self.allocated = threading.Event()
+
+    @track_memory
+    def allocate(self, size:int, pause:float):
+        self.held = bytearray(size)
+        self.allocated.set()
+        time.sleep(pause)
+        if size > 1_000_000:
+            self.held = None # frees its allocation while the other thread would be measuring
+
+def test_profiled_calls_in_two_threads_do_not_mix():
+    big, small = _Worker(), _Worker()
+    gc.disable() # a collection during a call would shift its net bytes
+    try:
+        with profile_memory():
+            first = threading.Thread(target=big.allocate, args=(20_000_000, 0.2))
+            first.start()
+            big.allocated.wait()
+            second = threading.Thread(target=small.allocate, args=(100_000, 0.3))
+            second.start()
+            first.join()
+            second.join()
+    finally:
+        gc.enable()
+    big_totals = big.memory_profile.methods['allocate']
+    small_totals = small.memory_profile.methods['allocate']
+    assert big_totals['peak_bytes'] >= 20_000_000
+    assert 90_000 <= small_totals['peak_bytes'] < 1_000_000
+    assert small_totals['net_bytes'] >= 90_000 # not minus the 20 MB that the other thread freed
+
+def test_session_records_executor_work_of_async_methods(tmp_path):
+    async def load_and_write():
+        emld = await Emld.aload('data/short_input.xml')
+        await emld.awrite_eml(str(tmp_path / 'out.xml'))
+    with profile_memory() as profile:
+        asyncio.run(load_and_write())
+    assert profile.methods['__init__']['calls'] == 1
+    assert profile.methods['write_eml']['calls'] == 1
+
+def test_tracing_stops_with_the_last_owner():
+    assert not tracemalloc.is_tracing()
+    emld = Emld('data/short_input.xml', INTERACTIVE=False, profile_memory=True)
+    with profile_memory():
+        del emld
+        gc.collect()
+        assert tracemalloc.is_tracing() # the session still owns it
+    assert not tracemalloc.is_tracing()
+
+def test_tracing_started_elsewhere_is_left_running():
+    tracemalloc.start()
+    try:
+        emld = Emld('data/short_input.xml', INTERACTIVE=False, profile_memory=True)
+        emld.get_title()
+        del emld
+        gc.collect()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
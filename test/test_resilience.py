@@ -0,0 +1,137 @@
+import asyncio
+import http.server
+import threading
+import time
+import pytest
+from src.pyEML.error_classes import CircuitOpenError
+from src.pyEML.resilience import AsyncConnectionPool, CircuitBreaker, ConnectionPool, ResilientClient, RetryPolicy
+
+class _Pool():
+    """Stands in for `ConnectionPool` and `AsyncConnectionPool`: answers from a list of outcomes"""
+    max_per_host = 1
+    timeout = 1.0
+    connect_timeout = 1.0
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+
+    def _next(self):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    def get(self, url, headers=None):
+        return self._next()
+
+    async def aget(self, url, headers=None):
+        return self._next()
+
+def _half_open_client(pool):
+    client = ResilientClient(pool=pool, retry=RetryPolicy(attempts=1), failure_threshold=1, reset_timeout=0.0)
+    client._endpoint('unit')[0].record_failure() # opened; with no reset timeout it is half-open at once
+    return client
+
+def test_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'half_open'
+    assert breaker.allow() is True
+    assert breaker.allow() is False # one trial at a time
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+def test_interrupted_trial_releases_the_breaker():
+    pool = _Pool([KeyboardInterrupt(), (200, {}, b'ok')])
+    client = _half_open_client(pool)
+    with pytest.raises(KeyboardInterrupt):
+        client.get('unit', 'http://example.invalid/')
+    assert client.get('unit', 'http://example.invalid/') == (200, {}, b'ok')
+
+def test_cancelled_async_trial_releases_the_breaker():
+    pool = _Pool([asyncio.CancelledError(), (200, {}, b'ok')])
+    client = _half_open_client(pool)
+    client.async_pool.get = pool.aget
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(client.aget('unit', 'http://example.invalid/'))
+    assert asyncio.run(client.aget('unit', 'http://example.invalid/')) == (200, {}, b'ok')
+
+def test_open_breaker_refuses_calls():
+    client = ResilientClient(pool=_Pool([]), failure_threshold=1, reset_timeout=60.0)
+    client._endpoint('unit')[0].record_failure()
+    with pytest.raises(CircuitOpenError):
+        client.get('unit', 'http://example.invalid/')
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """/slow waits before answering; /drop answers, then closes the connection without saying so, as a server does with an idle keep-alive connection"""
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def do_GET(self):
+        _Handler.requests.append(self.path)
+        if self.path == '/slow':
+            time.sleep(1.0)
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+        if self.path == '/drop':
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    _Handler.requests = []
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_stale_keep_alive_connection_is_resent(server):
+    pool = ConnectionPool(timeout=2.0)
+    assert pool.get(server + '/drop')[0] == 200
+    time.sleep(0.1)
+    status, _, body = pool.get(server + '/fast') # sent on the closed connection, then resent on a new one
+    assert (status, body) == (200, b'ok')
+    assert _Handler.requests == ['/drop', '/fast']
+
+def test_read_timeout_on_reused_connection_is_not_resent(server):
+    pool = ConnectionPool(timeout=0.3)
+    assert pool.get(server + '/fast')[0] == 200
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.get(server + '/slow')
+    assert time.monotonic() - start < 0.6
+    assert _Handler.requests.count('/slow') == 1
+
+def test_async_read_timeout_is_not_resent_and_cancel_closes_the_socket(server):
+    pool = AsyncConnectionPool(timeout=0.3)
+    writers = []
+    connect = pool._connect
+    async def _connect(key):
+        reader, writer = await connect(key)
+        writers.append(writer)
+        return reader, writer
+    pool._connect = _connect
+
+    async def _run():
+        assert (await pool.get(server + '/fast'))[0] == 200
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            await pool.get(server + '/slow') # on the reused connection
+        elapsed = time.monotonic() - start
+        task = asyncio.ensure_future(pool.get(server + '/slow'))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return elapsed
+    assert asyncio.run(_run()) < 0.6
+    assert _Handler.requests.count('/slow') == 2 # once per call; the timed-out request wasn't resent
+    assert len(writers) == 2 and all(writer.is_closing() for writer in writers)
@@ -0,0 +1,54 @@
+import math
+import random
+from src.pyEML.search import TextIndex, tokenize
+
+WORDS = 'forest pathogens birds vegetation wetlands amphibians water quality streams invasive plants soils climate fire mammals bats'.split()
+
+def _brute(index, docs, query):
+    """BM25 scores computed from the documents themselves, not the postings"""
+    counts = {}
+    for key, document in docs.items():
+        counts[key] = {}
+        for field, weight in index.weights.items():
+            text = document.get(field, '')
+            for term in tokenize(' '.join(text) if isinstance(text, list) else text):
+                counts[key][term] = counts[key].get(term, 0) + weight
+    average_length = sum(sum(c.values()) for c in counts.values()) / len(counts)
+    scores = {}
+    for term in set(tokenize(query)):
+        matches = [key for key in counts if term in counts[key]]
+        idf = math.log(1 + (len(counts) - len(matches) + 0.5) / (len(matches) + 0.5))
+        for key in matches:
+            tf = counts[key][term]
+            norm = index.k1 * (1 - index.b + index.b * sum(counts[key].values()) / average_length)
+            scores[key] = scores.get(key, 0.0) + idf * tf * (index.k1 + 1) / (tf + norm)
+    return scores
+
+def _check(index, docs, query):
+    results = index.search(query, limit=None)
+    expected = _brute(index, docs, query)
+    assert {key: score for _, score, key in results} == {key: round(score, 6) for key, score in expected.items()}
+    scores = [score for _, score, _ in results]
+    assert scores == sorted(scores, reverse=True)
+    assert index.search(query, limit=5) == results[:5]
+
+def test_scores_match_brute_force_bm25(tmp_path):
+    rng = random.Random(1)
+    index = TextIndex()
+    docs = {}
+    for i in range(400):
+        docs[f'k{i}'] = {'title': ' '.join(rng.sample(WORDS, 3)), 'abstract': ' '.join(rng.choices(WORDS + ['data', 'park'], k=rng.randint(5, 80))), 'keywords': rng.sample(WORDS, 2)}
+        index.update(f'k{i}', docs[f'k{i}'], package_id=f'p{i}')
+    queries = ['forest pathogens', 'Birds', 'water quality streams', 'the of', 'nothing here']
+    for query in queries:
+        _check(index, docs, query)
+
+    index.save(str(tmp_path))
+    loaded = TextIndex.load(str(tmp_path))
+    for i in range(0, 400, 3): # removals and replacements on a loaded index
+        loaded.remove(f'k{i}')
+        del docs[f'k{i}']
+    docs['k1'] = {'title': 'karst beetles', 'abstract': 'forest caves'}
+    loaded.update('k1', docs['k1'], package_id='p1')
+    for query in queries + ['karst forest']:
+        _check(loaded, docs, query)
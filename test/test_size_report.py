@@ -0,0 +1,10 @@
+from src.pyEML.emld import Emld
+
+def test_size_report_counts_the_whole_tree():
+    emld = Emld('data/short_input.xml', INTERACTIVE=False)
+    report = emld.get_size_report()
+    elements = [elm for elm in emld.root.iter() if isinstance(elm.tag, str)]
+    assert report['elements'] == len(elements)
+    assert report['attributes'] == sum(len(elm.attrib) for elm in elements)
+    assert report['elements'] > sum(section['elements'] for section in report['sections'].values()) # the root and `dataset` belong to no section
+    assert 'text_nodes' not in next(iter(report['sections'].values()))
@@ -0,0 +1,52 @@
+import random
+from src.pyEML.spatial import SpatialIndex
+
+def _boxes(west, east, north, south):
+    """(min x, min y, max x, max y) pieces of an EML box; a box with west > east crosses the antimeridian"""
+    low, high = min(north, south), max(north, south)
+    if west > east:
+        return [(west, low, 180.0, high), (-180.0, low, east, high)]
+    return [(west, low, east, high)]
+
+def _brute(docs, area, predicate):
+    areas = _boxes(*area)
+    keys = []
+    for key, edges in docs.items():
+        boxes = [box for box_edges in edges for box in _boxes(*box_edges)]
+        if len(boxes) == 0:
+            continue
+        if predicate == 'intersects':
+            match = any(b[0] <= a[2] and b[2] >= a[0] and b[1] <= a[3] and b[3] >= a[1] for b in boxes for a in areas)
+        elif predicate == 'contains':
+            match = all(any(b[0] <= a[0] and b[1] <= a[1] and b[2] >= a[2] and b[3] >= a[3] for b in boxes) for a in areas)
+        else:
+            match = all(any(b[0] >= a[0] and b[1] >= a[1] and b[2] <= a[2] and b[3] <= a[3] for a in areas) for b in boxes)
+        if match:
+            keys.append(key)
+    return sorted(keys)
+
+def test_queries_match_brute_force(tmp_path):
+    rng = random.Random(2)
+    index = SpatialIndex()
+    docs = {}
+    for i in range(3000):
+        edges = []
+        for _ in range(rng.randint(0, 3)):
+            west, south = rng.uniform(-180, 179), rng.uniform(-90, 89)
+            edges.append([west, min(west + rng.uniform(0, 5), 180), min(south + rng.uniform(0, 5), 90), south])
+        if i % 500 == 7:
+            edges = [[170, -170, 10, 0]] # crosses the antimeridian
+        docs[f'k{i}'] = edges
+        index.update(f'k{i}', {'bounding_boxes': edges}, package_id=f'p{i}', content_hash='h')
+    for i in range(0, 3000, 7): # edits after the tree is packed
+        index.query(0, 1, 1, 0)
+        index.remove(f'k{i}')
+        del docs[f'k{i}']
+    areas = [(-77, -70, 45, 40), (0, 10, 10, 0), (175, -175, 12, -2), (5, 5, 5, 5), (-180, 180, 90, -90)]
+    for area in areas:
+        for predicate in ('intersects', 'contains', 'within'):
+            assert [key for _, key in index.query(*area, predicate=predicate)] == _brute(docs, area, predicate), (area, predicate)
+    index.save(str(tmp_path))
+    loaded = SpatialIndex.load(str(tmp_path))
+    for area in areas:
+        assert loaded.intersects(*area) == index.intersects(*area)
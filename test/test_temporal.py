@@ -0,0 +1,45 @@
+import random
+from datetime import date
+from src.pyEML.temporal import TemporalIndex, date_bounds
+
+def _brute(docs, begin, end, predicate):
+    keys = []
+    for key, intervals in docs.items():
+        if len(intervals) == 0:
+            continue
+        if predicate == 'overlaps':
+            match = any(first <= end and last >= begin for first, last in intervals)
+        elif predicate == 'contains':
+            match = any(first <= begin and last >= end for first, last in intervals)
+        else:
+            match = all(begin <= first and last <= end for first, last in intervals)
+        if match:
+            keys.append(key)
+    return sorted(keys)
+
+def test_queries_match_brute_force(tmp_path):
+    rng = random.Random(3)
+    index = TemporalIndex()
+    docs = {}
+    base = date(1950, 1, 1).toordinal()
+    for i in range(3000):
+        intervals = []
+        for _ in range(rng.choice([0, 1, 1, 1, 2, 3])):
+            first = base + rng.randint(0, 27000)
+            intervals.append([first, first + rng.choice([0, rng.randint(0, 4000)])])
+        docs[f'k{i}'] = intervals
+        index.update(f'k{i}', {'temporal_ranges': intervals}, package_id=f'p{i}', content_hash='h')
+    for i in range(0, 3000, 7): # edits after the tree is built
+        index.query(2000)
+        index.remove(f'k{i}')
+        del docs[f'k{i}']
+    periods = [('2010', '2012'), ('2010-06-15', None), (1950, None), (date(2000, 1, 1), date(2020, 12, 31)), ('2030', None)]
+    for begin, end in periods:
+        first = date_bounds(begin)[0]
+        last = date_bounds(end if end is not None else begin)[1]
+        for predicate in ('overlaps', 'contains', 'within'):
+            assert [key for _, key in index.query(begin, end, predicate=predicate)] == _brute(docs, first, last, predicate), (begin, end, predicate)
+    index.save(str(tmp_path))
+    loaded = TemporalIndex.load(str(tmp_path))
+    for begin, end in periods:
+        assert loaded.overlaps(begin, end) == index.overlaps(begin, end)
@@ -0,0 +1,66 @@
+import time
+import pytest
+from src.pyEML import unit_api
+from src.pyEML.irma_standin import IrmaStandIn
+from src.pyEML.resilience import ResilientClient
+
+UNITS = ['ANTI', 'CATO', 'CHOH', 'GWMP', 'HAFE', 'MANA', 'MONO', 'NACE']
+
+@pytest.fixture
+def server():
+    with IrmaStandIn(synthetic_vertices=50) as standin:
+        unit_api.set_unit_api_url(standin.url)
+        try:
+            yield standin
+        finally:
+            unit_api.set_unit_api_url()
+
+def test_fresh_cache_makes_no_requests(server, tmp_path):
+    cache = unit_api.ResponseCache(directory=str(tmp_path))
+    client = ResilientClient()
+    body = unit_api.get_unit_geography('anti', cache=cache, client=client)
+    assert body == server.body('ANTI')
+    assert unit_api.get_unit_geography('ANTI', cache=cache, client=client) == body
+    assert unit_api.get_unit_geographies(['ANTI', 'ANTI'], cache=cache, client=client) == {'ANTI': body}
+    assert server.stats()['requests'] == 1
+
+def test_stale_entry_is_revalidated(server, tmp_path):
+    cache = unit_api.ResponseCache(directory=str(tmp_path), ttl=0)
+    client = ResilientClient()
+    body = unit_api.get_unit_geography('CATO', cache=cache, client=client)
+    assert server.requests[-1]['conditional'] is False
+    assert unit_api.get_unit_geography('CATO', cache=cache, client=client) == body
+    assert [(request['status'], request['conditional']) for request in server.requests] == [(200, False), (304, True)]
+
+def test_concurrent_fetch_matches_one_by_one(tmp_path):
+    with IrmaStandIn(synthetic_vertices=50, latency=0.2) as server:
+        unit_api.set_unit_api_url(server.url)
+        try:
+            client = ResilientClient()
+            start = time.monotonic()
+            together = unit_api.get_unit_geographies(UNITS, cache=unit_api.ResponseCache(directory=str(tmp_path / 'a')), client=client)
+            elapsed = time.monotonic() - start
+            apart = {unit: unit_api.get_unit_geography(unit, cache=unit_api.ResponseCache(directory=str(tmp_path / 'b')), client=client) for unit in UNITS}
+        finally:
+            unit_api.set_unit_api_url()
+    assert list(together) == UNITS
+    assert together == apart
+    assert elapsed < 0.2 * len(UNITS) / 2 # requests overlap
+    assert server.stats()['requests'] == 2 * len(UNITS)
+
+def test_standin_serves_fixtures_and_rejects_bad_urls(tmp_path):
+    from src.pyEML.error_classes import ExternalServiceError
+    from src.pyEML.irma_standin import FIXTURE_TEMPLATE
+    fixture = FIXTURE_TEMPLATE.format(geography='POLYGON ((-77.8 39.4, -77.7 39.4, -77.7 39.5, -77.8 39.4))', unit='ANTI').encode('utf-8')
+    (tmp_path / 'ANTI.xml').write_bytes(fixture)
+    with IrmaStandIn(fixtures=str(tmp_path), synthesize=False) as server:
+        unit_api.set_unit_api_url(server.url)
+        try:
+            cache = unit_api.ResponseCache(directory=str(tmp_path / 'cache'))
+            assert unit_api.get_unit_geography('ANTI', cache=cache, client=ResilientClient()) == fixture
+            with pytest.raises(ExternalServiceError):
+                unit_api.get_unit_geography('ZZZZ', cache=cache, client=ResilientClient())
+        finally:
+            unit_api.set_unit_api_url()
+    with pytest.raises(AssertionError, match='Process execution failed'):
+        unit_api.set_unit_api_url('https://example.org/no-placeholder')
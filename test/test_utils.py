@@ -0,0 +1,15 @@
+import json
+import os
+from src.pyEML.utils import split_antimeridian, write_bytes, write_json
+
+def test_split_antimeridian():
+    assert split_antimeridian(-77.5, -76.9, 38.7, 39.1) == [(-77.5, 38.7, -76.9, 39.1)]
+    assert split_antimeridian(170.0, -170.0, 10.0, -10.0) == [(170.0, -10.0, 180.0, 10.0), (-180.0, -10.0, -170.0, 10.0)]
+
+def test_writes_replace_the_file_and_leave_no_temporary_file(tmp_path):
+    filename = str(tmp_path / 'data.json')
+    write_bytes(filename, b'old')
+    write_json(filename, {'a': [1, 2]})
+    with open(filename, encoding='utf-8') as f:
+        assert json.load(f) == {'a': [1, 2]}
+    assert os.listdir(tmp_path) == ['data.json']
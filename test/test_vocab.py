@@ -0,0 +1,53 @@
+import random
+import threading
+from src.pyEML.vocab import PrefixTrie, Vocabulary, normalize_term
+
+def test_trie_matches_a_dict():
+    rng = random.Random(4)
+    trie = PrefixTrie()
+    expected = {}
+    for i in range(3000):
+        key = ''.join(rng.choices('abc d', k=rng.randint(0, 8)))
+        assert trie.insert(key, i) == expected.get(key)
+        expected[key] = i
+    assert len(trie) == len(expected)
+    for key, value in expected.items():
+        assert trie.get(key) == value and key in trie
+    assert trie.get('zzz') is None and 'abcabcabcabc' not in trie
+    assert trie.items() == sorted(expected.items())
+    for prefix in ('', 'a', 'ab', 'c d', 'dd', 'abcabcabc', 'zz'):
+        assert trie.items(prefix) == sorted((key, value) for key, value in expected.items() if key.startswith(prefix))
+    assert trie.items('a', limit=5) == sorted((key, value) for key, value in expected.items() if key.startswith('a'))[:5]
+
+def test_lookup_alternates_and_completion():
+    vocab = Vocabulary()
+    assert normalize_term('  Forêt--Pathogens ') == 'foret pathogens'
+    vocab.add_terms('NPS', [('Forest pathogens', ['tree diseases']), 'Birds'])
+    vocab.add_terms('GCMD', [('EARTH SCIENCE > BIOSPHERE > Birds', ['birds'])])
+    assert vocab.lookup('forest   PATHOGENS') == ('Forest pathogens', 'NPS')
+    assert vocab.canonicalize('Tree-Diseases') == 'Forest pathogens'
+    assert vocab.lookup('birds') == ('Birds', 'NPS') # a preferred term beats the terms it is an alternate of
+    assert vocab.lookup('birds', thesaurus='GCMD') == ('EARTH SCIENCE > BIOSPHERE > Birds', 'GCMD')
+    assert not vocab.validate('mammals')
+    assert vocab.complete('tree') == ['Forest pathogens']
+    assert vocab.complete('b') == ['Birds', 'EARTH SCIENCE > BIOSPHERE > Birds']
+    assert vocab.keyword_sets(['birds', 'mammals']) == [{'keyword': ['Birds'], 'keywordThesaurus': 'NPS'}, {'keyword': ['mammals']}]
+    assert vocab.thesauri == {'NPS': 2, 'GCMD': 1}
+
+def test_concurrent_lookups_wait_for_the_directory_to_load(tmp_path):
+    with open(tmp_path / 'nps.txt', 'w', encoding='utf-8') as f:
+        f.write('# NPS keywords\n')
+        f.writelines(f'term {i}\talternate {i}\n' for i in range(50000))
+    vocab = Vocabulary(directory=str(tmp_path))
+    barrier = threading.Barrier(8)
+    results = []
+    def _lookup():
+        barrier.wait()
+        results.append(vocab.lookup('alternate 49999'))
+    threads = [threading.Thread(target=_lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [('term 49999', 'NPS Data Store Keywords')] * 8
+    assert len(vocab) == 100000
@@ -0,0 +1,32 @@
+import os
+import pickle
+import lxml.etree as etree
+from src.pyEML.constants import LOOKUPS
+from src.pyEML.emld import Emld
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'short_input.xml')
+
+def test_wire_and_pickle_round_trips(tmp_path):
+    for emld in (Emld(DATA, INTERACTIVE=False), Emld(DATA, INTERACTIVE=False, spill_threshold=64, spill_dir=str(tmp_path))):
+        expected = etree.tostring(Emld(DATA, INTERACTIVE=False).tree)
+        assert etree.tostring(Emld.from_wire(emld.to_wire()).tree) == expected
+        unpickled = pickle.loads(pickle.dumps(emld))
+        assert etree.tostring(unpickled.tree) == expected
+        assert unpickled.xml_src == emld.xml_src
+
+def test_subset_keeps_sections_and_their_ancestors():
+    emld = Emld(DATA, INTERACTIVE=False)
+    subset = emld.subset('title', 'keywords')
+    selected = [node for section in ('title', 'keywords') for node in emld.root.findall(LOOKUPS[section]['node_xpath'])]
+    assert len(selected) > 1
+    expected = set()
+    for node in selected:
+        expected.update(emld.tree.getpath(elm) for elm in node.iter() if isinstance(elm.tag, str)) # the section itself
+        expected.update(emld.tree.getpath(anc) for anc in node.iterancestors()) # and its ancestors
+    copies = {subset.tree.getpath(elm): elm for elm in subset.root.iter() if isinstance(elm.tag, str)}
+    assert set(copies) == expected
+    for node in selected:
+        assert etree.tostring(copies[emld.tree.getpath(node)], with_tail=False) == etree.tostring(node, with_tail=False)
+    titles = [elm.text for elm in emld.get_title()]
+    assert [elm.text for elm in subset.get_title()] == titles
+    assert [elm.text for elm in Emld.from_wire(subset.to_wire()).get_title()] == titles
@@ -0,0 +1,33 @@
+import pytest
+from src.pyEML.wkt import parse_wkt, wkt_extent
+
+def test_polygon_with_negative_longitudes():
+    assert wkt_extent('POLYGON ((-77.5 38.2, -77.1 38.9, -78.2 39.0, -77.5 38.2))') == (39.0, -77.1, 38.2, -78.2)
+
+def test_polygon_with_a_hole():
+    geometry = parse_wkt('POLYGON ((-10 -10, 10 -10, 10 10, -10 10, -10 -10), (-1 -1, 1 -1, 1 1, -1 1, -1 -1))')
+    assert geometry.extent() == (10.0, 10.0, -10.0, -10.0)
+    assert geometry.ring_offsets.tolist() == [0, 5, 10]
+    assert geometry.ring_polygons.tolist() == [0, 0]
+
+def test_multipolygon_and_extra_ordinates():
+    wkt = 'MULTIPOLYGON (((-113.9 48.2, -113.2 48.2, -113.2 49.0, -113.9 48.2)), ((-68.4 44.2, -68.1 44.2, -68.1 44.5, -68.4 44.5, -68.4 44.2), (-68.3 44.3, -68.2 44.3, -68.2 44.4, -68.3 44.3)))'
+    geometry = parse_wkt(wkt)
+    assert geometry.extent() == (49.0, -68.1, 44.2, -113.9)
+    assert geometry.ring_polygons.tolist() == [0, 1, 1]
+    assert len(geometry.polygons()[1]) == 2
+    assert parse_wkt(geometry.to_wkt()).extent() == geometry.extent()
+    assert wkt_extent('POLYGON Z ((1 2 100, 3 4 100, 5 -6 100, 1 2 100))') == (4.0, 5.0, -6.0, 1.0)
+
+@pytest.mark.parametrize('wkt', [
+    'POINT (1 2)',
+    'POLYGON EMPTY',
+    'POLYGON ((1 2, 3 4, 5 6, 1 2)',
+    'POLYGON ((1 2, 3 4, 5, 1 2))',
+    'POLYGON ((1 2, 3 four, 5 6, 1 2))',
+    'POLYGON ((1 2, 3 4.4.4, 5 6, 1 2))',
+    'POLYGON ((1 2, 3 -, 5 6, 1 2))',
+])
+def test_malformed_text_raises_value_error(wkt):
+    with pytest.raises(ValueError):
+        parse_wkt(wkt)